@@ -8,6 +8,9 @@ from datetime import datetime, timedelta
 from time import sleep, time
 import numpy as np
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'lib'))
+from reading import burst_timestamps
+
 def HEX2INT(value, default = 0):
     if ('.' not in str(value)) and ('#' not in str(value)):
         try:
@@ -40,29 +43,8 @@ print("reading total time: {0:3f}s".format(te-ts))
 
 ##
 ts = time() 
-curr_t = pd.to_datetime(float('nan'))
-k = 0
-total = len(df)
-rows = zip(range(total),df['time'],df['ch1'])
-tstmp = [curr_t]*total
-#for idx, row in df.iterrows():
-for (idx, t, ch1) in rows:
-#    t = row['time']
-#    ch1 = row['ch1']
-    if (not pd.isnull(t)) and (pd.isnull(ch1)):
-        curr_t = t
-        k = 0
-#    if (idx<10 and not pd.isnull(t)):
-#    df.loc[idx,'time_stmp'] = curr_t + timedelta(milliseconds=5*k)
-    tstmp[idx] = curr_t + timedelta(milliseconds=5*k)
-    k = k+1
-    if (idx%20000)==0 and idx>0:
-        te = time()
-        etc = (te-ts)*(float(total)/idx - 1)
-        print("{0:0.3f} % ETC: {1:0.3f} s \r".format(idx/float(total)*100,etc),end="\r")
-        #print("{0:0.3f} %".format(idx/float(total)*100),end='\r')
-    
-df['time_stmp'] = tstmp
+# header de cada burst: fila con tiempo y sin canales; una muestra cada 5 ms
+df['time_stmp'] = burst_timestamps(df, time_col='time', channel_col='ch1', period='5ms')
 te=time()
 print("adding time stmp, total time: {0:3f}s".format(te-ts))
 
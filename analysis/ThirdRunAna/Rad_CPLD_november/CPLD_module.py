@@ -12,6 +12,9 @@ import serial
 from datetime import datetime
 from time import time, sleep
 import logging
+from collections import deque
+
+from batch_writer import BatchWriter
 
 
 
@@ -35,6 +38,58 @@ signal.signal(signal.SIGINT, signal_handler)
 ###################################################################
 
 
+class FrameParser:
+    ''' Separa los frames "#<datos>*\n" de la CPLD en un stream de bytes.
+    feed() recibe lo leído del puerto (en trozos de cualquier tamaño) y retorna
+    los frames completos como str; lo que queda de un frame cortado se guarda
+    para la próxima llamada. Cada trozo que no es un frame válido (basura entre
+    frames, frame sin '*', bytes no ascii) se cuenta en 'errors'. '''
+
+    MAXLEN = 64 # un frame normal tiene 14 bytes
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.pending = b""
+        self.errors = 0
+
+    def take_errors(self):
+        n, self.errors = self.errors, 0
+        return n
+
+    def feed(self, data):
+        buf = self.pending + data
+        frames = []
+        pos = 0
+        while True:
+            nl = buf.find(b"\n", pos)
+            if nl < 0:
+                break
+            chunk = buf[pos:nl + 1]
+            pos = nl + 1
+            start = chunk.rfind(b"#")
+            if start != 0:
+                self.errors += 1 # basura antes del '#' (o sin '#')
+                if start < 0:
+                    continue
+                chunk = chunk[start:]
+            if not chunk.endswith(b"*\n") or len(chunk) < 12:
+                self.errors += 1
+                continue
+            try:
+                frames.append(chunk.decode("ascii"))
+            except UnicodeDecodeError:
+                self.errors += 1
+        rest = buf[pos:]
+        if len(rest) > self.MAXLEN: # sin '\n' hace rato: se descarta
+            self.errors += 1
+            start = rest.rfind(b"#")
+            rest = rest[start:] if 0 < start and len(rest) - start <= self.MAXLEN else b""
+        self.pending = rest
+        return frames
+
+
 class CPLD:
     '''In charge of tunning CPLD board in orden to get a proper conection with
     the port. Every possible error that appears here should be managed on the 
@@ -59,17 +114,22 @@ class CPLD:
                                     # luego el primer trazo del nombre del archivo
                                     # '.log' que se va a guardar.
     fidx  = 0 #id de los archivos
-    outfile = None #P/? aún no entiendo q representa bn este. si un archivo, pero
-        	       # de qué.
+    outfile = None # BatchWriter del archivo actual (lleva bytes/filas en memoria
+                   # y escribe por lotes; rota solo al pasar MAXFSIZE o MAXFAGE)
     MAXFSIZE = 1 #máximo tamaño archivos a guardar (en megabytes)
+    MAXFAGE = None # rotar también cada tantos segundos (None: sólo por tamaño)
+    FLUSHTIME = 1.0 # flush a disco cada FLUSHTIME segundos
     dataframe = []  # buffer que guarda el evento en read_evento
                     # tambien se ocupa en replace_ofile
+    sink = None     # si no es None, store_event le entrega el evento (lista de
+                    # líneas) en vez de escribirlo (ver daq_runtime.py)
 
 
     ## Parámetros de lectura de datos (recibidos)
     MAXWAITCNT = 30   # esperamos leer hasta 15 veces 4bytes (ver método wait_initial_seq)
     MAXREADTIME = 100
     MAXWAITTIME = 40
+    MAXBADFRAMES = 20 # trozos inválidos seguidos antes de rendirse en read_event
     evtcnt = 0       # conteo de ventos en método read_event
 
     ## Otros parámetros
@@ -79,6 +139,8 @@ class CPLD:
     def __init__(self,portn,rootdir=None, log = None):
         self.log = log
         self.cnt_error = 0
+        self.parser = FrameParser()
+        self.frames = deque() # (time(), frame) ya leídos, aún no guardados
         ## Establecer conexion con el puerto. 
         # P. Ojalá núm puerto no sea un valor sea hardcodeado en launchDAQ.py
         try :
@@ -99,7 +161,9 @@ class CPLD:
             self.fname += "_" + date + "_" + "{:05d}.dat".format(self.fidx)
             
             try:
-                self.outfile = open(self.fname,"w") # crea y escribe sobre el archivo
+                # crea el archivo; las escrituras van por lotes (ver batch_writer.py)
+                self.outfile = BatchWriter(self.fname, max_bytes=int(self.MAXFSIZE*1000000),
+                                           max_age_s=self.MAXFAGE, flush_s=self.FLUSHTIME)
             except :
                 log.info("ERROR: file:"+self.fname+" for CPLD data was not created")
                 # print("ERROR: file:"+self.fname+" for CPLD data was not created")
@@ -147,35 +211,24 @@ class CPLD:
 
     ## Sobre el manejo de los eventos que recibe: 
     def store_event(self):  #GUARDAR EVENTO Q SE RECIBE. 
-        ## Limita largo del evento q recibe
-            #getsize = retorna tamaño archivo en bytes
-        #print(os.path.getsize(self.fname)/50000.)
-        if os.path.getsize(self.fname)/10000. > self.MAXFSIZE:
-                # obs: se pasan bytes a megabytes para comparar con MAXFSIZE
-                # ? - pq el punto al final del número?
-
-            #Si alcanza máximo tamaño 'MAXFSIZE', hago un nuevo archivo.
-            self.replace_ofile() # Esto, ocupando un método hecho más abajo.
-        for line in self.dataframe:
-            self.outfile.write(line)
-
-    def replace_ofile(self): # CREA UN NUEVO ARCHIVO PARA UN MISMO EVENTO CON DIFERENTE ID
-        self.fidx +=1 #id de los files para diferenciarlos entre si ??
-                    # ? - estos archivos consecutivos parece q son wardados
-                    #  con la misma fecha/timepo?
-        self.fname = self.fname[:len(self.fname)-9] + "{:05d}.dat".format(self.fidx)
+        if self.sink is not None:
+            self.sink(list(self.dataframe))
+            return
+        # BatchWriter rota el archivo al llegar a MAXFSIZE (megabytes, contando
+        # los bytes en memoria: sin os.path.getsize por evento) o a MAXFAGE.
+        self.outfile.write_lines(self.dataframe)
+        self.fname = self.outfile.fname
+        self.fidx = self.outfile.fidx
+
+    def replace_ofile(self): # CREA UN NUEVO ARCHIVO (mismo nombre, siguiente id)
         try:
             print("crendo nuevo archivo")
-            self.outfile.close()
-            self.outfile = open(self.fname,"w")
+            self.fname = self.outfile.rotate()
+            self.fidx = self.outfile.fidx
         except :
             print("ERROR: file:"+self.fname+" for CPLD data was not created")
             exit()
 
-        for line in self.dataframe: # para q usa el dataframe?? (atributo de clase)
-                                    # parece ser cmo el buffer q me comentaba q había.
-            self.outfile.write(line)   
-
 
     def wait_initial_seq(self):
         '''Implementa dos formas de esperar la llegada de la primera señal desde
@@ -295,104 +348,75 @@ class CPLD:
         self.store_event()
         self.evtcnt += 1
         return 0
-    def read_event(self): #puedo copiarlo
+    def read_frames(self):
+        ''' lee lo que haya en el puerto y lo pasa al FrameParser. Si no hay
+        nada esperando, bloquea hasta el próximo '\n' o hasta TIMEOUT.
+        Retorna False si el puerto no entregó nada (timeout). '''
+        n = self.sp.in_waiting
+        data = self.sp.read(n) if n else self.sp.read_until(b"\n")
+        if not data:
+            return False
+        for frame in self.parser.feed(data):
+            self.frames.append((time(), frame))
+        self.cnt_error += self.parser.take_errors()
+        return True
+
+    def read_event(self):
+        ''' Guarda todos los frames '#...*\n' completos disponibles (al menos uno).
+        Retorna 0 (ok), -1 (reset por muchos errores) o -2 (sólo basura).
+        Lectura en bloque (in_waiting / read_until): no se descarta lo que queda
+        en el buffer ni hay sleeps fijos; un frame cortado se completa en la
+        siguiente lectura. Cada trozo inválido suma 1 a cnt_error, como antes. '''
         self.log.info("reading event {}".format(self.evtcnt))
-        #print("reading event {}".format(self.evtcnt))
         self.dataframe = [] #buffer que almacena (en ram) el msje recibido
-        
-        start_time = time()
-        res = self.sp.read(14) 
-        cnt = 0
+
         if(self.cnt_error > 400):
             self.cnt_error = 0
             print('Error count:'+str(self.cnt_error))
             print('Many errors detected')
             self.dataframe.append(str(time()) + "," + 'reset'+"\n")
-            self.sp.reset_input_buffer() 
-            sleep(0.4)
+            self.sp.reset_input_buffer()
+            self.parser.reset()
+            self.frames.clear()
             self.log.info("storing event {}".format(self.evtcnt))
-            #print("storing event {}".format(self.evtcnt))
             self.store_event()
             self.evtcnt += 1
             return -1
-            
-        for j in range (0,20):
-            for i in range(0,20):
-                res = self.sp.read(1)
-                if(res.decode() == '\n'):
-                    res = self.sp.read(14)
-                    break
-            if((res.decode()[0]=='#') and (res.decode()[-2:]=='*\n')):
-                break
-            else:
-                print('Error count:'+str(self.cnt_error))
-                self.cnt_error+=1     
-            if(j==20):
+
+        errors_before = self.cnt_error
+        while not self.frames:
+            if not self.read_frames():
+                # timeout sin datos: como antes (res vacío -> excepción), se deja
+                # que launchCPLD cuente el error y haga el power cycle si se repite
+                raise TimeoutError("no data from CPLD in {} s".format(self.TIMEOUT))
+            if self.cnt_error - errors_before > self.MAXBADFRAMES:
                 print("Max cnt reach")
                 return -2
-        
-        #for i in range (0,20):
-        #    res = self.sp.readline()
-        #    if((res.decode()[0]=='#') and (res.decode()[-2:]=='*\n')):
-        #        break
-        #    else:
-        #        print('Error count:'+str(self.cnt_error))
-        #        self.cnt_error+=1     
-        #    if(i==20):
-        #        print("Max cnt reach")
-        #        return -2
-        #while(res.decode()[0]!='#'):
-        #    cnt+=1
-        #    res = self.sp.readline()
-        #    if(cnt > self.MAXWAITCNT):
-        #        print("Max cnt reach")
-        #        return -1
-        #print(f'res_readline en read_event {res}')
-        print(res.decode())
-        cnt_ones = 0
-        cnt_F = 0
-             
-        if(res.decode()[3]=='F'):
-            cnt_F+=1
-        if(res.decode()[4]=='F'):
-            cnt_F+=1
-        if(res.decode()[8]=='F'):
-            cnt_F+=1
-        if(res.decode()[9]=='F'):
-            cnt_F+=1
-        
-        if((cnt_F < 3)):
-            self.cnt_error+=1
-            print('Error count:'+str(self.cnt_error))
-        else:
-            #No hay tantos errores seguidos
-            if(self.cnt_error < 100):
-                self.cnt_error = 0
-
-        
 
-        if (not res): #ssi res!= None ó '' (texto vacio)
-            return -2
-
-        if (res.decode()[-2:] == '*\n'):
-            self.dataframe.append(str(time()) + "," + res.decode()[1:-2]+"\n")
-            self.sp.reset_input_buffer() 
-            sleep(0.4)
-            self.log.info("storing event {}".format(self.evtcnt))
-            #print("storing event {}".format(self.evtcnt))
-            self.store_event()
+        while self.frames:
+            t, res = self.frames.popleft()
+            print(res)
+            # palabras esperadas "FF" en las posiciones 3,4 y 8,9 del frame
+            cnt_F = (res[3] == 'F') + (res[4] == 'F') + (res[8] == 'F') + (res[9] == 'F')
+            if((cnt_F < 3)):
+                self.cnt_error+=1
+                print('Error count:'+str(self.cnt_error))
+            else:
+                #No hay tantos errores seguidos
+                if(self.cnt_error < 100):
+                    self.cnt_error = 0
+            self.dataframe.append(str(t) + "," + res[1:-2]+"\n")
             self.evtcnt += 1
-            return 0
-        print("Not finish seq")
-        self.cnt_error+=1
-        sleep(0.4)
+
+        self.log.info("storing event {}".format(self.evtcnt - 1))
+        self.store_event()
         return 0
-       
-        
+
 
     def __del__(self):
         self.sp.close() #cerramos el puerto
-        self.outfile.close() #?
+        if self.outfile is not None:
+            self.outfile.close() #?
     
 
     # Pretendemos recibir información
@@ -0,0 +1,129 @@
+## Lector incremental ("tail -f") de los .dat que escribe DMM_module.py
+#
+# launchCPLD.py revisa la corriente antes de cada lectura de la CPLD. Antes lo
+# hacía con os.listdir + pd.read_csv del archivo completo (dos veces por
+# iteración) sólo para mirar las últimas filas, y el costo crecía con el archivo.
+# DMMTail guarda el offset del archivo y un buffer circular con las últimas
+# lecturas de corriente: cada poll() sólo lee los bytes nuevos.
+#
+# Formato de cada línea (DMM.store_values): "<time()> <idc>\n"
+
+import os
+from collections import deque
+from time import time
+
+import numpy as np
+
+# Al (re)abrir un archivo sólo se leen los últimos bytes: basta para llenar el buffer.
+TAIL_BYTES = 4096
+
+
+class DMMTail:
+    datadir = None
+    fname = None
+    offset = 0
+    pending = b""
+
+    def __init__(self, datadir, maxlen=5, rescan_s=30.0):
+        self.datadir = datadir
+        self.rescan_s = rescan_s
+        self.last_scan = -np.inf
+        # lecturas como float32: mismo redondeo que el dtype usado antes con read_csv
+        self.values = deque(maxlen=maxlen)
+
+    def newest_file(self):
+        ''' último .dat del directorio (mismo criterio que antes: orden de nombre) '''
+        self.last_scan = time()
+        try:
+            files = sorted(f for f in os.listdir(self.datadir) if f.endswith(".dat"))
+        except OSError:
+            return None
+        return os.path.join(self.datadir, files[-1]) if files else None
+
+    def next_file(self):
+        ''' archivo siguiente de la rotación de DMM.replace_ofile (..._{fidx+1:05d}.dat) '''
+        try:
+            fidx = int(self.fname[-9:-4])
+        except (TypeError, ValueError):
+            return None
+        cand = self.fname[:-9] + "{:05d}.dat".format(fidx + 1)
+        return cand if os.path.exists(cand) else None
+
+    def open(self, fname, from_start):
+        self.fname = fname
+        self.pending = b""
+        size = os.path.getsize(fname)
+        if from_start or size <= TAIL_BYTES:
+            self.offset = 0
+        else:
+            # saltar al final; la primera línea (cortada) se descarta en read_new
+            self.offset = size - TAIL_BYTES
+            self.pending = None
+
+    def read_new(self):
+        ''' lee los bytes agregados desde el último poll y agrega las lecturas completas '''
+        size = os.path.getsize(self.fname)
+        if size < self.offset:  # archivo truncado/reescrito
+            self.offset = 0
+            self.pending = b""
+        if size == self.offset:
+            return 0
+        with open(self.fname, "rb") as f:
+            f.seek(self.offset)
+            chunk = f.read(size - self.offset)
+        self.offset += len(chunk)
+
+        if self.pending is None:
+            # descartar hasta el primer salto de línea (línea incompleta)
+            cut = chunk.find(b"\n")
+            if cut < 0:
+                return 0
+            chunk, self.pending = chunk[cut + 1:], b""
+        lines = (self.pending + chunk).split(b"\n")
+        self.pending = lines.pop()  # resto sin '\n': se completa en el próximo poll
+
+        n = 0
+        for line in lines:
+            fields = line.strip().split(b" ")
+            if len(fields) < 2:
+                continue  # líneas vacías (idc trae su propio fin de línea)
+            try:
+                self.values.append(np.float32(float(fields[1])))
+            except ValueError:
+                continue  # línea corrupta: se ignora, como on_bad_lines='skip'
+            n += 1
+        return n
+
+    def poll(self):
+        ''' actualiza el buffer; retorna cuántas lecturas nuevas se agregaron '''
+        if self.fname is None or not os.path.exists(self.fname):
+            fname = self.newest_file()
+            if fname is None:
+                return 0
+            self.open(fname, from_start=False)
+
+        n = self.read_new()
+        # rotación de archivo del DMM: seguir con el siguiente índice
+        nxt = self.next_file()
+        while nxt is not None:
+            self.open(nxt, from_start=True)
+            n += self.read_new()
+            nxt = self.next_file()
+        # de vez en cuando revisar si apareció otra serie (p.ej. DMM_module reiniciado)
+        if time() - self.last_scan > self.rescan_s:
+            newest = self.newest_file()
+            if newest is not None and newest > self.fname:
+                self.open(newest, from_start=False)
+                n += self.read_new()
+        return n
+
+    def last(self, n):
+        ''' últimas n lecturas (o menos, si aún no hay tantas) '''
+        vals = list(self.values)[-n:] if n > 0 else []
+        return np.array(vals, dtype=np.float32)
+
+    def count_below(self, threshold, n):
+        return int((self.last(n) < np.float32(threshold)).sum())
+
+    def count_above(self, threshold, n):
+        return int((self.last(n) > np.float32(threshold)).sum())
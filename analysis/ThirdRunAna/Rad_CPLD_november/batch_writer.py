@@ -0,0 +1,170 @@
+## Escritura por lotes de los .dat de la CPLD (y de cualquier módulo que guarde
+# líneas "<time()>,<datos>\n" / "<time()> <datos>\n")
+#
+# CPLD.store_event hacía un os.path.getsize por evento y escribía cada línea
+# directo al archivo; además el umbral de rotación (getsize/10000. > MAXFSIZE)
+# cortaba archivos de ~10 kB. BatchWriter:
+#   - lleva la cuenta de bytes escritos en memoria (sin syscalls por evento),
+#   - junta las líneas en un buffer y las escribe con flush (+fsync opcional)
+#     cada 'flush_s' segundos o cuando el buffer pasa 'buffer_bytes'; el flush
+#     por tiempo lo hace un hilo temporizador, así lo último antes de una falla
+#     llega a disco aunque la CPLD se calle (latch-up, powercycle_C de 300 s,
+#     puerto trabado),
+#   - rota el archivo al pasar 'max_bytes' o 'max_age_s' (lo que ocurra antes),
+#     con el mismo esquema de nombres ..._{fidx:05d}.dat de replace_ofile,
+#   - deja al lado de cada .dat un índice "<archivo>.idx" (JSON) con el número
+#     de filas y el primer/último timestamp, para leer rangos sin abrir todo,
+#   - escribe los fin de línea de la plataforma (CRLF en Windows), igual que el
+#     open(fname, "w") de antes, aunque el archivo se abre en binario.
+
+import json
+import os
+import threading
+from time import time
+
+# Por defecto los .dat quedan de 1 MB (MAXFSIZE = 1 en CPLD_module.py)
+MAXBYTES = 1000000
+
+
+def line_time(line):
+    ''' timestamp (time()) al inicio de la línea, o None si no se puede leer '''
+    head = line[:32].replace(",", " ").split(" ", 1)[0]
+    try:
+        return float(head)
+    except ValueError:
+        return None
+
+
+def read_index(fname):
+    ''' lee el índice de un .dat (None si no existe) '''
+    try:
+        with open(fname + ".idx") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class BatchWriter:
+    fname = None
+    fidx = 0
+
+    def __init__(self, fname, max_bytes=MAXBYTES, max_age_s=None, flush_s=1.0,
+                 buffer_bytes=65536, fsync=False, timer=True, newline=os.linesep):
+        ''' fname: primer archivo, terminado en "_{fidx:05d}.dat"
+        timer: flush periódico desde un hilo (si es False, sólo al escribir)
+        newline: con qué se escribe cada '\\n' de las líneas (como el modo texto) '''
+        self.max_bytes = max_bytes
+        self.max_age_s = max_age_s
+        self.flush_s = flush_s
+        self.buffer_bytes = buffer_bytes
+        self.fsync = fsync
+        self.newline = newline.encode()
+        self.outfile = None
+        self.lock = threading.RLock()  # el temporizador y el lector comparten el buffer
+        self.fidx = int(fname[-9:-4])
+        self.open(fname)
+        self.stop_timer = threading.Event()
+        self.timer = None
+        if timer and flush_s:
+            self.timer = threading.Thread(target=self.flush_loop, name="batch_writer_flush", daemon=True)
+            self.timer.start()
+
+    def open(self, fname):
+        self.fname = fname
+        self.outfile = open(fname, "wb")
+        self.opened = time()
+        self.last_flush = self.opened
+        self.nbytes = 0       # bytes del archivo actual (escritos + en buffer)
+        self.rows = 0
+        self.first_time = None
+        self.last_time = None
+        self.buffer = []
+        self.buffered = 0
+
+    def next_fname(self):
+        return self.fname[:len(self.fname) - 9] + "{:05d}.dat".format(self.fidx + 1)
+
+    def must_rotate(self, now):
+        if self.nbytes == 0:
+            return False  # nunca dejar un archivo vacío
+        if self.max_bytes is not None and self.nbytes >= self.max_bytes:
+            return True
+        return self.max_age_s is not None and now - self.opened >= self.max_age_s
+
+    def rotate(self):
+        ''' cierra el archivo actual (con su índice) y abre el siguiente '''
+        with self.lock:
+            self.close_file()
+            fname = self.next_fname()
+            self.fidx += 1
+            self.open(fname)
+            return self.fname
+
+    def write_lines(self, lines):
+        ''' agrega las líneas de un evento; rota antes si corresponde '''
+        with self.lock:
+            now = time()
+            if self.must_rotate(now):
+                self.rotate()
+            for line in lines:
+                data = line.encode()
+                if self.newline != b"\n":
+                    data = data.replace(b"\n", self.newline)
+                self.buffer.append(data)
+                self.buffered += len(data)
+                self.nbytes += len(data)
+                self.rows += 1
+                t = line_time(line)
+                if t is not None:
+                    if self.first_time is None:
+                        self.first_time = t
+                    self.last_time = t
+            if self.buffered >= self.buffer_bytes or now - self.last_flush >= self.flush_s:
+                self.flush()
+
+    def flush_due(self):
+        ''' flush si hay líneas en el buffer y pasaron flush_s desde el último '''
+        with self.lock:
+            if self.buffer and time() - self.last_flush >= self.flush_s:
+                self.flush()
+
+    def flush_loop(self):
+        ''' hilo temporizador: revisa el buffer cada flush_s aunque no lleguen
+        eventos (write_lines no se llama mientras la CPLD está callada) '''
+        while not self.stop_timer.wait(self.flush_s):
+            self.flush_due()
+
+    def flush(self):
+        with self.lock:
+            if self.outfile is None:
+                return
+            if self.buffer:
+                self.outfile.write(b"".join(self.buffer))
+                self.buffer = []
+                self.buffered = 0
+            self.outfile.flush()
+            if self.fsync:
+                os.fsync(self.outfile.fileno())
+            self.last_flush = time()
+            self.write_index()
+
+    def write_index(self):
+        info = {"file": os.path.basename(self.fname), "rows": self.rows, "bytes": self.nbytes,
+                "first_time": self.first_time, "last_time": self.last_time}
+        tmp = self.fname + ".idx.tmp"
+        with open(tmp, "w") as f:
+            json.dump(info, f)
+        os.replace(tmp, self.fname + ".idx")
+
+    def close_file(self):
+        with self.lock:
+            if self.outfile is None:
+                return
+            self.flush()
+            self.outfile.close()
+            self.outfile = None
+
+    def close(self):
+        ''' flush final, cierra el archivo y detiene el temporizador '''
+        self.stop_timer.set()
+        self.close_file()
@@ -0,0 +1,170 @@
+## Benchmark de los módulos del DAQ contra puertos falsos (fake_serial.py)
+#
+# Para cada módulo (CPLD, VERDAQ8, DMM, ARDU) abre un FakeSerial con tráfico
+# sintético (o un .dat grabado con --replay-cpld) y mide:
+#   events/s       eventos guardados (o respuestas válidas) por segundo
+#   dropped        frames/líneas enviados que no terminaron guardados
+#                  (corruptos, descartados por reset_input_buffer, buffer lleno)
+#   lat_*_ms       tiempo entre que la línea está disponible en el puerto y
+#                  que el módulo la lee (DMM/ARDU: ida y vuelta del comando)
+#
+# Uso:  python bench_daq.py --rate 500 --n 2000 --corrupt 0.01 --stall-every 500 --stall-s 0.5
+
+import argparse
+import contextlib
+import io
+import logging
+import os
+import tempfile
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+
+# fake_serial se importa antes que los módulos del DAQ (instala 'serial' si falta)
+from fake_serial import (FakeSerial, ardu_responder, cpld_frames, dmm_responder,
+                         fake_ports, replay_cpld, verdaq_events)
+
+log = logging.getLogger("bench_daq")
+log.setLevel(logging.WARNING)
+
+
+def _row(module, events, seconds, sp, extra_dropped=0, rtt=None):
+    st = sp.stats()
+    row = {"module": module, "events": events, "seconds": seconds,
+           "events_per_s": events / seconds if seconds > 0 else np.nan,
+           "dropped": extra_dropped, "corrupted": st["corrupted"], "overflow": st["overflow"],
+           "stalls": st["stalls"]}
+    lat = np.asarray(rtt if rtt is not None else sp.latency) * 1e3
+    row["lat_median_ms"] = np.median(lat) if len(lat) else np.nan
+    row["lat_p99_ms"] = np.percentile(lat, 99) if len(lat) else np.nan
+    row["lat_max_ms"] = lat.max() if len(lat) else np.nan
+    return row
+
+
+def bench_cpld(n=2000, rate=500.0, corrupt=0.0, stall_every=0, stall_s=0.0, replay=None, seed=0):
+    ''' lee con CPLD.read_event hasta agotar el tráfico; cada frame es un evento '''
+    from CPLD_module import CPLD
+    script = list(replay_cpld(replay)) if replay else list(cpld_frames(n, seed=seed))
+    port = "FAKE_CPLD"
+    mk = lambda **kw: FakeSerial(script=script, rate=rate, corrupt=corrupt,
+                                 stall_every=stall_every, stall_s=stall_s,
+                                 force_timeout=max(0.5, 2 * stall_s), seed=seed, **kw)
+    with tempfile.TemporaryDirectory() as rootdir, fake_ports({port: mk}) as opened, \
+            contextlib.redirect_stdout(io.StringIO()):
+        cpld = CPLD(port, rootdir, log=log)
+        sp = opened[0]
+        t0 = t1 = perf_counter()
+        while True:
+            try:
+                cpld.read_event()
+            except TimeoutError:
+                break  # tráfico agotado
+            t1 = perf_counter()
+        seconds = t1 - t0
+        cpld.outfile.close()
+        events = cpld.evtcnt
+        del cpld
+    return _row("CPLD", events, seconds, sp, extra_dropped=len(script) - events)
+
+
+def bench_verdaq(n=5, lines=64, rate=2000.0, period_s=1.0, corrupt=0.0, stall_every=0,
+                 stall_s=0.0, seed=0):
+    ''' n llamadas a VERDAQ8.read_event sobre eventos de 'lines' filas, uno cada
+    period_s segundos. Con period_s chico el reset_input_buffer + sleep(0.2)
+    tras cada evento pierde el inicio del siguiente y el módulo cae en los
+    reintentos de wait_initial_seq (sleep(2) cada uno). '''
+    from verDAQ8_module import VERDAQ8
+    script = list(verdaq_events(n, lines=lines, period_s=period_s, seed=seed))
+    port = "FAKE_VERDAQ"
+    mk = lambda **kw: FakeSerial(script=script, rate=rate, corrupt=corrupt,
+                                 stall_every=stall_every, stall_s=stall_s, seed=seed, **kw)
+    with tempfile.TemporaryDirectory() as rootdir, fake_ports({port: mk}) as opened, \
+            contextlib.redirect_stdout(io.StringIO()):
+        os.mkdir(rootdir + "/VERDAQ8_data")
+        dev = VERDAQ8(port, rootdir)
+        sp = opened[0]
+        t0 = perf_counter()
+        for _ in range(n):
+            dev.read_event()
+        seconds = perf_counter() - t0
+        dev.outfile.close()
+        events = dev.evtcnt
+    return _row("VERDAQ8", events, seconds, sp, extra_dropped=n - events)
+
+
+def bench_dmm(n=200, slow_s=0.0, corrupt=0.0, stall_every=0, stall_s=0.0, seed=0):
+    ''' n consultas :FETC? con DMM.getValues (sin el sleep(1) del __main__) '''
+    from DMM_module import DMM
+    port = "FAKE_DMM"
+    mk = lambda **kw: FakeSerial(responder=dmm_responder(slow_s=slow_s, seed=seed),
+                                 corrupt=corrupt, stall_every=stall_every, stall_s=stall_s,
+                                 seed=seed, **kw)
+    with fake_ports({port: mk}) as opened, contextlib.redirect_stdout(io.StringIO()):
+        dmm = DMM(port)
+        sp = opened[0]
+        rtt, good = [], 0
+        t0 = perf_counter()
+        for _ in range(n):
+            t = perf_counter()
+            res = dmm.getValues()
+            rtt.append(perf_counter() - t)
+            try:
+                float(res)
+                good += 1
+            except ValueError:
+                pass
+        seconds = perf_counter() - t0
+        del dmm
+    return _row("DMM", good, seconds, sp, extra_dropped=n - good, rtt=rtt)
+
+
+def bench_ardu(n=200, slow_s=0.0, stall_every=0, stall_s=0.0, seed=0):
+    ''' n comandos ARDU.sendCMD (respuesta "=>") '''
+    from ARDU_module import ARDU
+    port = "FAKE_ARDU"
+    mk = lambda **kw: FakeSerial(responder=ardu_responder(slow_s=slow_s),
+                                 stall_every=stall_every, stall_s=stall_s, seed=seed, **kw)
+    with fake_ports({port: mk}) as opened, contextlib.redirect_stdout(io.StringIO()):
+        ardu = ARDU(port)
+        sp = opened[0]
+        rtt = []
+        t0 = perf_counter()
+        for _ in range(n):
+            t = perf_counter()
+            ardu.sendCMD(":RST_C:ON\r")
+            rtt.append(perf_counter() - t)
+        seconds = perf_counter() - t0
+        del ardu
+    return _row("ARDU", n, seconds, sp, rtt=rtt)
+
+
+def run(modules=("CPLD", "VERDAQ8", "DMM", "ARDU"), n=2000, rate=500.0, corrupt=0.0,
+        stall_every=0, stall_s=0.0, replay_cpld=None):
+    rows = []
+    if "CPLD" in modules:
+        rows.append(bench_cpld(n, rate, corrupt, stall_every, stall_s, replay=replay_cpld))
+    if "VERDAQ8" in modules:
+        rows.append(bench_verdaq(max(1, n // 400), corrupt=corrupt,
+                                 stall_every=stall_every, stall_s=stall_s))
+    if "DMM" in modules:
+        rows.append(bench_dmm(max(1, n // 10), corrupt=corrupt,
+                              stall_every=stall_every, stall_s=stall_s))
+    if "ARDU" in modules:
+        rows.append(bench_ardu(max(1, n // 10), stall_every=stall_every, stall_s=stall_s))
+    return pd.DataFrame(rows)
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description="DAQ modules throughput against fake serial ports")
+    ap.add_argument("--modules", default="CPLD,VERDAQ8,DMM,ARDU")
+    ap.add_argument("--n", type=int, default=2000, help="CPLD frames (VERDAQ8: n/400 events, DMM/ARDU: n/10 commands)")
+    ap.add_argument("--rate", type=float, default=500.0, help="CPLD frames per second")
+    ap.add_argument("--corrupt", type=float, default=0.0)
+    ap.add_argument("--stall-every", type=int, default=0)
+    ap.add_argument("--stall-s", type=float, default=0.0)
+    ap.add_argument("--replay-cpld", default=None, help="recorded cpld_data_*.dat to replay")
+    args = ap.parse_args()
+    df = run(args.modules.split(","), args.n, args.rate, args.corrupt,
+             args.stall_every, args.stall_s, args.replay_cpld)
+    print(df.to_string(index=False, float_format=lambda x: "{:.3g}".format(x)))
@@ -0,0 +1,459 @@
+## Runtime de adquisición multi-dispositivo (CPLD + DMM + Arduino)
+#
+# Antes cada instrumento tenía su propio script bloqueante (launchCPLD.py,
+# el __main__ de DMM_module.py) y se comunicaban a través de archivos en disco:
+# un :FETC? lento del DMM o un powercycle_C de 300 s dejaban la lectura de la
+# CPLD detenida. Aquí cada instrumento corre en su propio hilo:
+#
+#   DeviceLoop (lee el puerto) --> Channel (cola acotada) --> FileWriter (disco)
+#
+# y las acciones lentas (powercycle del Arduino) se ejecutan en un hilo de
+# control aparte (Controller). El Supervisor mira las lecturas del DMM en
+# memoria (sin pasar por el .dat) y pide el powercycle cuando la corriente está
+# fuera de rango, igual que is_current_low / is_current_high de launchCPLD.py.
+#
+# Los dispositivos se crean con "factories" (funciones sin argumentos que
+# retornan el objeto), así que el runtime se puede probar con puertos falsos
+# o loopback (p.ej. serial.serial_for_url("loop://")) sin hardware.
+#
+# Uso (con hardware):  python daq_runtime.py
+
+import logging
+import os
+import queue
+import threading
+from collections import deque
+from datetime import datetime
+from time import sleep, time
+
+import numpy as np
+
+from batch_writer import MAXBYTES, BatchWriter
+
+# Mismos umbrales que launchCPLD.py
+MAXCNTLOW = 2
+MINI = 0.078
+MAXCNTHIGH = 2
+MAXI = 0.0825
+
+
+class Channel:
+    ''' Cola acotada entre un productor (DeviceLoop) y su FileWriter.
+    Si el writer se atrasa y la cola se llena, se descarta el lote más antiguo
+    (y se cuenta en 'dropped') en vez de bloquear la lectura del puerto. '''
+
+    def __init__(self, maxsize=1000):
+        self.q = queue.Queue(maxsize=maxsize)
+        self.dropped = 0
+        self.put_cnt = 0
+
+    def put(self, item):
+        while True:
+            try:
+                self.q.put_nowait(item)
+                self.put_cnt += 1
+                return
+            except queue.Full:
+                try:
+                    self.q.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout):
+        return self.q.get(timeout=timeout)
+
+    def get_nowait(self):
+        return self.q.get_nowait()
+
+    def qsize(self):
+        return self.q.qsize()
+
+
+class FileWriter(threading.Thread):
+    ''' Vacía un Channel a disco. Cada item es una lista de líneas (con '\\n').
+    Junta todo lo que haya en la cola en una sola escritura a un BatchWriter,
+    que hace flush cada 'flush_s' segundos, rota el .dat al pasar 'max_bytes' o
+    'max_age_s' (fname termina en "_00000.dat") y deja el .idx al lado.
+    Con fname=None sólo consume (útil en pruebas). '''
+
+    def __init__(self, channel, fname=None, flush_s=1.0, name="writer",
+                 max_bytes=MAXBYTES, max_age_s=None):
+        threading.Thread.__init__(self, name=name, daemon=True)
+        self.channel = channel
+        self.fname = fname
+        self.flush_s = flush_s
+        self.max_bytes = max_bytes
+        self.max_age_s = max_age_s
+        self.stop_event = threading.Event()
+        self.lines_written = 0
+        self.listeners = []  # funciones llamadas con cada lote (p.ej. un monitor)
+
+    def drain(self, timeout):
+        batch = []
+        try:
+            batch.extend(self.channel.get(timeout))
+            while True:
+                batch.extend(self.channel.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def run(self):
+        outfile = None
+        if self.fname is not None:
+            # sin hilo temporizador: este loop despierta cada 0.2 s y llama flush_due
+            outfile = BatchWriter(self.fname, max_bytes=self.max_bytes, max_age_s=self.max_age_s,
+                                  flush_s=self.flush_s, timer=False)
+        try:
+            while not (self.stop_event.is_set() and self.channel.qsize() == 0):
+                batch = self.drain(timeout=0.2)
+                if batch:
+                    if outfile is not None:
+                        outfile.write_lines(batch)
+                    self.lines_written += len(batch)
+                    for fn in self.listeners:
+                        fn(batch)
+                if outfile is not None:
+                    outfile.flush_due()
+        finally:
+            if outfile is not None:
+                outfile.close()
+
+    def stop(self):
+        self.stop_event.set()
+
+
+class DeviceFault(RuntimeError):
+    ''' El dispositivo contestó pero pide intervención ya (read_event != 0 de la
+    CPLD): DeviceLoop guarda 'lines' y llama on_fail sin esperar max_errors. '''
+
+    def __init__(self, msg, lines=None):
+        RuntimeError.__init__(self, msg)
+        self.lines = lines or []
+
+
+class DeviceLoop(threading.Thread):
+    ''' Hilo que crea el dispositivo con 'factory' y llama 'poll(dev)' en loop.
+    poll retorna una lista de líneas a guardar (o None/[] si no hay nada).
+    Si poll lanza una excepción se cuenta el error y, pasado 'max_errors'
+    seguidos, se llama 'on_fail' (p.ej. pedir un powercycle al Controller).
+    Un DeviceFault llama 'on_fail' de inmediato, como launchCPLD.py con ret != 0.
+    'pause()' / 'resume(reconnect=True)' los usa el Controller durante un
+    powercycle: el objeto del dispositivo se recrea con 'factory' al volver. '''
+
+    def __init__(self, name, factory, poll, channel, period=0.0, max_errors=5,
+                 on_fail=None, log=None):
+        threading.Thread.__init__(self, name=name, daemon=True)
+        self.factory = factory
+        self.poll = poll
+        self.channel = channel
+        self.period = period
+        self.max_errors = max_errors
+        self.on_fail = on_fail
+        self.log = log or logging.getLogger(name)
+        self.dev = None
+        self.stop_event = threading.Event()
+        self.running = threading.Event()
+        self.running.set()
+        self.reconnect_flag = threading.Event()
+        self.count_err = 0
+        self.n_polls = 0
+        self.n_errors = 0
+
+    def pause(self):
+        self.running.clear()
+
+    def resume(self, reconnect=False):
+        if reconnect:
+            self.reconnect_flag.set()
+        self.running.set()
+
+    def release(self):
+        dev, self.dev = self.dev, None
+        if dev is not None:
+            del dev  # los módulos cierran el puerto en __del__
+
+    def run(self):
+        while not self.stop_event.is_set():
+            if not self.running.wait(timeout=0.2):
+                continue
+            if self.reconnect_flag.is_set():
+                self.reconnect_flag.clear()
+                self.release()
+            t0 = time()
+            try:
+                if self.dev is None:
+                    self.dev = self.factory()
+                lines = self.poll(self.dev)
+                self.n_polls += 1
+                if lines:
+                    self.channel.put(lines)
+                self.count_err = 0
+            except DeviceFault as e:
+                self.n_errors += 1
+                self.count_err = 0
+                if e.lines:
+                    self.channel.put(e.lines)
+                self.log.error("%s: %s", self.name, e)
+                if self.on_fail is not None:
+                    self.on_fail(self.name)
+                continue
+            except (Exception, SystemExit) as e:  # los módulos llaman exit() ante errores
+                self.n_errors += 1
+                self.count_err += 1
+                self.log.error("%s: error %d: %r", self.name, self.count_err, e)
+                if self.count_err > self.max_errors:
+                    self.count_err = 0
+                    if self.on_fail is not None:
+                        self.on_fail(self.name)
+                sleep(min(1.0, self.period) if self.period else 0.1)
+                continue
+            rest = self.period - (time() - t0)
+            if rest > 0:
+                self.stop_event.wait(rest)
+        self.release()
+
+    def stop(self):
+        self.stop_event.set()
+        self.running.set()
+
+
+class Controller(threading.Thread):
+    ''' Ejecuta acciones lentas (powercycle, resets) una a la vez, fuera de los
+    hilos de lectura. Las peticiones repetidas mientras una acción del mismo
+    nombre está pendiente se ignoran (no se encolan 10 powercycles seguidos). '''
+
+    def __init__(self, log=None, maxsize=16):
+        threading.Thread.__init__(self, name="controller", daemon=True)
+        self.log = log or logging.getLogger("controller")
+        self.q = queue.Queue(maxsize=maxsize)
+        self.pending = set()
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.done = []  # (nombre, t_inicio, duración, error) de cada acción
+
+    def request(self, name, fn):
+        with self.lock:
+            if name in self.pending:
+                return False
+            try:
+                self.q.put_nowait((name, fn))
+            except queue.Full:
+                self.log.error("controller queue full, dropping action %s", name)
+                return False
+            self.pending.add(name)
+        return True
+
+    def run(self):
+        while not self.stop_event.is_set():
+            try:
+                name, fn = self.q.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            t0 = time()
+            err = None
+            self.log.info("action %s started", name)
+            try:
+                fn()
+            except (Exception, SystemExit) as e:
+                err = repr(e)
+                self.log.error("action %s failed: %s", name, err)
+            with self.lock:
+                self.pending.discard(name)
+            self.done.append((name, t0, time() - t0, err))
+            self.log.info("action %s finished in %.1f s", name, time() - t0)
+
+    def stop(self):
+        self.stop_event.set()
+
+
+class Supervisor:
+    ''' Chequeo de corriente en memoria: guarda las últimas lecturas del DMM
+    (float32, como DMMTail) y pide el powercycle de la CPLD cuando las últimas
+    MAXCNTLOW lecturas están bajo MINI o las últimas MAXCNTHIGH sobre MAXI. '''
+
+    def __init__(self, on_trip, mini=MINI, maxi=MAXI, maxcntlow=MAXCNTLOW,
+                 maxcnthigh=MAXCNTHIGH):
+        self.on_trip = on_trip
+        self.mini = np.float32(mini)
+        self.maxi = np.float32(maxi)
+        self.maxcntlow = maxcntlow
+        self.maxcnthigh = maxcnthigh
+        self.values = deque(maxlen=max(maxcntlow, maxcnthigh))
+
+    def feed(self, lines):
+        ''' recibe líneas "<time()> <idc>\\n" (formato de DMM.store_values) '''
+        for line in lines:
+            fields = line.split()
+            if len(fields) < 2:
+                continue
+            try:
+                self.values.append(np.float32(float(fields[1])))
+            except ValueError:
+                continue
+        self.check()
+
+    def check(self):
+        vals = list(self.values)
+        low = vals[-self.maxcntlow:] if self.maxcntlow > 0 else []
+        high = vals[-self.maxcnthigh:] if self.maxcnthigh > 0 else []
+        if len(low) >= self.maxcntlow and sum(v < self.mini for v in low) >= self.maxcntlow:
+            self.values.clear()
+            self.on_trip("low")
+            return True
+        if len(high) >= self.maxcnthigh and sum(v > self.maxi for v in high) >= self.maxcnthigh:
+            self.values.clear()
+            self.on_trip("high")
+            return True
+        return False
+
+
+class DAQRuntime:
+    ''' Arma y maneja los hilos: un DeviceLoop + Channel + FileWriter por
+    instrumento, el Controller y (opcional) el Supervisor de corriente. '''
+
+    def __init__(self, log=None, flush_s=1.0, max_bytes=MAXBYTES, max_age_s=None):
+        self.log = log or logging.getLogger("daq_runtime")
+        self.flush_s = flush_s
+        self.max_bytes = max_bytes
+        self.max_age_s = max_age_s
+        self.loops = {}
+        self.writers = {}
+        self.channels = {}
+        self.controller = Controller(log=self.log)
+
+    def add_device(self, name, factory, poll, fname=None, period=0.0, maxsize=1000,
+                   max_errors=5, on_fail=None):
+        channel = Channel(maxsize=maxsize)
+        self.channels[name] = channel
+        self.writers[name] = FileWriter(channel, fname, flush_s=self.flush_s, name=name + "_writer",
+                                        max_bytes=self.max_bytes, max_age_s=self.max_age_s)
+        self.loops[name] = DeviceLoop(name, factory, poll, channel, period=period,
+                                      max_errors=max_errors, on_fail=on_fail, log=self.log)
+        return self.loops[name]
+
+    def subscribe(self, name, fn):
+        ''' fn(lote_de_lineas) se llama desde el writer de 'name' '''
+        self.writers[name].listeners.append(fn)
+
+    def powercycle(self, target, action, reason=""):
+        ''' pide al Controller: pausar 'target', correr action(), reconectar '''
+        loop = self.loops[target]
+
+        def run():
+            loop.pause()
+            try:
+                action()
+            finally:
+                loop.resume(reconnect=True)
+
+        if self.controller.request("powercycle_" + target, run):
+            self.log.error("%s: power cycle requested (%s)", target, reason)
+
+    def start(self):
+        self.controller.start()
+        for w in self.writers.values():
+            w.start()
+        for l in self.loops.values():
+            l.start()
+
+    def stop(self, timeout=5.0):
+        for l in self.loops.values():
+            l.stop()
+        for l in self.loops.values():
+            l.join(timeout)
+        for w in self.writers.values():
+            w.stop()
+        for w in self.writers.values():
+            w.join(timeout)
+        self.controller.stop()
+        self.controller.join(timeout)
+
+    def stats(self):
+        ''' contadores por instrumento: lecturas, errores, lotes descartados '''
+        out = {}
+        for name, l in self.loops.items():
+            ch = self.channels[name]
+            out[name] = {"polls": l.n_polls, "errors": l.n_errors, "queued": ch.qsize(),
+                         "dropped": ch.dropped, "written": self.writers[name].lines_written}
+        return out
+
+
+######################## Adaptadores de los módulos ########################
+
+def poll_cpld(cpld):
+    ''' un evento de la CPLD; las líneas las guarda el FileWriter, no store_event.
+    Con ret != 0 el dataframe (p.ej. la línea "<time()>,reset" de ret = -1) se
+    guarda igual y se pide el powercycle en el acto, como launchCPLD.py '''
+    ret = cpld.read_event()
+    if ret:
+        raise DeviceFault("cpld not responding, error_code:" + str(ret), list(cpld.dataframe))
+    return list(cpld.dataframe)
+
+
+def poll_dmm(dmm):
+    idc = dmm.getValues()
+    return [str(time()) + " " + idc + "\n"]
+
+
+if __name__ == '__main__':
+    import errno
+    import sys
+
+    from ARDU_module import ARDU
+    from CPLD_module import CPLD
+    from DMM_module import DMM
+
+    CPLD_com = "COM10"
+    DMM_com = "COM11"
+    arduino_com = "COM6"
+    rootdir = "data_run"
+    for d in (rootdir, rootdir + "/DMM_data"):
+        try:
+            os.mkdir(d)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+
+    date = datetime.now().strftime("%Y_%m_%d_%H%M%S")
+    logging.basicConfig(format='%(asctime)s %(message)s',
+                        datefmt='%m/%d/%Y %I:%M:%S %p',
+                        filename=rootdir + "/daqlog_" + date + ".log",
+                        filemode='w',
+                        level=logging.DEBUG)
+    consoleHandler = logging.StreamHandler(sys.stdout)
+    consoleHandler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+    logging.getLogger().addHandler(consoleHandler)
+    log = logging.getLogger("launchDAQ")
+
+    def make_cpld():
+        cpld = CPLD(CPLD_com, log=log)  # sin rootdir: el FileWriter escribe el .dat
+        cpld.sink = lambda lines: None  # poll_cpld entrega cpld.dataframe al Channel
+        return cpld
+
+    def powercycle_C():
+        arduino = ARDU(arduino_com)
+        arduino.powercycle_C()
+        del arduino
+
+    rt = DAQRuntime(log=log)
+    # max_errors=4: powercycle al 5º error seguido, como count_err > 4 en launchCPLD.py
+    rt.add_device("cpld", make_cpld, poll_cpld,
+                  fname=rootdir + "/cpld_data_" + date + "_00000.dat", max_errors=4,
+                  on_fail=lambda name: rt.powercycle("cpld", powercycle_C, "read errors"))
+    rt.add_device("dmm", lambda: DMM(DMM_com), poll_dmm,
+                  fname=rootdir + "/DMM_data/dmm_data0_" + date + "_00000.dat", period=1.0)
+    supervisor = Supervisor(lambda why: rt.powercycle("cpld", powercycle_C, "current " + why))
+    rt.subscribe("dmm", supervisor.feed)
+
+    log.info("######### Starting DAQ runtime (CPLD + DMM) #########")
+    rt.start()
+    try:
+        while True:
+            sleep(10)
+            log.info(str(rt.stats()))
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        rt.stop()
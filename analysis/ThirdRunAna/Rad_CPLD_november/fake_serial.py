@@ -0,0 +1,361 @@
+## Puerto serial falso (en el mismo proceso) para probar y medir los módulos
+# CPLD_module, verDAQ8_module, DMM_module y ARDU_module sin hardware.
+#
+# FakeSerial implementa lo que usan los módulos de serial.Serial (read,
+# read_until, readline, in_waiting, write, reset_input_buffer, close, name).
+# Entrega un "guión" de líneas (bytes) a una tasa configurable, limitado además
+# por el baudrate, con corrupción y pausas (stalls) inyectadas. Los dispositivos
+# de comando/respuesta (DMM, Arduino) usan un 'responder' que recibe cada
+# write() y retorna las líneas de respuesta.
+#
+# fake_ports({"COM10": lambda **kw: FakeSerial(...)}) reemplaza serial.Serial
+# mientras dura el 'with', así CPLD("COM10", ...) abre el puerto falso.
+#
+# Generadores de tráfico: cpld_frames, verdaq_events, dmm_responder,
+# ardu_responder, y replay_cpld / replay_verdaq / replay_dmm para repetir
+# archivos .dat grabados.
+
+import random
+import sys
+import types
+from collections import deque
+from contextlib import contextmanager
+from time import perf_counter, sleep
+
+try:
+    import serial
+except ImportError:
+    # sin pyserial: módulo mínimo para poder importar los módulos del DAQ con
+    # puertos falsos (list_ports usa serial.SerialException)
+    serial = types.ModuleType("serial")
+
+    class SerialException(IOError):
+        pass
+
+    def _no_port(*args, **kwargs):
+        raise SerialException("pyserial not installed: only fake ports are available")
+
+    serial.SerialException = SerialException
+    serial.Serial = _no_port
+    sys.modules["serial"] = serial
+
+
+class FakeSerial:
+    ''' script: iterable de líneas (bytes) o de floats (pausa en segundos).
+    rate: líneas por segundo (None = sólo limitado por el baudrate).
+    corrupt: probabilidad de corromper una línea (byte cambiado o línea cortada).
+    stall_every / stall_s: cada tantas líneas, una pausa de stall_s segundos.
+    responder: f(bytes_escritos) -> lista de líneas de respuesta.
+    buffer_size: tamaño del buffer de entrada del "driver"; lo que no cabe se
+    pierde (y se cuenta en 'overflow'), como en un puerto real.
+    force_timeout: ignora el timeout pedido por el módulo (p.ej. los 15 s de
+    VERDAQ8) para que las pruebas terminen rápido. '''
+
+    def __init__(self, port="FAKE", baudrate=9600, timeout=None, script=(), rate=None,
+                 corrupt=0.0, stall_every=0, stall_s=0.0, responder=None,
+                 force_timeout=None, buffer_size=4096, seed=0, **kwargs):
+        self.name = self.port = port
+        self.baudrate = baudrate
+        self.timeout = timeout if force_timeout is None else force_timeout
+        self.script = iter(script)
+        self.rate = rate
+        self.corrupt = corrupt
+        self.stall_every = stall_every
+        self.stall_s = stall_s
+        self.responder = responder
+        self.buffer_size = buffer_size
+        self.rng = random.Random(seed)
+        self.is_open = True
+
+        self.buf = bytearray()
+        self.pos = 0              # bytes ya consumidos de buf
+        self.lines = deque()      # (offset final, t_disponible) de líneas en buf
+        self.total = 0            # bytes entregados al buffer desde el inicio
+        self.next_t = perf_counter()
+        self.next_line = None
+        self.exhausted = False
+        self.n_lines = 0
+        self.replies = deque()    # (t_disponible, línea) de respuestas a write()
+        self.n_cmds = 0
+        # estadísticas
+        self.sent = 0             # líneas puestas en el buffer
+        self.corrupted = 0
+        self.stalls = 0
+        self.received = 0         # líneas leídas completas por el módulo
+        self.dropped = 0          # líneas descartadas por reset_input_buffer
+        self.overflow = 0         # líneas perdidas por buffer lleno
+        self.latency = []         # segundos entre disponible y leída
+        self.written = []         # comandos recibidos por write()
+
+    ## generación del stream
+    def byte_time(self, n):
+        return n * 10.0 / self.baudrate if self.baudrate else 0.0
+
+    def schedule(self):
+        ''' toma la próxima línea del guión y calcula cuándo está disponible '''
+        while self.next_line is None and not self.exhausted:
+            try:
+                item = next(self.script)
+            except StopIteration:
+                self.exhausted = True
+                return
+            if isinstance(item, (int, float)):
+                self.next_t += item
+                continue
+            line = bytes(item)
+            self.n_lines += 1
+            if self.stall_every and self.n_lines % self.stall_every == 0:
+                self.next_t += self.stall_s
+                self.stalls += 1
+            if self.corrupt and self.rng.random() < self.corrupt:
+                line = self.corrupt_line(line)
+                self.corrupted += 1
+            dt = self.byte_time(len(line))
+            if self.rate:
+                dt = max(dt, 1.0 / self.rate)
+            self.next_t += dt
+            self.next_line = line
+
+    def corrupt_line(self, line):
+        if len(line) < 2:
+            return line
+        if self.rng.random() < 0.5:
+            i = self.rng.randrange(len(line) - 1)
+            return line[:i] + bytes([self.rng.randrange(33, 127)]) + line[i + 1:]
+        return line[:self.rng.randrange(1, len(line))]  # línea cortada (sin '\n')
+
+    def push(self, line, t):
+        self.buf += line
+        self.total += len(line)
+        self.lines.append((self.total, t))
+        self.sent += 1
+
+    def pump(self):
+        now = perf_counter()
+        self.schedule()
+        while self.next_line is not None and self.next_t <= now:
+            if self.buffer_size and self.available() + len(self.next_line) > self.buffer_size:
+                self.overflow += 1
+            else:
+                self.push(self.next_line, self.next_t)
+            self.next_line = None
+            self.schedule()
+        while self.replies and self.replies[0][0] <= now:
+            self.push(self.replies[0][1], self.replies.popleft()[0])
+        return now
+
+    def next_wake(self):
+        ''' cuándo llega el próximo byte (None si no hay nada más) '''
+        times = [t for t in ((self.next_t if self.next_line is not None else None),
+                             (self.replies[0][0] if self.replies else None)) if t is not None]
+        return min(times) if times else None
+
+    def available(self):
+        return len(self.buf) - self.pos
+
+    def wait(self, ready):
+        ''' espera hasta que ready() o hasta el timeout '''
+        now = self.pump()
+        deadline = None if self.timeout is None else now + self.timeout
+        while not ready():
+            wake = self.next_wake()
+            if wake is None:
+                if deadline is not None and deadline > now:
+                    sleep(deadline - now)
+                return
+            if deadline is not None:
+                wake = min(wake, deadline)
+            if wake > now:
+                sleep(wake - now)
+            now = self.pump()
+            if deadline is not None and now >= deadline:
+                return
+
+    def consume(self, n):
+        data = bytes(self.buf[self.pos:self.pos + n])
+        self.pos += len(data)
+        consumed = self.total - (len(self.buf) - self.pos)
+        now = perf_counter()
+        while self.lines and self.lines[0][0] <= consumed:
+            self.latency.append(now - self.lines.popleft()[1])
+            self.received += 1
+        if self.pos > 65536:  # compactar
+            del self.buf[:self.pos]
+            self.pos = 0
+        return data
+
+    ## interfaz de serial.Serial
+    @property
+    def in_waiting(self):
+        self.pump()
+        return self.available()
+
+    def read(self, size=1):
+        self.wait(lambda: self.available() >= size)
+        return self.consume(min(size, self.available()))
+
+    def read_until(self, expected=b"\n", size=None):
+        def found():
+            if size is not None and self.available() >= size:
+                return True
+            return self.buf.find(expected, self.pos) >= 0
+        self.wait(found)
+        i = self.buf.find(expected, self.pos)
+        n = self.available() if i < 0 else i - self.pos + len(expected)
+        if size is not None:
+            n = min(n, size)
+        return self.consume(n)
+
+    def readline(self):
+        return self.read_until(b"\n")
+
+    def write(self, data):
+        self.written.append(bytes(data))
+        if self.responder is not None:
+            t = self.pump()
+            self.n_cmds += 1
+            if self.stall_every and self.n_cmds % self.stall_every == 0:
+                t += self.stall_s
+                self.stalls += 1
+            for line in self.responder(bytes(data)):
+                if isinstance(line, (int, float)):
+                    t += line  # respuesta lenta
+                    continue
+                if self.corrupt and self.rng.random() < self.corrupt:
+                    line = self.corrupt_line(line)
+                    self.corrupted += 1
+                t += self.byte_time(len(line))
+                self.replies.append((t, line))
+            self.pump()
+        return len(data)
+
+    def drop_buffer(self):
+        self.pump()
+        self.dropped += len(self.lines)
+        self.lines.clear()
+        self.buf = bytearray()
+        self.pos = 0
+
+    def reset_input_buffer(self):
+        self.drop_buffer()
+
+    flushInput = reset_input_buffer
+
+    def close(self):
+        self.is_open = False
+
+    def stats(self):
+        lat = sorted(self.latency)
+        return {"sent": self.sent, "received": self.received, "dropped": self.dropped,
+                "overflow": self.overflow, "unread": len(self.lines), "corrupted": self.corrupted, "stalls": self.stalls,
+                "lat_median_ms": 1e3 * lat[len(lat) // 2] if lat else float("nan"),
+                "lat_max_ms": 1e3 * lat[-1] if lat else float("nan")}
+
+
+@contextmanager
+def fake_ports(ports):
+    ''' ports: {nombre: factory(**kwargs_de_serial.Serial) -> FakeSerial}.
+    Las instancias creadas quedan en la lista que retorna el 'with'. '''
+    opened = []
+    real = serial.Serial
+
+    def open_port(port, *args, **kwargs):
+        if port not in ports:
+            return real(port, *args, **kwargs)
+        sp = ports[port](**kwargs)
+        sp.name = sp.port = port
+        opened.append(sp)
+        return sp
+
+    serial.Serial = open_port
+    try:
+        yield opened
+    finally:
+        serial.Serial = real
+
+
+######################## Tráfico de los instrumentos ########################
+
+def cpld_frames(n=None, flip=0.0, seed=0):
+    ''' frames "#<c>,FF00,FF00*\\n" (14 bytes) como los manda la CPLD;
+    'flip' = probabilidad de una palabra con un bit cambiado '''
+    rng = random.Random(seed)
+    i = 0
+    while n is None or i < n:
+        w0 = "FE00" if flip and rng.random() < flip else "FF00"
+        yield "#{:X},{},FF00*\n".format(i % 16, w0).encode()
+        i += 1
+
+
+def verdaq_events(n=None, lines=64, period_s=1.0, seed=0):
+    ''' eventos de la verDAQ8: "\\n#-\\n", 'lines' filas "<k> <valor>" y una
+    fila final "409 ..."; 'period_s' de pausa antes de cada evento '''
+    rng = random.Random(seed)
+    i = 0
+    while n is None or i < n:
+        yield period_s
+        yield b"\n#-\n"
+        for k in range(lines):
+            yield "{} {}\n".format(k, rng.randrange(4096)).encode()
+        yield "409 {}\n".format(i).encode()
+        i += 1
+
+
+def dmm_responder(values=None, slow_s=0.0, seed=0):
+    ''' respuesta a ":FETC?" (dos líneas, DMM.sendCMD lee dos veces) '''
+    rng = random.Random(seed)
+    values = iter(values) if values is not None else None
+
+    def respond(cmd):
+        if cmd.startswith(b":FETC?"):
+            v = next(values) if values is not None else 0.08 + rng.gauss(0, 0.001)
+            return [slow_s, b"\r\n", "{:+.4E}\n".format(v).encode()]
+        return [b"\r\n", b"\r\n"]
+    return respond
+
+
+def ardu_responder(slow_s=0.0):
+    ''' el Arduino contesta "=>" a cada comando (ARDU.sendCMD lo verifica) '''
+    def respond(cmd):
+        return [slow_s, b"=>" + cmd.strip() + b"\n"]
+    return respond
+
+
+def replay_cpld(fname, realtime=False, speed=1.0):
+    ''' repite un .dat de la CPLD ("<time()>,<datos>") como frames '#<datos>*\\n' '''
+    last = None
+    with open(fname) as f:
+        for line in f:
+            t, _, payload = line.strip().partition(",")
+            if not payload or payload == "reset":
+                continue
+            if realtime:
+                t = float(t)
+                if last is not None and t > last:
+                    yield (t - last) / speed
+                last = t
+            yield ("#" + payload + "*\n").encode()
+
+
+def replay_verdaq(fname):
+    ''' repite un .dat de la verDAQ8 (líneas "<time()> <fila>" y "#-") '''
+    with open(fname) as f:
+        for line in f:
+            if line.startswith("#-"):
+                yield b"\n#-\n"
+                continue
+            _, _, rest = line.partition(" ")
+            if rest:
+                yield rest.encode()
+
+
+def replay_dmm(fname):
+    ''' valores de corriente de un .dat del DMM ("<time()> <idc>"), para dmm_responder '''
+    with open(fname) as f:
+        for line in f:
+            fields = line.split()
+            if len(fields) >= 2:
+                try:
+                    yield float(fields[1])
+                except ValueError:
+                    continue
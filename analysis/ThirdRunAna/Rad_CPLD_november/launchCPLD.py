@@ -14,11 +14,10 @@ from datetime import datetime
 from time import sleep
 from traceback import print_tb
 
-import pandas as pd
-
 import list_ports
 from ARDU_module import ARDU
 from CPLD_module import CPLD
+from DMM_tail import DMMTail
 
 CPLD_com = "COM10"
 arduino_com = "COM6"
@@ -94,6 +93,9 @@ fname = path_almacenamiento + "_" + date + ".log" # path + nombre_archivo + .log
 
 ## DMM (lectura)
 datadirC = rootdir + "/DMM_data/"
+# Lector incremental compartido por is_current_low/is_current_high: guarda el
+# offset del .dat y las últimas lecturas, en vez de releer el archivo completo.
+dmm_tail = DMMTail(datadirC, maxlen=max(MAXCNTLOW, MAXCNTHIGH))
 
 ##################################################################
 
@@ -112,51 +114,26 @@ datadirC = rootdir + "/DMM_data/"
     # anteriores queda en el main loop de la CPLD (más abajo)
 
 def is_current_low():
-    global MINI, MAXCNTLOW, datadirC
-    # Obtiene path último .dat creado en subcarpeta DMM_module.py
-    # Si se agrega otro archivo .dat durante el run, entonces leerá ese.
-    fnameC = datadirC + os.listdir(datadirC)[-1] 
-    #print(f'is_current_low_fnameC: {fnameC}')   
-
-    #formato en q se almacena info por columna; {n_columna: datatype} 
-    dtypes = {0: 'float64', 1: 'float32', 2: 'float32'} # float64/32 number bit representation
-
-    df = pd.read_csv(fnameC, delimiter=' ', header=None, dtype=dtypes, parse_dates=[
-                     0], on_bad_lines='skip')  # error_bad_lines=False)
-        # parse_dates convierte dato columna 0 a tipo 'datetime64[ns]'
-        # ? - por/para qué hacemos eso? no parece q el numero tiene formato de fecha a priori.
-
-    # Se extraen las últimas 'MAXCNTLOW' (int) **filas** del .dat
-    dataC = df.tail(MAXCNTLOW) # Return the last n rows; default 5.
-
-
-    ## De dichas filas se extrae la segunda columna (pos 1). Luego, se extrae 
-    # del data frame 'dataC' solo dichas filas, dentro de dataC[1],
-    # que cumplan la condición "MINI > dataC[1]".
-    cnt = len(dataC[MINI > dataC[1]]) #contamos las filas q cumplieron la condición
+    global MINI, MAXCNTLOW, dmm_tail
+    # Las lecturas vienen del buffer de 'dmm_tail' (actualizado en check_current
+    # con dmm_tail.poll()); siguen el último .dat creado por DMM_module.py,
+    # incluida la rotación de archivos.
+
+    # Se cuentan, dentro de las últimas 'MAXCNTLOW' lecturas, las que cumplen
+    # la condición "MINI > corriente".
+    cnt = dmm_tail.count_below(MINI, MAXCNTLOW)
     #Obs: '+1.3173E-1' en el .dat se leen como '0.131173'.
 
     if cnt >= MAXCNTLOW: 
-        ## Si al menos 5 conteos de corriente(?) poseen un valor menor a 'MINI'
-        # luego la corriente está baja y avisamos con return TRUE.
-
-        # POTENCIAL PROBLEMA (se deja en readme.md; 03/08):
-        # Notar que estamos solo leyendo los últimos 5 conteos de corriente en
-        # total de cada archivo output dmm que vamos leyendo. Esto es, podrían 
-        # haber bajas de corriente reportadas en el resto del archivo y este 
-        # código no lo reportaría.
+        ## Si las últimas 'MAXCNTLOW' lecturas de corriente poseen un valor menor
+        # a 'MINI' luego la corriente está baja y avisamos con return TRUE.
         return True
     return False
 
 
 def is_current_high():
-    global MAXI, MAXCNTHIGH, datadirC
-    fnameC = datadirC + os.listdir(datadirC)[-1]
-    dtypes = {0: 'float64', 1: 'float32', 2: 'float32'}
-    df = pd.read_csv(fnameC, delimiter=' ', header=None, dtype=dtypes, parse_dates=[
-                     0], on_bad_lines='skip')  # error_bad_lines=False)
-    dataC = df.tail(MAXCNTHIGH)
-    cnt = len(dataC[dataC[1] > MAXI])
+    global MAXI, MAXCNTHIGH, dmm_tail
+    cnt = dmm_tail.count_above(MAXI, MAXCNTHIGH)
     if cnt >= MAXCNTHIGH:
         return True
     return False
@@ -247,9 +224,10 @@ else:
 def check_current():
     '''checkea corriente de la cpld reportada por el digital multimeter
     (DMM_module.py) a través de archivos .dat en subcarpeta DMM_data'''
-    global cpld, arduino, log
+    global cpld, arduino, log, dmm_tail
     #print('ESTOY EN CHECK CURRENT!')
     try:
+        dmm_tail.poll() # lee sólo las líneas nuevas del .dat del DMM
         if is_current_low(): #retorna TRUE or FALSE 
             log.error("cpld current low, sending power cycle")
             arduino = ARDU(arduino_com)
@@ -1,6 +1,7 @@
 #!/usr/bin/env python
-import pandas as pd
+import numpy as np
 import matplotlib.pyplot as plt
+import matplotlib.dates as mdates
 import os
 import matplotlib
 import sys
@@ -13,17 +14,101 @@ datadirC = rootdir + "/DMM_data/"
 matplotlib.style.use('fast')
 plt.ion()
 
-def HEX2INT(value, default):
-    if '.' not in str(value):
-        try:
-            return int(value,base=16)
-        except (ValueError, TypeError):
-            #print("## WARNING: value: "+ str(value) + " was not converted, inserting default")
-            pass
-        return default
-    else :float(x)
-
-    
+REFRESH = 20 # segundos entre actualizaciones de los gráficos
+
+## Conversión hex -> int vectorizada (mismo resultado que el antiguo
+# HEX2INT(x, default) celda a celda: valor con '.' -> NaN, inválido -> default)
+HEXW = 15 # máximo de dígitos por celda (más largo -> default); cabe en int64
+_HEXLUT = np.full(256, -1, dtype=np.int64) # valor de cada byte como dígito hex (-1: no es dígito)
+for _c in b"0123456789":
+    _HEXLUT[_c] = _c - ord("0")
+for _c in b"abcdef":
+    _HEXLUT[_c] = _HEXLUT[_c - 32] = _c - ord("a") + 10
+
+def hex2int_array(cells, default=0):
+    ''' cells: array de bytes (dtype 'S') -> float64 '''
+    cells = np.asarray(cells, dtype="S%d" % (HEXW + 1))
+    if cells.size == 0:
+        return np.zeros(cells.shape)
+    u8 = cells.view(np.uint8).reshape(cells.shape + (HEXW + 1,))
+    digits = _HEXLUT[u8]
+    sign = np.where(u8[..., 0] == ord("-"), -1, 1)
+    used = u8 != 0
+    used[..., 0] &= sign > 0 # el '-' no es un dígito
+    # (int(x, 16) también acepta espacios y '0x', que aquí no aparecen:
+    # las celdas vienen de un split por espacios y la verDAQ no manda '0x')
+    valid = used.any(axis=-1) & ~(used & (digits < 0)).any(axis=-1) & ~used[..., HEXW]
+    val = np.zeros(cells.shape, dtype=np.int64)
+    for k in range(HEXW):
+        val = np.where(used[..., k], val * 16 + digits[..., k], val)
+    out = np.where(valid, sign * val, default).astype(np.float64)
+    out[(u8 == ord(".")).any(axis=-1)] = np.nan
+    return out
+
+
+class FileTail:
+    ''' lee sólo las líneas nuevas de un archivo (guarda el offset) '''
+    fname = None
+    offset = 0
+    pending = b""
+
+    def __init__(self, fname, tail_bytes=None):
+        self.fname = fname
+        size = os.path.getsize(fname)
+        if tail_bytes is not None and size > tail_bytes:
+            # empezar cerca del final; la primera línea (cortada) se descarta
+            self.offset = size - tail_bytes
+            self.pending = None
+
+    def read_lines(self):
+        size = os.path.getsize(self.fname)
+        if size < self.offset: # archivo reescrito
+            self.offset, self.pending = 0, b""
+        if size == self.offset:
+            return []
+        with open(self.fname, "rb") as f:
+            f.seek(self.offset)
+            chunk = f.read(size - self.offset)
+        self.offset += len(chunk)
+        if self.pending is None:
+            cut = chunk.find(b"\n")
+            if cut < 0:
+                return []
+            chunk, self.pending = chunk[cut + 1:], b""
+        lines = (self.pending + chunk).split(b"\n")
+        self.pending = lines.pop()
+        return lines
+
+
+class RingBuffer:
+    ''' últimos 'n' valores (filas) en un array fijo '''
+    def __init__(self, n, ncols=None, dtype=np.float64):
+        shape = (n,) if ncols is None else (n, ncols)
+        self.data = np.full(shape, np.nan, dtype=dtype)
+        self.n = n
+        self.count = 0 # total agregado
+
+    def add(self, rows):
+        rows = np.asarray(rows, dtype=self.data.dtype)
+        n_in = len(rows)
+        if n_in == 0:
+            return
+        rows = rows[-self.n:]
+        k = len(rows)
+        i = (self.count + n_in - k) % self.n # donde va la primera fila que se guarda
+        first = min(k, self.n - i)
+        self.data[i:i + first] = rows[:first]
+        self.data[:k - first] = rows[first:]
+        self.count += n_in
+
+    def view(self):
+        ''' datos en orden (del más antiguo al más nuevo) '''
+        if self.count <= self.n:
+            return self.data[:self.count]
+        i = self.count % self.n
+        return np.concatenate([self.data[i:], self.data[:i]])
+
+
 def move_figure(f, x, y):
     """Move figure's upper left corner to pixel (x, y)"""
     backend = matplotlib.get_backend()
@@ -46,85 +131,182 @@ move_figure(figH,700,200)
 move_figure(figC,10,500)
 
 class DATA_MONITOR:
+    ''' Monitor en vivo de la verDAQ8 y del DMM. Se crea una sola vez: cada
+    poll() lee sólo los bytes nuevos de los archivos (siguiendo al último .dat
+    de cada carpeta), guarda las últimas NPTS filas en buffers circulares y
+    update() actualiza las líneas/histogramas existentes sin borrar los ejes. '''
     datadir = "."
     YMIN = -300
     YMAX = 4300
     NBINS = 50
     BINW = int((YMAX-YMIN)/NBINS)
-    df = None
-    dfint = None
-    dfC = None
     NPTS = 2000
+    TAILBYTES = 1 << 20 # al abrir un archivo ya empezado, leer sólo el último MB
+    COLUMNS = ["Nsample"]  + ["ch"+str(x) for x in range(8)]
     fname = ""
     fnameC = ""
 
-    def __init__(self,fname,fnameC):
+    def __init__(self,fname=None,fnameC=None,datadir=None,datadirC=None):
+        self.datadir = datadir
+        self.datadirC = datadirC
+        self.tail = self.tailC = None
+        self.wf = RingBuffer(self.NPTS, len(self.COLUMNS))
+        self.wf_idx = RingBuffer(self.NPTS)   # nº de fila (eje x de las formas de onda)
+        self.nrows = 0
+        self.cur_t = RingBuffer(self.NPTS)    # tiempo (unix) de la corriente
+        self.cur = RingBuffer(self.NPTS)
+        if fname:
+            self.open(fname)
+        if fnameC:
+            self.openC(fnameC)
+        self.setup_plots()
+
+    def open(self, fname, from_start=False):
         print ("reading data file: "+fname)
-        print ("reading Current file: "+fnameC)   
         self.fname = fname
+        self.tail = FileTail(fname, None if from_start else self.TAILBYTES)
+
+    def openC(self, fnameC, from_start=False):
+        print ("reading Current file: "+fnameC)
         self.fnameC = fnameC
-        self.df = pd.read_csv(self.fname,delimiter=' ',skiprows=2, header=None,on_bad_lines='skip')#error_bad_lines=False)
-        self.df = self.df[self.df[0].apply(lambda x : "#" not in str(x))]
-        self.df = self.df[self.df[1].apply(lambda x : "#" not in str(x))]
-        self.dfint = self.df.loc[:,self.df.columns!=0].applymap(lambda x: HEX2INT(x,0))
-        self.dfint.columns = ["Nsample"]  + ["ch"+str(x) for x in range(8)]
-        dtypes = {0 : 'float64', 1: 'float32', 2: 'float32'}
-        self.dfC = pd.read_csv(self.fnameC,delimiter=' ',header=None, dtype=dtypes, parse_dates=[0],on_bad_lines='skip')#error_bad_lines=False)
-        self.dfC[0]=pd.to_datetime(self.dfC[0],unit='s')
-        figC.autofmt_xdate()
+        self.tailC = FileTail(fnameC, None if from_start else self.TAILBYTES)
 
+    @staticmethod
+    def newest(d):
+        files = sorted(f for f in os.listdir(d) if f.endswith(".dat")) # no .idx ni .idx.tmp
+        return d + files[-1] if files else None
 
-    def plot(self):
-        for ax in axsWF:
-            ax.cla()
-            
-        self.dfint.tail(self.NPTS).plot(ax=axsWF,title=self.fname,subplots=True,ylim=(self.YMIN,self.YMAX))#,sharey=True)#,layout=(2,4))
-
-        plt.subplots_adjust(hspace=0,wspace=0,left=.05,bottom=0.1, right=0.95, top=0.95)
-    
-        for axf in axsH:
-            for ax in axf:
-                ax.cla()
-            
-        self.dfint.tail(self.NPTS).plot(ax=axsH,title=self.fname,kind='hist',bins=range(self.YMIN,self.YMAX,self.BINW),subplots=True,xlim=(self.YMIN,self.YMAX))#,sharex=True)
-        plt.subplots_adjust(hspace=.05,wspace=.15,left=.05,bottom=0.1, right=0.95, top=0.95)
-    def draw(self):
+    def follow(self):
+        ''' cambia al .dat más nuevo de cada carpeta (rotación de archivos);
+        un archivo que aparece después del primero se lee desde el inicio '''
+        if self.datadir:
+            f = self.newest(self.datadir)
+            if f and f != self.fname:
+                self.open(f, from_start=self.tail is not None)
+        if self.datadirC:
+            f = self.newest(self.datadirC)
+            if f and f != self.fnameC:
+                self.openC(f, from_start=self.tailC is not None)
+
+    def parse_wf(self, lines):
+        ''' líneas "<time> <Nsample> <ch0> ... <ch7>" (hex) -> array (n, 9) '''
+        rows = []
+        ncol = len(self.COLUMNS)
+        for line in lines:
+            f = line.split()
+            if len(f) < 2 or len(f) > ncol + 1 or b"#" in f[0] or b"#" in f[1]:
+                continue
+            rows.append(f[1:] + [b""] * (ncol + 1 - len(f)))
+        if not rows:
+            return np.empty((0, ncol))
+        return hex2int_array(np.array(rows, dtype="S%d" % (HEXW + 1)), 0)
+
+    def parse_current(self, lines):
+        t, v = [], []
+        for line in lines:
+            f = line.split()
+            if len(f) < 2:
+                continue
+            try:
+                t.append(float(f[0]))
+                v.append(np.float32(float(f[1])))
+            except ValueError:
+                continue
+        return np.array(t), np.array(v, dtype=np.float64)
+
+    def poll(self):
+        ''' lee las líneas nuevas (también el final del archivo anterior si hubo
+        rotación) y las agrega a los buffers '''
+        tail, tailC = self.tail, self.tailC
+        wf = tail.read_lines() if tail is not None else []
+        cur = tailC.read_lines() if tailC is not None else []
+        self.follow()
+        if self.tail is not tail:
+            wf += self.tail.read_lines()
+        if self.tailC is not tailC:
+            cur += self.tailC.read_lines()
+
+        vals = self.parse_wf(wf)
+        self.wf.add(vals)
+        self.wf_idx.add(np.arange(self.nrows, self.nrows + len(vals)))
+        self.nrows += len(vals)
+        t, v = self.parse_current(cur)
+        self.cur_t.add(t)
+        self.cur.add(v)
+
+    def setup_plots(self):
+        ''' crea una vez las líneas y barras; update() sólo cambia sus datos '''
+        self.wf_lines = []
+        for ax, name in zip(axsWF, self.COLUMNS):
+            line, = ax.plot([], [], label=name)
+            ax.set_ylim(self.YMIN, self.YMAX)
+            ax.legend(loc="upper left")
+            self.wf_lines.append(line)
+        axsWF[0].set_title(self.fname)
+        figWF.subplots_adjust(hspace=0,wspace=0,left=.05,bottom=0.1, right=0.95, top=0.95)
 
-        for ax in axsC:
-            ax.cla()
+        self.bins = np.arange(self.YMIN, self.YMAX, self.BINW)
+        self.hist_bars = []
+        for ax, name in zip(axsH.flat, self.COLUMNS):
+            _, _, bars = ax.hist([], bins=self.bins, label=name)
+            ax.set_xlim(self.YMIN, self.YMAX)
+            ax.legend(loc="upper left")
+            self.hist_bars.append(bars)
+        figH.subplots_adjust(hspace=.05,wspace=.15,left=.05,bottom=0.1, right=0.95, top=0.95)
 
+        self.cur_lines = []
+        for ax, ylim in zip(axsC, [(-0.1,1.5), (1.24,1.36)]):
+            line, = ax.plot([], [], "-")
+            ax.xaxis_date()
+            ax.set_ylim(*ylim)
+            ax.grid(True)
+            self.cur_lines.append(line)
+        axsC[0].set_title("Current (A)/zoom")
         figC.autofmt_xdate()
-        self.dfC.index = self.dfC[0]
+        figC.subplots_adjust(hspace=0.05,wspace=.15,left=.1,bottom=0.2, right=0.95, top=0.95)
 
-        self.dfC[1].tail(self.NPTS).plot(title="Current (A)/zoom",ax=axsC[0],ylim=(-0.1,1.5),grid=True)
-        self.dfC[1].tail(self.NPTS).plot(ax=axsC[1],ylim=(1.24,1.36),grid=True)
-        plt.subplots_adjust(hspace=0.05,wspace=.15,left=.1,bottom=0.2, right=0.95, top=0.95)
+    def update(self):
+        x = self.wf_idx.view()
+        vals = self.wf.view()
+        if len(x):
+            for j, line in enumerate(self.wf_lines):
+                line.set_data(x, vals[:, j])
+                axsWF[j].set_xlim(x[0], max(x[-1], x[0] + 1))
+            axsWF[0].set_title(self.fname)
+            for j, bars in enumerate(self.hist_bars):
+                counts, _ = np.histogram(vals[:, j], bins=self.bins)
+                for bar, h in zip(bars, counts):
+                    bar.set_height(h)
+                axsH.flat[j].set_ylim(0, max(1, counts.max()) * 1.05)
 
-        plt.draw()
-        plt.pause(20)
+        t = self.cur_t.view()
+        if len(t):
+            tnum = mdates.date2num((t * 1e9).astype("int64").astype("datetime64[ns]"))
+            v = self.cur.view()
+            for ax, line in zip(axsC, self.cur_lines):
+                line.set_data(tnum, v)
+                ax.set_xlim(tnum[0], max(tnum[-1], tnum[0] + 1e-6))
+
+        for fig in (figWF, figH, figC):
+            fig.canvas.draw_idle()
+
+    def draw(self):
+        self.update()
+        plt.pause(REFRESH)
 
     def show(self):
         plt.show()
-        
+
 if __name__=="__main__":
 
-    fname=""
     if len(sys.argv)>1:
-        fname = sys.argv[1]
+        dm = DATA_MONITOR(sys.argv[1], sys.argv[2] if len(sys.argv)>2 else None)
+        dm.poll()
+        dm.update()
+        dm.show()
+        exit(0)
 
-        dm = DATA_MONITOR(fname)
-        dm.plot()    
+    dm = DATA_MONITOR(datadir=datadir, datadirC=datadirC)
+    while True:
+        dm.poll()
         dm.draw()
-        exit(0)
-    
-    else:
-        while True:
-            fname = datadir +  os.listdir(datadir)[-1]
-            fnameC = datadirC +  os.listdir(datadirC)[-1]
-            print(fname)
-            print(fnameC)
-            dm = DATA_MONITOR(fname,fnameC)
-            dm.plot()    
-            dm.draw()
-            del dm
-    
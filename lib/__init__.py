@@ -3,16 +3,59 @@
 This package exposes the most frequently used helpers at the top-level so that
 the notebooks can simply ``import lib`` and access the functionality without
 having to remember the internal layout.
+
+The helpers are resolved on first access (PEP 562 ``__getattr__``): importing
+``lib`` does not import matplotlib, seaborn, pywt, scipy or statsmodels, and a
+parsing job only loads the submodules it uses.
 """
 
-from .reading import *
-from .detection import *
-from .wavelet import *
-from .graphing import *  # graphic library, useful plots
-from .beam import *
-from .cpld import *
-from .poisson_binning import *
-from .cpld_io import *
-from .cpld_decode import *
-from .cpld_events import *
-from .cpld_viz import *
+from importlib import import_module
+
+# public name -> submodule that defines it
+_EXPORTS = {}
+for _module, _names in {
+    "reading": ["pre_pipeline", "import_file", "burst_timestamps"],
+    "detection": ["detect_latchups", "running_diff"],
+    "wavelet": ["cwt", "hz_formatter", "plot_fft_heatmap", "analyze_frequencies"],
+    "graphing": ["coincidence_time", "plot_percentile_hist", "plot_latchups_on_current"],  # graphic library, useful plots
+    "beam": ["read_beam_data", "beam_pipeline"],
+    "cpld": [
+        "parse_message", "count_fails", "nfails", "load_and_clean_text", "iter_clean_lines",
+        "iter_clean_blocks", "parse_line_generic", "parse_cpld_lines", "iter_cpld_data",
+        "read_cpld_data", "cpld_pipeline", "compute_periodic",
+    ],
+    "poisson_binning": [
+        "to_datetime_smart", "compute_scaled_time_clipped", "extract_event_times", "detect_resets",
+        "build_bins_by_resets", "build_bins_reset_locked", "build_bins_equal_fluence",
+        "build_bins_equal_count", "garwood_rate_ci", "summarize_bins", "build_and_summarize",
+        "inspect_scaled_time", "check_real_output", "conservation_checks", "recommend_k_multiple",
+        "bin_and_rate", "fit_poisson_trend", "poisson_trend_test_plus", "poisson_trend_test",
+        "format_trend_report",
+    ],
+    "cpld_io": ["CPLDRecord", "clean_ascii_dump", "load_cpld_file", "load_cpld_records", "merge_sorted_frames"],
+    "cpld_decode": ["decode_word", "count_failed_bits", "hex_to_uint16", "compute_counters"],
+    "hex_decode": ["hex_to_float", "hex_columns_to_numeric"],
+    "cpld_events": ["detect_bit_increments", "summarise_bit_totals"],
+    "cpld_viz": ["plot_bit_rate_heatmap", "plot_bit_timeseries"],
+    "cpld_store": ["CPLDStore", "open_cpld_store", "write_cpld_store"],
+    "table_cache": ["DEFAULT_CACHE_DIR", "cached_call", "compact_dtypes", "evict", "invalidate"],
+}.items():
+    _EXPORTS.update(dict.fromkeys(_names, _module))
+del _module, _names
+
+__all__ = list(_EXPORTS)
+_SUBMODULES = set(_EXPORTS.values())
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        return import_module(f".{name}", __name__)
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(f".{_EXPORTS[name]}", __name__), name)
+    globals()[name] = value  # later lookups skip __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
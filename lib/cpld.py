@@ -13,9 +13,9 @@ import re
 import time
 from datetime import datetime, timedelta
 from io import StringIO
-from typing import Dict, List, Optional, Tuple, Union
+from itertools import compress
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 
-import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 
@@ -106,6 +106,18 @@ def count_fails(hex_str: str) -> int:
     
 
 
+_HEX_PATTERN = re.compile(r'^[0-9A-Fa-f]{4}$')
+
+# Línea "ts,lfsr,B0[,B1[,B2[,B3]]]" sin espacios ni caracteres extra: es el
+# formato de casi todas las líneas y se puede parsear en bloque con el motor C.
+_CANONICAL_LINE = re.compile(r'[0-9]{1,10}(?:\.[0-9]+)?,[0-9]{1,18}(?:,[0-9A-Fa-f]{4}){1,4}')
+_BYTE_COLS = ['B0', 'B1', 'B2', 'B3']
+_UTC_OFFSET_NS = 2 * 3600 * 10**9  # UTC+2, igual que parse_line_generic
+_MAX_EPOCH_S = 9.2e9  # límite de datetime64[ns] (año 2262)
+_EPOCH = datetime(1970, 1, 1)
+_INT64_MAX = np.iinfo(np.int64).max
+
+
 def nfails(k: int, nbits: int = 16) -> int:
     """
     Count the number of 1-bits in the lowest `nbits` bits of an integer.
@@ -140,13 +152,51 @@ def load_and_clean_text(filenames: List[str],
     """
     Lee todos los archivos, aplica reemplazos y devuelve una lista de líneas limpias.
     """
-    lines: List[str] = []
-    for fn in filenames:
-        raw = open(fn, 'r', encoding='utf-8', errors='ignore').read()
+    return list(iter_clean_lines(filenames, replacements))
+
+
+def iter_clean_lines(filenames: List[str],
+                     replacements: List[Tuple[str, str]]) -> Iterator[str]:
+    """
+    Versión en streaming de ``load_and_clean_text``: entrega cada línea limpia
+    sin cargar los archivos completos (ver ``iter_clean_blocks``).
+    """
+    for block in iter_clean_blocks(filenames, replacements):
+        yield from block
+
+
+def iter_clean_blocks(filenames: List[str],
+                      replacements: List[Tuple[str, str]],
+                      block_chars: int = 1 << 22) -> Iterator[List[str]]:
+    """
+    Lee los archivos en bloques de ~``block_chars`` caracteres cortados en un
+    salto de línea y entrega, por bloque, la lista de líneas limpias.
+
+    Los reemplazos se aplican por bloque de líneas completas, lo que equivale a
+    aplicarlos sobre el texto completo siempre que no contengan saltos de línea.
+    """
+    def _clean(text: str) -> List[str]:
         for old, new in replacements:
-            raw = raw.replace(old, new)
-        lines.extend(raw.splitlines())
-    return lines
+            text = text.replace(old, new)
+        # splitlines() respeta los mismos separadores que la lectura completa
+        return text.splitlines()
+
+    for fn in filenames:
+        with open(fn, 'r', encoding='utf-8', errors='ignore') as fh:
+            tail = ''
+            while True:
+                data = fh.read(block_chars)
+                if not data:
+                    break
+                data = tail + data
+                cut = data.rfind('\n') + 1
+                if cut == 0:
+                    tail = data
+                    continue
+                tail = data[cut:]
+                yield _clean(data[:cut])
+            if tail:
+                yield _clean(tail)
 
 
 def parse_line_generic(
@@ -164,8 +214,6 @@ def parse_line_generic(
     - ts_threshold: fecha mínima aceptada.
     Returns: (time, lfsr, dict_bytes, valid)
     """
-    HEX_PATTERN = re.compile(r'^[0-9A-Fa-f]{4}$')
-
     parts = [p.strip() for p in raw.split(',')]
     # 1) Timestamp
     try:
@@ -183,7 +231,7 @@ def parse_line_generic(
     # 3) Extracción dinámica de bytes
     b_values = parts[2:]
     # 4) Validación de cada byte con regex
-    if not b_values or any(not HEX_PATTERN.match(b) for b in b_values):
+    if not b_values or any(not _HEX_PATTERN.match(b) for b in b_values):
         return time, lfsr, {}, False
 
     # 5) Filtrado por fecha mínima
@@ -198,6 +246,227 @@ def parse_line_generic(
     return time, lfsr, bytes_dict, True
 
 
+def _epoch_to_ns(ts: np.ndarray) -> np.ndarray:
+    """
+    Segundos UNIX (float) -> ns en UTC+2, redondeando a microsegundos con la
+    misma regla que ``datetime.utcfromtimestamp`` (mitad al par).
+    """
+    frac, whole = np.modf(ts)
+    us = np.round(frac * 1e6)
+    carry = us >= 1e6
+    us[carry] -= 1e6
+    whole[carry] += 1
+    return (whole.astype(np.int64) * 1_000_000 + us.astype(np.int64)) * 1000 + _UTC_OFFSET_NS
+
+
+def parse_cpld_lines(
+    lines: List[str],
+    ts_threshold: datetime = datetime(2022, 1, 1),
+    last_valid_time: Optional[datetime] = None,
+) -> Tuple[pd.DataFrame, np.ndarray, np.ndarray]:
+    """
+    Parse a block of cleaned CPLD lines in bulk.
+
+    Equivalent to calling :func:`parse_line_generic` on every line, but the
+    canonical ``ts,lfsr,B0[,B1..]`` lines (the vast majority) are validated
+    with a single compiled regex and parsed with the C engine of
+    :func:`pandas.read_csv`; timestamps are converted once into a
+    ``datetime64[ns]`` column.  Only the remaining lines (corrupted, padded
+    with spaces, ...) go through :func:`parse_line_generic`.
+
+    Parameters
+    ----------
+    lines : list of str
+        Lines with the replacements already applied.
+    ts_threshold : datetime, default=2022-01-01
+        Minimum accepted timestamp.
+    last_valid_time : datetime, optional
+        Last valid timestamp seen before this block, used to date the invalid
+        lines that precede the first valid line of the block.
+
+    Returns
+    -------
+    df : pandas.DataFrame
+        Valid records in line order with columns ['time', 'lfsrTMR', 'B0', ...].
+    bad_ts : numpy.ndarray
+        ``datetime64[ns]`` timestamp assigned to every invalid line (the last
+        valid timestamp before it); invalid lines with no valid line before
+        them are dropped, as in :func:`read_cpld_data`.
+    bad_rank : numpy.ndarray
+        Number of valid records of the block that precede each entry of
+        ``bad_ts``.
+
+    Notes
+    -----
+    A line whose LFSR field does not fit in an ``int64``, or whose timestamp
+    falls outside the ``datetime64[ns]`` range (years 1677-2262), is treated
+    as invalid.
+    """
+    n = len(lines)
+    valid = np.zeros(n, dtype=bool)
+    time_ns = np.zeros(n, dtype=np.int64)
+    lfsr = np.zeros(n, dtype=np.int64)
+    byte_values = {col: np.full(n, np.nan, dtype=object) for col in _BYTE_COLS}
+    threshold_ns = np.datetime64(ts_threshold, 'ns').astype(np.int64)
+
+    canonical = np.fromiter(map(bool, map(_CANONICAL_LINE.fullmatch, lines)), dtype=bool, count=n)
+    fast_idx = np.flatnonzero(canonical)
+    if len(fast_idx):
+        fast = pd.read_csv(
+            StringIO("\n".join(compress(lines, canonical))),
+            header=None,
+            names=['ts', 'lfsrTMR'] + _BYTE_COLS,
+            dtype={'ts': np.float64, 'lfsrTMR': np.int64, **{col: object for col in _BYTE_COLS}},
+            engine='c',
+            float_precision='round_trip',  # mismo redondeo que float()
+            keep_default_na=False,
+            na_values=[''],
+        )
+        ts = fast['ts'].to_numpy(dtype=np.float64)
+        in_range = ts < _MAX_EPOCH_S
+        ns = _epoch_to_ns(np.where(in_range, ts, 0.0))
+        ok = in_range & (ns >= threshold_ns)
+        rows = fast_idx[ok]
+        valid[rows] = True
+        time_ns[rows] = ns[ok]
+        lfsr[rows] = fast['lfsrTMR'].to_numpy()[ok]
+        for col in _BYTE_COLS:
+            byte_values[col][rows] = fast[col].to_numpy()[ok]
+        # fuera del rango de datetime64[ns]: se decide con el parser de línea
+        canonical[fast_idx[~in_range]] = False
+
+    for i in np.flatnonzero(~canonical):
+        t, l, bs_dict, ok = parse_line_generic(lines[i], ts_threshold)
+        if not (ok and t and l is not None and bs_dict):
+            continue
+        try:
+            lfsr[i] = l
+        except OverflowError:
+            continue
+        # fuera de datetime64[ns] (p.ej. un dígito de más): inválida, no un año que da la vuelta
+        ns = (t - _EPOCH) // timedelta(microseconds=1) * 1000
+        if not -_INT64_MAX <= ns <= _INT64_MAX:
+            continue
+        valid[i] = True
+        time_ns[i] = ns
+        for col, value in bs_dict.items():
+            byte_values[col][i] = value
+
+    present = [col for col in _BYTE_COLS if pd.notna(byte_values[col][valid]).any()]
+    df = pd.DataFrame({
+        'time': time_ns[valid].view('datetime64[ns]'),
+        'lfsrTMR': lfsr[valid],
+        **{col: byte_values[col][valid] for col in present},
+    })
+
+    # Líneas inválidas: se fechan con el último timestamp válido anterior
+    positions = np.arange(n)
+    last_valid = np.maximum.accumulate(np.where(valid, positions, -1)) if n else positions
+    invalid = np.flatnonzero(~valid)
+    source = last_valid[invalid]
+    bad_ns = time_ns[np.maximum(source, 0)]
+    if last_valid_time is not None:
+        bad_ns[source < 0] = np.datetime64(last_valid_time, 'ns').astype(np.int64)
+        keep = np.ones(len(invalid), dtype=bool)
+    else:
+        keep = source >= 0
+    bad_rank = np.cumsum(valid)[invalid[keep]]
+    return df, bad_ns[keep].view('datetime64[ns]'), bad_rank
+
+
+def _bad_records_frame(bad_ts: np.ndarray) -> pd.DataFrame:
+    """Tabla de líneas inválidas con las columnas auxiliares ``date`` y ``hour``."""
+    if len(bad_ts) == 0:
+        return pd.DataFrame()
+    df_bad = pd.DataFrame({'ts': bad_ts})
+    df_bad['date'] = df_bad['ts'].dt.date
+    df_bad['hour'] = df_bad['ts'].dt.floor('h')
+    return df_bad
+
+
+def iter_cpld_data(cpld_path: str,
+                   replacements: Union[Dict[str,str], List[Tuple[str,str]]] = None,
+                   chunk_rows: int = 1_000_000,
+                  ) -> Iterator[Tuple[pd.DataFrame, pd.DataFrame]]:
+    """
+    Stream CPLD data files as fixed-size DataFrame chunks.
+
+    Same parsing rules as :func:`read_cpld_data`, but the files are read in
+    blocks (parsed with :func:`parse_cpld_lines`) and the valid records are
+    emitted every ``chunk_rows`` rows, so a whole campaign can be processed in
+    bounded memory.  Chunks span file boundaries, and the "last valid
+    timestamp" used to date invalid lines is carried over from one chunk (and
+    file) to the next.
+
+    Parameters
+    ----------
+    cpld_path : str
+        Glob pattern for CPLD data files.
+    replacements : list of (old, new) or dict {old: new}, optional
+        Replacement rules applied to every line before parsing.
+        Default: [('*',''), (' #',',')].
+    chunk_rows : int, default=1_000_000
+        Number of valid records per chunk.  The last chunk may be shorter.
+
+    Yields
+    ------
+    df : pandas.DataFrame
+        Valid records of the chunk with columns ['time', 'lfsrTMR', 'B0', ...]
+        in file order (not sorted by time).
+    df_bad : pandas.DataFrame
+        Invalid lines found since the previous chunk, with columns
+        ['ts', 'date', 'hour'] (empty if there were none).
+
+    Examples
+    --------
+    >>> for df, df_bad in iter_cpld_data('../0_raw/Campaign3/cpld/run/cpld_data_*.dat',
+    ...                                  chunk_rows=500_000):
+    ...     partial = cpld_pipeline(df)
+    """
+    if chunk_rows <= 0:
+        raise ValueError("chunk_rows debe ser positivo")
+
+    ts_threshold = datetime(2022, 1, 1) # threshold, no tendría sentido datos previo a esto
+    # orden cronológico de los archivos rotados (cpld_data_..._NNNNN.dat)
+    filenames = sorted(glob.glob(cpld_path))
+    if isinstance(replacements, dict):
+        replacements = list(replacements.items())
+    replacements = replacements or [('*',''), (' #',',')]
+
+    frames: List[pd.DataFrame] = []      # registros válidos aún no emitidos
+    bad_ts: List[np.ndarray] = []
+    bad_rank: List[np.ndarray] = []      # n° de registros válidos previos (global)
+    n_seen = 0                           # registros válidos leídos
+    n_emitted = 0                        # registros válidos ya entregados
+    last_valid_time = None
+
+    def _take(n_rows: int, final: bool = False) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        nonlocal frames, bad_ts, bad_rank, n_emitted
+        pending = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+        chunk, rest = pending.iloc[:n_rows], pending.iloc[n_rows:]
+        frames = [rest] if len(rest) else []
+        ts_all, rank_all = np.concatenate(bad_ts), np.concatenate(bad_rank)
+        n_emitted += n_rows
+        # una línea inválida va con el bloque de registros que la precede
+        out = np.ones(len(rank_all), dtype=bool) if final else rank_all < n_emitted
+        bad_ts, bad_rank = [ts_all[~out]], [rank_all[~out]]
+        return chunk.reset_index(drop=True), _bad_records_frame(ts_all[out])
+
+    for block in iter_clean_blocks(filenames, replacements):
+        df, block_bad, block_rank = parse_cpld_lines(block, ts_threshold, last_valid_time)
+        if len(df):
+            last_valid_time = df['time'].iloc[-1]
+            frames.append(df)
+        bad_ts.append(block_bad)
+        bad_rank.append(block_rank + n_seen)
+        n_seen += len(df)
+        while n_seen - n_emitted >= chunk_rows:
+            yield _take(chunk_rows)
+
+    if n_seen > n_emitted or sum(len(b) for b in bad_ts):
+        yield _take(n_seen - n_emitted, final=True)
+
+
 def read_cpld_data(cpld_path: str,
                    replacements: Union[Dict[str,str], List[Tuple[str,str]]] = None,
                    debug: bool = False,
@@ -246,48 +515,22 @@ def read_cpld_data(cpld_path: str,
     >>> df.head()
     >>> df_bad['date'].value_counts()
     """
-    fnames = glob.glob(cpld_path)
-
-    ts_threshold = datetime(2022, 1, 1) # threshold, no tendría sentido datos previo a esto
-    records = []
-    bad_records = []
-    bad_count = 0
-    drops_invalid_ts = 0
-    last_ts = None
-
-    # Preparar paths y reemplazos
-    filenames = glob.glob(cpld_path)
-    if isinstance(replacements, dict):
-        replacements = list(replacements.items())
-    replacements = replacements or [('*',''), (' #',',')]
-
-    #---
-
-    lines = load_and_clean_text(filenames, replacements)
-    last_valid_time = None
-    for raw in lines:
-        time, lfsr, bs_dict, valid = parse_line_generic(raw, ts_threshold)
-        if valid and time and lfsr is not None and bs_dict:
-            last_valid_time = time
-            record = {'time': time, 'lfsrTMR': lfsr, **bs_dict}
-            records.append(record)
-        else:
-            # registrar error con último timestamp válido
-            if last_valid_time:
-                bad_records.append({'ts': last_valid_time})
+    # La lectura se hace por bloques (ver iter_cpld_data) para no mantener
+    # todas las líneas del run en memoria a la vez.
+    chunks = list(iter_cpld_data(cpld_path, replacements=replacements))
+    valid_frames = [df for df, _ in chunks if not df.empty]
+    bad_frames = [df_bad for _, df_bad in chunks if not df_bad.empty]
 
     # DataFrame de registros válidos
-    df = pd.DataFrame(records).sort_values('time').reset_index(drop=True)
+    df = pd.concat(valid_frames, ignore_index=True) if valid_frames else pd.DataFrame()
+    df = df.sort_values('time').reset_index(drop=True)
 
     logger = logging.getLogger(__name__)
     logger.addHandler(logging.StreamHandler())
     logger.setLevel(logging.INFO)
 
     # DataFrame de bad records
-    df_bad = pd.DataFrame(bad_records)
-    if not df_bad.empty:
-        df_bad['date'] = df_bad['ts'].dt.date
-        df_bad['hour'] = df_bad['ts'].dt.floor('h')
+    df_bad = pd.concat(bad_frames, ignore_index=True) if bad_frames else pd.DataFrame()
 
     if debug:
         logger.info(f"  Registros válidos: {len(df)}")
@@ -11,7 +11,7 @@ module provides a tested, well documented Python API that mirrors that logic.
 """
 
 
-from typing import List, MutableMapping
+from typing import Iterable, List, MutableMapping, Tuple
 
 import numpy as np
 import pandas as pd
@@ -19,12 +19,22 @@ import pandas as pd
 __all__ = [
     "decode_word",
     "count_failed_bits",
+    "hex_to_uint16",
     "compute_counters",
 ]
 
 _MASK = 0xFF00
 _SHIFT = 8
 
+# ASCII code -> nibble value (0xFF: not a hex digit), shared with hex_decode.
+try:
+    from .hex_decode import _HEX_LUT
+except ImportError:  # imported as a flat module (tests put lib/ on sys.path)
+    from hex_decode import _HEX_LUT
+
+# Number of set bits for every possible byte value.
+_POPCOUNT_LUT = np.array([bin(value).count("1") for value in range(256)], dtype=np.int64)
+
 
 def decode_word(word: str) -> int:
     """Convert a hexadecimal CPLD register into an integer mask.
@@ -82,6 +92,68 @@ def count_failed_bits(word: str) -> int:
     return int(bin(mask).count("1"))
 
 
+def hex_to_uint16(values: Iterable[object]) -> Tuple[np.ndarray, np.ndarray]:
+    """Decode a column of CPLD words into ``uint16`` registers in bulk.
+
+    Four-character words are translated through a byte lookup table without
+    touching the Python interpreter per row.  Anything else (``NaN``, prefixed
+    or padded strings, ...) is decoded once per distinct value with the same
+    :func:`int` semantics used by :func:`decode_word`, so both paths agree on
+    which words are valid.
+
+    Parameters
+    ----------
+    values:
+        Sequence of register words, typically the ``B0``/``B1`` columns.
+
+    Returns
+    -------
+    words : numpy.ndarray
+        Register values as ``uint16`` (``0`` where the word is invalid).  Only
+        the lower 16 bits are kept, which is all :func:`decode_word` inspects.
+    valid : numpy.ndarray
+        Boolean mask flagging the words that could be decoded.
+
+    Examples
+    --------
+    >>> words, valid = hex_to_uint16(['FF00', 'fe00', 'zz'])
+    >>> words.tolist(), valid.tolist()
+    ([65280, 65024, 0], [True, True, False])
+    """
+
+    text = pd.Series(values, dtype=object, copy=False).astype(str)
+    words = np.zeros(len(text), dtype=np.uint16)
+    valid = np.zeros(len(text), dtype=bool)
+    if text.empty:
+        return words, valid
+
+    # One extra column tells four-character words apart from longer ones.
+    codes = np.array(text.tolist(), dtype="U5").view(np.uint32).reshape(-1, 5)
+    nibbles = np.where(codes[:, :4] < 256, _HEX_LUT[np.minimum(codes[:, :4], 255)], 0xFF)
+    ok = (codes[:, 4] == 0) & (nibbles != 0xFF).all(axis=1)
+    nibbles = nibbles.astype(np.uint16)
+    decoded = (nibbles[:, 0] << 12) | (nibbles[:, 1] << 8) | (nibbles[:, 2] << 4) | nibbles[:, 3]
+    words[ok] = decoded[ok]
+    valid[ok] = True
+
+    pending = ~valid
+    if pending.any():
+        # Slow path: resolve every distinct leftover word once.
+        table = {}
+        for word in pd.unique(text[pending]):
+            try:
+                table[word] = int(word, 16) & 0xFFFF
+            except ValueError:
+                table[word] = -1
+        decoded = text[pending].map(table).to_numpy(dtype=np.int64)
+        rows = np.flatnonzero(pending)
+        ok = decoded >= 0
+        words[rows[ok]] = decoded[ok].astype(np.uint16)
+        valid[rows[ok]] = True
+
+    return words, valid
+
+
 def _update_periodic_counts(
     history: MutableMapping[int, List[int]],
     current_counts: np.ndarray,
@@ -108,10 +180,14 @@ def compute_counters(
 ) -> pd.DataFrame:
     """Augment ``df`` with the CPLD counters extracted from ``B0`` and ``B1``.
 
-    The implementation follows closely the imperative code that lived inside the
-    notebook.  Internally the function decodes the hexadecimal words, tracks
-    edge transitions (0→1) for each bit and computes auxiliary counters used for
-    visualisations.
+    The counters reproduce the imperative code that lived inside the notebook
+    (kept as :func:`_compute_counters_loop` for reference), but every stage is
+    evaluated on whole arrays: the words are decoded with
+    :func:`hex_to_uint16`, edge transitions (0→1) are found by comparing the
+    bit matrix with its shifted copy, the reset bias is obtained from
+    per-segment maxima and the ``[x, x+1, x+1, x]`` cadence becomes a shifted
+    comparison of the edge matrix.  Rows with undecodable words repeat the
+    previous row, exactly as before.
 
     Parameters
     ----------
@@ -154,6 +230,96 @@ def compute_counters(
     bit_columns = [f"bitn{i}" for i in range(n_bits)]
     periodic_columns = [f"bitnP{i}" for i in range(n_bits)]
 
+    for column in (b0_col, b1_col):
+        if column not in data.columns:
+            raise KeyError(f"Column '{column}' is required to compute CPLD counters.")
+
+    total_rows = len(data)
+    words0, valid0 = hex_to_uint16(data[b0_col])
+    words1, valid1 = hex_to_uint16(data[b1_col])
+    valid = valid0 & valid1
+
+    # The state machine only advances on decodable rows, so the counters are
+    # computed on the valid rows and broadcast back afterwards.
+    mask0 = ((~words0[valid]) & _MASK) >> _SHIFT
+    mask1 = ((~words1[valid]) & _MASK) >> _SHIFT
+
+    # Bit-major layout (one row per bit) keeps the cumulative sums contiguous.
+    shifts = np.arange(n_bits // 2)[:, None]
+    bits = np.vstack([(mask0 >> shifts) & 1, (mask1 >> shifts) & 1]).astype(bool)
+
+    b0_fails = _POPCOUNT_LUT[mask0]
+    b1_fails = _POPCOUNT_LUT[mask1]
+    total_fails = b0_fails + b1_fails
+
+    # A zero after a non-zero sample opens a new segment whose bias is the
+    # running total reached so far; within a segment ``total_I`` is the bias
+    # plus the running maximum of ``total_fails``.
+    resets = np.zeros(len(total_fails), dtype=bool)
+    resets[1:] = (total_fails[1:] == 0) & (total_fails[:-1] != 0)
+    segment = np.cumsum(resets)
+    starts = np.flatnonzero(np.r_[True, resets[1:]])[: len(total_fails)]
+    segment_max = np.maximum.reduceat(total_fails, starts)
+    bias = np.concatenate([[0], np.cumsum(segment_max)])[segment]
+    offset = segment * (int(total_fails.max(initial=0)) + 1)
+    running_max = np.maximum.accumulate(total_fails + offset) - offset
+    total_integrated = bias + running_max
+
+    transitions = bits.copy()
+    transitions[:, 1:] &= ~bits[:, :-1]
+    bit_counts_matrix = np.cumsum(transitions, axis=1, dtype=np.int64)
+
+    # ``[x, x+1, x+1, x]`` on the cumulative counts ⇔ edge, no edge, edge on
+    # three consecutive rows, with a full four-sample history behind them.
+    pattern = np.zeros_like(transitions)
+    pattern[:, 3:] = transitions[:, 3:] & ~transitions[:, 2:-1] & transitions[:, 1:-2]
+    periodic_matrix = np.cumsum(pattern, axis=1, dtype=np.int64)
+
+    # Row ``i`` of the output takes the last valid row at or before ``i``;
+    # leading invalid rows map to the zero row prepended below.
+    source = np.cumsum(valid)
+
+    def _expand(values: np.ndarray) -> np.ndarray:
+        padded = np.concatenate([np.zeros(values.shape[:-1] + (1,), dtype=np.int64), values], axis=-1)
+        return padded[..., source]
+
+    new_columns = dict(zip(bit_columns, _expand(bit_counts_matrix)))
+    new_columns.update(zip(periodic_columns, _expand(periodic_matrix)))
+    new_columns["B0_nfails"] = _expand(b0_fails)
+    new_columns["B1_nfails"] = _expand(b1_fails)
+    new_columns["total_fails"] = _expand(total_fails)
+    new_columns["total_I"] = _expand(total_integrated)
+    new_columns["count"] = np.arange(total_rows, dtype=int)
+
+    for col, values in new_columns.items():
+        data[col] = values
+
+    return data
+
+
+def _compute_counters_loop(
+    df: pd.DataFrame,
+    b0_col: str = "B0",
+    b1_col: str = "B1",
+    time_col: str = "time",
+    n_bits: int = 16,
+) -> pd.DataFrame:
+    """Row-by-row reference implementation of :func:`compute_counters`.
+
+    This is the original port of the notebook loop.  It is kept only to check
+    the vectorised engine against it; use :func:`compute_counters` instead.
+    """
+
+    if df.empty:
+        return df.copy()
+
+    if n_bits % 2:
+        raise ValueError("`n_bits` must be an even number (two bytes of data).")
+
+    data = df.sort_values(time_col).reset_index(drop=True).copy()
+    bit_columns = [f"bitn{i}" for i in range(n_bits)]
+    periodic_columns = [f"bitnP{i}" for i in range(n_bits)]
+
     for column in (b0_col, b1_col):
         if column not in data.columns:
             raise KeyError(f"Column '{column}' is required to compute CPLD counters.")
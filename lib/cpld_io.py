@@ -24,11 +24,16 @@ Examples
 """
 from __future__ import annotations
 
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
+from functools import partial
 from io import StringIO
 from pathlib import Path
-from typing import Iterable, Iterator, Sequence, Union
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 
+import numpy as np
 import pandas as pd
 
 __all__ = [
@@ -36,8 +41,11 @@ __all__ = [
     "clean_ascii_dump",
     "load_cpld_file",
     "load_cpld_records",
+    "merge_sorted_frames",
 ]
 
+logger = logging.getLogger(__name__)
+
 
 @dataclass
 class CPLDRecord:
@@ -157,11 +165,68 @@ def load_cpld_file(
     return df
 
 
+def _load_timed(
+    path: Union[str, Path],
+    names: Sequence[str],
+    tz_offset_hours: float,
+) -> Tuple[pd.DataFrame, float]:
+    """Worker used by :func:`load_cpld_records`: parse one file and time it."""
+
+    start = time.perf_counter()
+    df = load_cpld_file(path, names=names, tz_offset_hours=tz_offset_hours)
+    return df, time.perf_counter() - start
+
+
+def merge_sorted_frames(frames: Sequence[pd.DataFrame], key: str = "time") -> pd.DataFrame:
+    """Merge DataFrames that are already sorted by ``key``.
+
+    Rotated files normally cover disjoint time ranges; in that case the frames
+    are simply ordered by their first timestamp and concatenated.  When the
+    ranges overlap, the concatenated keys are merged with a stable
+    ``argsort`` (timsort), which detects the pre-sorted runs and merges them in
+    ``O(n log k)`` instead of sorting from scratch.  Missing timestamps (``NaT``)
+    are placed last, as :meth:`pandas.DataFrame.sort_values` does.
+
+    Examples
+    --------
+    >>> import pandas as pd
+    >>> a = pd.DataFrame({'time': pd.to_datetime([0, 2], unit='s'), 'x': [0, 2]})
+    >>> b = pd.DataFrame({'time': pd.to_datetime([1, 3], unit='s'), 'x': [1, 3]})
+    >>> merge_sorted_frames([a, b])['x'].tolist()
+    [0, 1, 2, 3]
+    """
+
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return pd.DataFrame()
+    if key not in frames[0].columns:
+        return pd.concat(frames, ignore_index=True)
+
+    def _sort_key(frame: pd.DataFrame) -> np.ndarray:
+        values = frame[key].to_numpy(dtype="datetime64[ns]").view(np.int64)
+        return np.where(frame[key].isna().to_numpy(), np.iinfo(np.int64).max, values)
+
+    keys = [_sort_key(frame) for frame in frames]
+    order = sorted(range(len(frames)), key=lambda i: keys[i][0])
+    frames = [frames[i] for i in order]
+    keys = [keys[i] for i in order]
+
+    combined = pd.concat(frames, ignore_index=True)
+    disjoint = all(prev[-1] <= cur[0] for prev, cur in zip(keys[:-1], keys[1:]))
+    if disjoint:
+        return combined
+
+    merged = np.argsort(np.concatenate(keys), kind="stable")
+    return combined.take(merged).reset_index(drop=True)
+
+
 def load_cpld_records(
     paths: Iterable[Union[str, Path]],
     names: Sequence[str] = DEFAULT_NAMES,
     tz_offset_hours: float = 0.0,
-) -> pd.DataFrame:
+    workers: Optional[int] = None,
+    return_timings: bool = False,
+) -> Union[pd.DataFrame, Tuple[pd.DataFrame, pd.DataFrame]]:
     """Load several CPLD files and concatenate them into a single DataFrame.
 
     Parameters
@@ -174,11 +239,21 @@ def load_cpld_records(
     tz_offset_hours:
         Optional timezone offset applied to the timestamp column of every
         individual file.
+    workers:
+        Number of worker processes used to parse the files concurrently.
+        ``None`` or ``1`` parses them sequentially in the current process.
+    return_timings:
+        If ``True``, also return a table with the parsing time of every file.
 
     Returns
     -------
     pandas.DataFrame
-        Concatenated data sorted by timestamp.
+        Concatenated data sorted by timestamp.  The per-file frames are
+        already sorted, so they are combined with :func:`merge_sorted_frames`
+        rather than re-sorted.
+    pandas.DataFrame, optional
+        When ``return_timings`` is set: one row per file with the columns
+        ``path``, ``rows`` and ``seconds``.
 
     Examples
     --------
@@ -187,18 +262,40 @@ def load_cpld_records(
     >>> df = load_cpld_records(folder.glob('cpld_data_*.dat'))
     >>> len(df.columns)
     4
+    >>> df, timings = load_cpld_records(folder.glob('cpld_data_*.dat'),
+    ...                                 workers=4, return_timings=True)
     """
 
-    data_frames = [
-        load_cpld_file(path, names=names, tz_offset_hours=tz_offset_hours)
-        for path in paths
-    ]
-    if not data_frames:
-        return pd.DataFrame(columns=names)
+    paths = list(paths)
+    load = partial(_load_timed, names=names, tz_offset_hours=tz_offset_hours)
+    if workers is not None and workers > 1 and len(paths) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results: List[Tuple[pd.DataFrame, float]] = list(pool.map(load, paths))
+    else:
+        results = [load(path) for path in paths]
+
+    timings = pd.DataFrame(
+        {
+            "path": [str(path) for path in paths],
+            "rows": [len(df) for df, _ in results],
+            "seconds": [seconds for _, seconds in results],
+        }
+    )
+    for row in timings.itertuples():
+        logger.debug("parsed %s: %d rows in %.3f s", row.path, row.rows, row.seconds)
 
-    combined = pd.concat(data_frames, ignore_index=True)
-    if "time" in combined.columns:
-        combined = combined.sort_values("time").reset_index(drop=True)
+    data_frames = [df for df, _ in results]
+    if not data_frames:
+        combined = pd.DataFrame(columns=names)
+    elif "time" in data_frames[0].columns:
+        combined = merge_sorted_frames(data_frames, key="time")
+        if combined.empty:
+            combined = pd.concat(data_frames, ignore_index=True)
+    else:
+        combined = pd.concat(data_frames, ignore_index=True)
+
+    if return_timings:
+        return combined, timings
     return combined
 
 
@@ -0,0 +1,412 @@
+"""Memory-mapped on-disk store for decoded CPLD telemetry.
+
+:func:`lib.cpld.cpld_pipeline` and :func:`lib.cpld_decode.compute_counters`
+expand every sample into 32 ``int64`` counter columns (``bitn*`` and
+``bitnP*``, 256 bytes per sample) although the CPLD only sends two 16-bit
+registers.  A :class:`CPLDStore` keeps the raw registers as ``uint16``, the
+timestamps as ``int64`` nanoseconds and, optionally, the cumulative counters as
+``uint32`` in flat binary files.  The files are memory-mapped when the store is
+opened, so reopening a campaign after a notebook restart is instantaneous, and
+totals, event tables and plot inputs are computed chunk by chunk without
+loading the whole run into RAM.
+
+Layout of a store directory::
+
+    meta.json      rows, register columns, timezone, stored arrays
+    time.i8        int64[rows]            nanoseconds since the epoch (UTC)
+    words.u2       uint16[rows, n_regs]   raw registers (B0, B1, ...)
+    counts.u4      uint32[rows, n_bits]   ``bitn*`` (optional)
+    periodic.u4    uint32[rows, n_bits]   ``bitnP*`` (optional)
+
+The counters follow :func:`lib.cpld.cpld_pipeline`: rows where a register is
+not a four-digit hexadecimal word are dropped, ``bitn<i>`` counts the rising
+edges of failure flag ``i`` and ``bitnP<i>`` its falling edges.
+
+Examples
+--------
+>>> from lib import iter_cpld_data, open_cpld_store, plot_bit_rate_heatmap, write_cpld_store
+>>> chunks = iter_cpld_data('../0_raw/Campaign3/cpld/run/cpld_data_*.dat')
+>>> store = write_cpld_store(chunks, 'run3.cpld')        # once per campaign
+>>> store = open_cpld_store('run3.cpld')                 # after a restart
+>>> store.bit_totals()
+>>> plot_bit_rate_heatmap(store.to_frame(rows=store.window_rows('1H')), freq='1H')
+"""
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .cpld_decode import _MASK, _SHIFT, hex_to_uint16
+except ImportError:  # imported as a flat module (tests put lib/ on sys.path)
+    from cpld_decode import _MASK, _SHIFT, hex_to_uint16
+
+__all__ = [
+    "CPLDStore",
+    "open_cpld_store",
+    "write_cpld_store",
+]
+
+PathLike = Union[str, Path]
+Rows = Union[slice, Sequence[int], np.ndarray, None]
+
+_META = "meta.json"
+_FILES = {
+    "time": ("time.i8", np.int64),
+    "words": ("words.u2", np.uint16),
+    "counts": ("counts.u4", np.uint32),
+    "periodic": ("periodic.u4", np.uint32),
+}
+_CHUNK_ROWS = 1_000_000
+
+
+def _fail_bits(words: np.ndarray) -> np.ndarray:
+    """Failure flags of ``words`` (``(m, n_regs)`` registers) as ``(m, 8 * n_regs)`` booleans."""
+
+    masked = (((~words) & _MASK) >> _SHIFT).astype(np.uint8)
+    bits = np.unpackbits(masked[:, :, None], axis=2, bitorder="little")
+    return bits.reshape(len(words), 8 * words.shape[1]).astype(bool)
+
+
+def _edge_counts(
+    bits: np.ndarray,
+    prev: np.ndarray,
+    counts: np.ndarray,
+    periodic: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Cumulative rising/falling edge counts of ``bits`` following row ``prev``."""
+
+    before = np.vstack([prev[None, :], bits[:-1]])
+    up = np.cumsum(bits & ~before, axis=0, dtype=np.uint32) + counts
+    down = np.cumsum(before & ~bits, axis=0, dtype=np.uint32) + periodic
+    return up, down
+
+
+def _byte_columns(df: pd.DataFrame) -> List[str]:
+    columns = [col for col in df.columns if str(col).startswith("B") and str(col)[1:].isdigit()]
+    return sorted(columns, key=lambda name: int(name[1:]))
+
+
+def _decode_frame(
+    df: pd.DataFrame, time_col: str, byte_cols: Sequence[str]
+) -> Tuple[np.ndarray, np.ndarray, Optional[str]]:
+    """Valid rows of ``df`` as (``int64`` ns timestamps, ``uint16`` registers, timezone)."""
+
+    words = np.empty((len(df), len(byte_cols)), dtype=np.uint16)
+    valid = np.ones(len(df), dtype=bool)
+    for j, col in enumerate(byte_cols):
+        words[:, j], ok = hex_to_uint16(df[col])
+        # same filter as cpld_pipeline: exactly four hex digits
+        valid &= ok & df[col].astype(str).str.fullmatch(r"[0-9A-Fa-f]{4}").to_numpy(dtype=bool)
+
+    times = pd.DatetimeIndex(df[time_col])
+    tz = None if times.tz is None else str(times.tz)
+    if tz is not None:
+        times = times.tz_convert("UTC").tz_localize(None)
+    ns = times.to_numpy(dtype="datetime64[ns]").view(np.int64)
+    return ns[valid], words[valid], tz
+
+
+class CPLDStore:
+    """Read-only view of a store written by :func:`write_cpld_store`.
+
+    Attributes
+    ----------
+    time:
+        ``int64`` nanoseconds since the epoch (UTC), one per sample.
+    words:
+        ``uint16`` registers, shape ``(rows, len(byte_cols))``.
+    counts, periodic:
+        ``uint32`` ``bitn*``/``bitnP*`` counters, shape ``(rows, n_bits)``,
+        or ``None`` when the store was written with ``counters=False`` (they
+        are then recomputed on each pass).
+
+    All arrays are :class:`numpy.memmap` views; nothing is read until used.
+    """
+
+    def __init__(self, path: PathLike) -> None:
+        self.path = Path(path)
+        self.meta = json.loads((self.path / _META).read_text())
+        self.byte_cols: List[str] = list(self.meta["byte_cols"])
+        self.n_bits = 8 * len(self.byte_cols)
+        self.tz: Optional[str] = self.meta["tz"]
+        rows = self.meta["rows"]
+        self.time = self._map("time", (rows,))
+        self.words = self._map("words", (rows, len(self.byte_cols)))
+        self.counts = self._map("counts", (rows, self.n_bits)) if self.meta["counters"] else None
+        self.periodic = self._map("periodic", (rows, self.n_bits)) if self.meta["counters"] else None
+
+    def _map(self, name: str, shape: Tuple[int, ...]) -> np.ndarray:
+        fname, dtype = _FILES[name]
+        if not shape[0]:
+            return np.zeros(shape, dtype=dtype)  # mmap cannot map an empty file
+        return np.memmap(self.path / fname, dtype=dtype, mode="r", shape=shape)
+
+    def __len__(self) -> int:
+        return int(self.meta["rows"])
+
+    def __repr__(self) -> str:
+        return f"CPLDStore({str(self.path)!r}, rows={len(self)}, byte_cols={self.byte_cols})"
+
+    def _rows(self, rows: Rows) -> Union[slice, np.ndarray]:
+        if rows is None:
+            return slice(None)
+        if isinstance(rows, slice):
+            return rows
+        return np.asarray(rows, dtype=np.int64)
+
+    def times(self, rows: Rows = None) -> pd.DatetimeIndex:
+        """Timestamps of ``rows`` (all by default), in the timezone of the source."""
+
+        index = pd.DatetimeIndex(np.asarray(self.time[self._rows(rows)]).view("datetime64[ns]"))
+        return index.tz_localize("UTC").tz_convert(self.tz) if self.tz else index
+
+    def fail_bits(self, rows: Rows = None) -> np.ndarray:
+        """Failure flags of ``rows`` as a boolean ``(m, n_bits)`` matrix."""
+
+        return _fail_bits(np.asarray(self.words[self._rows(rows)]))
+
+    def iter_chunks(
+        self, chunk_rows: int = _CHUNK_ROWS
+    ) -> Iterator[Tuple[int, np.ndarray, np.ndarray, np.ndarray]]:
+        """Yield ``(start, bits, counts, periodic)`` for consecutive row blocks.
+
+        ``bits`` are the failure flags of rows ``start:start + len(bits)`` and
+        ``counts``/``periodic`` their ``bitn*``/``bitnP*`` counters, read from
+        disk when stored and accumulated on the fly otherwise.
+        """
+
+        prev = np.zeros(self.n_bits, dtype=bool)
+        counts = np.zeros(self.n_bits, dtype=np.uint32)
+        periodic = np.zeros(self.n_bits, dtype=np.uint32)
+        for start in range(0, len(self), chunk_rows):
+            stop = min(start + chunk_rows, len(self))
+            bits = self.fail_bits(slice(start, stop))
+            if self.counts is not None:
+                yield start, bits, np.asarray(self.counts[start:stop]), np.asarray(self.periodic[start:stop])
+                continue
+            up, down = _edge_counts(bits, prev, counts, periodic)
+            prev, counts, periodic = bits[-1], up[-1], down[-1]
+            yield start, bits, up, down
+
+    def _counters(self, index: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        if self.counts is not None:
+            return np.asarray(self.counts[index]), np.asarray(self.periodic[index])
+        counts = np.zeros((len(index), self.n_bits), dtype=np.uint32)
+        periodic = np.zeros_like(counts)
+        for start, bits, up, down in self.iter_chunks():
+            pick = np.flatnonzero((index >= start) & (index < start + len(bits)))
+            counts[pick] = up[index[pick] - start]
+            periodic[pick] = down[index[pick] - start]
+        return counts, periodic
+
+    def to_frame(self, rows: Rows = None, bit_prefix: str = "bitn") -> pd.DataFrame:
+        """Materialise ``rows`` as the table returned by :func:`lib.cpld.cpld_pipeline`.
+
+        The result has ``time``, the registers as ``uint16`` (one column per
+        entry of ``byte_cols``), ``fails_inst`` and the ``bitn*``/``bitnP*``
+        counters as ``int64``, so the helpers of :mod:`lib.cpld_events` and
+        :mod:`lib.cpld_viz` accept it.  Select a subset (a slice, an index
+        array or :meth:`window_rows`) for long runs.
+        """
+
+        index = np.arange(len(self))[self._rows(rows)]
+        bits = self.fail_bits(index)
+        counts, periodic = self._counters(index)
+        columns = {"time": self.times(index)}
+        columns.update(zip(self.byte_cols, np.asarray(self.words[index]).T))
+        columns["fails_inst"] = bits.sum(axis=1)
+        for i in range(self.n_bits):
+            columns[f"{bit_prefix}{i}"] = counts[:, i].astype(np.int64)
+            columns[f"{bit_prefix}P{i}"] = periodic[:, i].astype(np.int64)
+        return pd.DataFrame(columns)
+
+    def bit_totals(self) -> pd.Series:
+        """Final ``bitn*`` count per bit, as :func:`lib.cpld_events.summarise_bit_totals`."""
+
+        totals = np.zeros(self.n_bits, dtype=np.int64)
+        if self.counts is not None:
+            if len(self):
+                totals = self.counts[-1].astype(np.int64)
+        else:
+            for _, _, counts, _ in self.iter_chunks():
+                totals = counts[-1].astype(np.int64)
+        return pd.Series(totals, index=range(self.n_bits), name="total_events")
+
+    def bit_increments(self, minimum_increment: int = 1, chunk_rows: int = _CHUNK_ROWS) -> pd.DataFrame:
+        """Rows where a ``bitn*`` counter increased, as :func:`lib.cpld_events.detect_bit_increments`.
+
+        Only the event rows are kept in memory; the counters are scanned in
+        blocks of ``chunk_rows``.
+        """
+
+        parts = []
+        last = np.zeros(self.n_bits, dtype=np.int64)
+        for start, _, counts, _ in self.iter_chunks(chunk_rows):
+            counts = counts.astype(np.int64)
+            steps = np.diff(counts, axis=0, prepend=last[None, :])
+            last = counts[-1]
+            row, bit = np.nonzero(steps >= minimum_increment)
+            if len(row):
+                parts.append(pd.DataFrame({
+                    "bit": bit,
+                    "row": row + start,
+                    "increment": steps[row, bit],
+                    "count": counts[row, bit],
+                }))
+        if not parts:
+            return pd.DataFrame()
+        events = pd.concat(parts, ignore_index=True)
+        events["time"] = self.times(events["row"].to_numpy())
+        return events.sort_values(by=["time", "bit", "row"]).reset_index(drop=True)
+
+    def window_rows(self, freq: Union[str, pd.Timedelta], chunk_rows: int = _CHUNK_ROWS) -> np.ndarray:
+        """First row plus the last row of every ``freq`` window (aligned on the epoch).
+
+        Counters are cumulative, so the differences between these rows are the
+        per-window increments: ``to_frame(rows=window_rows(freq))`` gives the
+        same :func:`lib.cpld_viz.plot_bit_rate_heatmap` as the full table at a
+        fraction of the size.  The timestamps must be sorted.
+        """
+
+        step = pd.Timedelta(freq).value
+        if step <= 0:
+            raise ValueError("The window must be longer than zero.")
+        if not len(self):
+            return np.zeros(0, dtype=np.int64)
+        rows = [np.zeros(1, dtype=np.int64)]
+        prev = self.time[0] // step
+        for start in range(0, len(self), chunk_rows):
+            window = np.asarray(self.time[start:start + chunk_rows]) // step
+            change = np.flatnonzero(np.diff(window, prepend=prev) != 0)
+            rows.append(change + start - 1)  # last row of the window that just ended
+            prev = window[-1]
+        rows.append(np.array([len(self) - 1]))
+        return np.unique(np.concatenate(rows))
+
+
+def open_cpld_store(path: PathLike) -> CPLDStore:
+    """Open a store written by :func:`write_cpld_store` (memory-mapped, read-only)."""
+
+    return CPLDStore(path)
+
+
+def write_cpld_store(
+    frames: Union[pd.DataFrame, Iterable[Union[pd.DataFrame, Tuple[pd.DataFrame, pd.DataFrame]]]],
+    path: PathLike,
+    time_col: str = "time",
+    byte_cols: Optional[Sequence[str]] = None,
+    counters: bool = True,
+    append: bool = False,
+) -> CPLDStore:
+    """Decode CPLD records into a memory-mapped store at ``path``.
+
+    Parameters
+    ----------
+    frames:
+        A DataFrame with ``time`` and ``B0``, ``B1``, ... columns (the output
+        of :func:`lib.cpld.read_cpld_data`), or an iterable of them.  The
+        ``(df, df_bad)`` pairs yielded by :func:`lib.cpld.iter_cpld_data` are
+        accepted directly, so a campaign is converted in bounded memory.
+    path:
+        Store directory.  An existing store is replaced unless ``append``.
+    time_col:
+        Name of the timestamp column.
+    byte_cols:
+        Register columns, by default every ``B<n>`` column sorted by ``n``.
+    counters:
+        Also store the ``bitn*``/``bitnP*`` counters (``2 * n_bits * 4``
+        bytes per sample).  Without them the store holds 8 + 2 bytes per
+        register per sample and the counters are accumulated on each pass.
+    append:
+        Add the records after those of an existing store, continuing its
+        counters.
+
+    Returns
+    -------
+    CPLDStore
+        The freshly written store.
+    """
+
+    path = Path(path)
+    if isinstance(frames, pd.DataFrame):
+        frames = [frames]
+
+    meta = None
+    if append and (path / _META).exists():
+        meta = json.loads((path / _META).read_text())
+        if byte_cols is not None and list(byte_cols) != meta["byte_cols"]:
+            raise ValueError(f"The store holds registers {meta['byte_cols']}, not {list(byte_cols)}.")
+    else:
+        path.mkdir(parents=True, exist_ok=True)
+        for fname, _ in list(_FILES.values()) + [(_META, None)]:
+            if (path / fname).exists():
+                (path / fname).unlink()
+
+    handles = {}
+    prev = counts = periodic = None
+
+    def _open(meta: dict) -> None:
+        nonlocal prev, counts, periodic
+        n_regs = len(meta["byte_cols"])
+        n_bits = 8 * n_regs
+        widths = {"time": 1, "words": n_regs, "counts": n_bits, "periodic": n_bits}
+        names = ["time", "words"] + (["counts", "periodic"] if meta["counters"] else [])
+        for name in names:
+            fname, dtype = _FILES[name]
+            handle = open(path / fname, "ab")
+            # drop what a crashed writer left past the recorded rows
+            handle.truncate(meta["rows"] * widths[name] * np.dtype(dtype).itemsize)
+            handles[name] = handle
+        prev = np.zeros(n_bits, dtype=bool)
+        counts = np.zeros(n_bits, dtype=np.uint32)
+        periodic = np.zeros(n_bits, dtype=np.uint32)
+        if meta["rows"]:
+            store = CPLDStore(path)
+            prev = store.fail_bits(slice(-1, None))[0]
+            if meta["counters"]:
+                counts, periodic = np.array(store.counts[-1]), np.array(store.periodic[-1])
+            del store
+
+    if meta is not None:
+        _open(meta)
+
+    try:
+        for frame in frames:
+            if isinstance(frame, tuple):
+                frame = frame[0]  # (df, df_bad) from iter_cpld_data
+            if meta is None:
+                cols = list(byte_cols) if byte_cols is not None else _byte_columns(frame)
+                meta = {"version": 1, "rows": 0, "byte_cols": cols, "tz": None, "counters": counters}
+                _open(meta)
+            ns, words, tz = _decode_frame(frame, time_col, meta["byte_cols"])
+            if meta["rows"] == 0 and tz is not None:
+                meta["tz"] = tz
+            if not len(ns):
+                continue
+            ns.tofile(handles["time"])
+            words.tofile(handles["words"])
+            if meta["counters"]:
+                bits = _fail_bits(words)
+                up, down = _edge_counts(bits, prev, counts, periodic)
+                up.tofile(handles["counts"])
+                down.tofile(handles["periodic"])
+                prev, counts, periodic = bits[-1], up[-1], down[-1]
+            meta["rows"] += len(ns)
+    finally:
+        for handle in handles.values():
+            handle.close()
+
+    if meta is None:
+        cols = list(byte_cols) if byte_cols is not None else ["B0", "B1"]
+        meta = {"version": 1, "rows": 0, "byte_cols": cols, "tz": None, "counters": counters}
+    path.mkdir(parents=True, exist_ok=True)
+    tmp = path / (_META + ".tmp")
+    tmp.write_text(json.dumps(meta))
+    os.replace(tmp, path / _META)
+    return CPLDStore(path)
@@ -88,6 +88,45 @@ def detect_latchups(df: pd.DataFrame,
     idc_arr = df[current_col].values
     times = df.index.to_numpy()
 
+    cols = ["Time_event", "Duración_s", "Idle_previo", "Off_detectado",
+            "Recuperación_en", "IDC_recuperación"]
+
+    # Caídas: muestra previa en "idle principal" y actual < off_threshold
+    prev, curr = idc_arr[:-1], idc_arr[1:]
+    drops = np.flatnonzero((idle_low <= prev) & (prev <= idle_high) & (curr < off_threshold)) + 1
+
+    # Recuperación: primer índice j > i con corriente ≥ idle_low
+    rec_pos = np.flatnonzero(idc_arr >= idle_low)
+    k = np.searchsorted(rec_pos, drops, side="right")
+    found = k < rec_pos.size
+    i, j = drops[found], rec_pos[k[found]]
+
+    # Si no se detectó ningún evento, retornar DataFrame vacío con columnas
+    if i.size == 0:
+        return pd.DataFrame(columns=cols)
+
+    t, t_rec = times[i], times[j]
+    eventos_df = pd.DataFrame({
+        "Time_event":        t,
+        "Duración_s":        (t_rec - t).astype("timedelta64[s]").astype(int),
+        "Idle_previo":       idc_arr[i - 1],
+        "Off_detectado":     idc_arr[i],
+        "Recuperación_en":   t_rec,
+        "IDC_recuperación":  idc_arr[j],
+    }).set_index("Time_event")
+    return eventos_df
+
+
+def _detect_latchups_loop(df: pd.DataFrame,
+                          current_col: str,
+                          off_threshold: float,
+                          idle_low: float,
+                          idle_high: float) -> pd.DataFrame:
+    """Implementación original muestra a muestra de :func:`detect_latchups` (referencia para tests)."""
+    # Extraer los valores de corriente y los timestamps a arrays
+    idc_arr = df[current_col].values
+    times = df.index.to_numpy()
+
     events = []
     prev_idle = False
 
@@ -0,0 +1,124 @@
+"""Vectorised decoding of hexadecimal channel readings.
+
+The verDAQ8 dumps store the eight ADC channels as hexadecimal strings.  Both
+:func:`lib.reading.pre_pipeline` and :func:`lib.wavelet.analyze_frequencies`
+used to convert them one cell at a time with ``int(x, 16)``, which dominates
+the load time of multi-million-row runs.  :func:`hex_to_float` decodes a whole
+column at once through a fixed-width character view and a lookup table.
+"""
+from __future__ import annotations
+
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+__all__ = ["hex_to_float", "hex_columns_to_numeric"]
+
+# Longest word decoded on the fast path: 13 hex digits (52 bits) are exact in
+# a float64.  Longer words fall back to ``int``.
+_WIDTH = 13
+
+# code point -> nibble value; 0xFF flags characters that are not hex digits.
+# The single copy of the table: cpld_decode and the live CPLD monitor use it too.
+_HEX_LUT = np.full(256, 0xFF, dtype=np.uint8)
+for _value, _char in enumerate(b"0123456789ABCDEF"):
+    _HEX_LUT[_char] = _value
+    _HEX_LUT[ord(chr(_char).lower())] = _value
+
+
+def _int_or_nan(word: str) -> float:
+    try:
+        return float(int(word, 16))
+    except ValueError:
+        return np.nan
+
+
+def _decode_words(words: np.ndarray) -> np.ndarray:
+    """Decode an object array of distinct words (see :func:`hex_to_float`)."""
+
+    out = np.full(len(words), np.nan)
+    if not len(words):
+        return out
+    # str() of every cell in C; one extra slot tells long words apart
+    codes = np.array(words, dtype=f"U{_WIDTH + 1}").view(np.uint32).reshape(-1, _WIDTH + 1)
+    used = codes != 0
+    width = int(used.any(axis=0).sum())  # longest word (cells are left aligned)
+    codes, used = codes[:, :width], used[:, :width]
+    nibbles = _HEX_LUT[np.minimum(codes, 255)]
+    nibbles[codes > 255] = 0xFF
+    fast = used[:, 0] & ~(used & (nibbles == 0xFF)).any(axis=1)
+    if width > _WIDTH:
+        fast &= ~used[:, _WIDTH]
+    # digit k of a word of length L weighs 16 ** (L - 1 - k)
+    length = used.sum(axis=1)
+    power = np.where(used, length[:, None] - 1 - np.arange(width), 0)
+    acc = (np.where(used, nibbles, 0).astype(np.int64) << (4 * power)).sum(axis=1)
+    out[fast] = acc[fast]
+
+    for i in np.flatnonzero(~fast):
+        out[i] = _int_or_nan(str(words[i]))
+    return out
+
+
+def hex_to_float(values: Iterable[object]) -> np.ndarray:
+    """Decode hexadecimal words into a ``float64`` array, ``NaN`` where invalid.
+
+    Every cell is read as ``int(str(cell), 16)``.  The column is factorised
+    first, so each distinct word is decoded once (a 12-bit ADC channel has at
+    most 4096 of them).  Plain words of up to 13 hex digits are decoded
+    without a per-word Python call: they are viewed as fixed-width code
+    points, mapped through a lookup table and weighted by their digit
+    position.  The remaining words (``0x`` prefixes, signs, padding, very long
+    words, ...) go through :func:`int`, so the result matches ``int(x, 16)``
+    for every string.  Missing values and cells that are not valid
+    hexadecimal become ``NaN``.
+
+    Integral numbers are read through their decimal digits, as happens when
+    :func:`pandas.read_csv` parses a channel whose words contain no letters.
+
+    Parameters
+    ----------
+    values:
+        Column of words (strings, or numbers parsed from hex without letters).
+
+    Returns
+    -------
+    numpy.ndarray
+        Decoded values as ``float64``.
+
+    Examples
+    --------
+    >>> hex_to_float(['ff', '0A', 'zz', None, '0x10']).tolist()
+    [255.0, 10.0, nan, nan, 16.0]
+    """
+
+    series = pd.Series(values, copy=False)
+    if series.dtype.kind == "f":
+        # integral floats (an all-digit column with gaps) keep their digits
+        num = series.to_numpy()
+        integral = np.isfinite(num) & (num == np.floor(num))
+        series = pd.Series(np.where(integral, num, 0).astype(np.int64), dtype=object).where(integral)
+    if series.empty:
+        return np.full(0, np.nan)
+
+    codes, uniques = pd.factorize(series.to_numpy(dtype=object))
+    decoded = np.append(_decode_words(np.asarray(uniques, dtype=object)), np.nan)
+    return decoded[codes]  # code -1 (missing) picks the trailing NaN
+
+
+def hex_columns_to_numeric(df: pd.DataFrame, columns: Iterable[str]) -> pd.DataFrame:
+    """Decode ``columns`` of ``df`` in place with :func:`hex_to_float`.
+
+    Columns without invalid cells are stored as ``int64`` (what a cell-wise
+    ``int(x, 16)`` conversion produced), the others as ``float64`` with
+    ``NaN``.  Returns ``df`` for chaining.
+    """
+
+    for col in columns:
+        decoded = hex_to_float(df[col])
+        if len(decoded) and not np.isnan(decoded).any() and np.abs(decoded).max() < 2**53:
+            df[col] = decoded.astype(np.int64)
+        else:
+            df[col] = decoded
+    return df
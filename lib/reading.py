@@ -7,6 +7,11 @@ from pathlib import Path
 import numpy as np
 import pandas as pd
 
+try:
+    from .hex_decode import hex_columns_to_numeric
+except ImportError:  # imported as a flat module (tests put lib/ on sys.path)
+    from hex_decode import hex_columns_to_numeric
+
 
 def pre_pipeline(df: pd.DataFrame) -> pd.DataFrame:
     """Normalize raw verDAQ exports into analysis-ready numeric columns.
@@ -26,14 +31,9 @@ def pre_pipeline(df: pd.DataFrame) -> pd.DataFrame:
     # Conversión del formato de datos
     df['timestamp'] = pd.to_datetime(df['t'], unit='s')
 
-    def safe_hex_to_int(x):
-        try:
-            return int(x, 16)
-        except (ValueError, TypeError):
-            return float('nan')
-
+    # hex -> int por columna completa (NaN donde la celda no es hex válido)
     channel_cols = [col for col in df.columns if col.startswith('ch')]
-    df[channel_cols] = df[channel_cols].applymap(safe_hex_to_int)
+    hex_columns_to_numeric(df, channel_cols)
     return df
 
 def import_file(
@@ -68,3 +68,48 @@ def import_file(
     df = pre_pipeline(df)
     return df
 
+
+def burst_timestamps(
+    df: pd.DataFrame,
+    time_col: str = "time",
+    channel_col: str = "ch1",
+    period: float | str | pd.Timedelta = 5e-3,
+    header: pd.Series | np.ndarray | None = None,
+) -> pd.Series:
+    """Per-sample timestamps for verDAQ bursts, as ``datetime64[ns]``.
+
+    The verDAQ8 dumps only stamp the header line of each burst (a row with a
+    time and no channel readings); the samples that follow were taken every
+    ``period``.  Sample ``k`` of a burst (the header being ``k = 0``) gets
+    ``header_time + k * period``.  Rows before the first header are ``NaT``.
+
+    Parameters
+    ----------
+    df:
+        Table with a datetime-like ``time_col``.
+    time_col, channel_col:
+        A row is a header when ``time_col`` is set and ``channel_col`` is
+        missing.
+    period:
+        Sampling period, in seconds when numeric, otherwise anything
+        :class:`pandas.Timedelta` accepts (``"5ms"``).
+    header:
+        Boolean mask overriding the header detection.
+
+    Returns
+    -------
+    pandas.Series
+        Timestamps aligned with ``df.index``.
+    """
+
+    times = pd.Series(pd.to_datetime(df[time_col]).to_numpy(dtype="datetime64[ns]"))
+    if header is None:
+        header = times.notna().to_numpy() & df[channel_col].isna().to_numpy()
+    header = pd.Series(np.asarray(header, dtype=bool))
+    step = pd.Timedelta(period, unit="s") if np.isscalar(period) and not isinstance(period, str) else pd.Timedelta(period)
+
+    burst = header.cumsum()
+    k = burst.groupby(burst).cumcount()
+    start = times.where(header).ffill()
+    stamps = start + k.to_numpy() * step
+    return pd.Series(stamps.to_numpy(dtype="datetime64[ns]"), index=df.index, name="time_stmp")
@@ -0,0 +1,330 @@
+"""On-disk cache for parsed tables.
+
+Every notebook starts by re-parsing the raw ``.dat``/CSV exports of the run
+(:func:`lib.cpld.read_cpld_data`, :func:`lib.cpld_io.load_cpld_file`,
+:func:`lib.beam.read_beam_data`, :func:`lib.reading.import_file`, the DMM
+readers in the analysis folders, ...).  :func:`cached_call` wraps any of these
+readers: the returned DataFrame (or tuple of DataFrames) is stored in a
+columnar file and reloaded on later calls as long as the source files and the
+parser options did not change.
+
+The cache key is built from the reader name, its arguments and the path, size
+and modification time of every source file.  Tables are written as Parquet
+(or Feather) when :mod:`pyarrow` is available and as pickles otherwise.
+Integer, float and low-cardinality string columns are stored with compact
+dtypes; the original dtypes are recorded in a JSON manifest next to the data
+and restored on load, so a cached result compares equal to a fresh parse.
+
+Examples
+--------
+>>> from lib import cached_call, read_cpld_data
+>>> pattern = '../0_raw/Campaign3/cpld/run/cpld_data_*.dat'
+>>> df, df_bad = cached_call(read_cpld_data, pattern, sources=pattern)
+>>> invalidate(sources=pattern)        # force a re-parse on the next call
+>>> evict(max_bytes=2 * 1024**3)       # keep the cache directory below 2 GiB
+"""
+from __future__ import annotations
+
+import glob
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+try:  # pragma: no cover - optional dependency
+    import pyarrow  # noqa: F401
+
+    _HAS_PYARROW = True
+except ImportError:  # pragma: no cover - exercised when pyarrow is missing
+    _HAS_PYARROW = False
+
+__all__ = [
+    "DEFAULT_CACHE_DIR",
+    "cached_call",
+    "compact_dtypes",
+    "evict",
+    "invalidate",
+]
+
+DEFAULT_CACHE_DIR = Path(
+    os.environ.get("RADX_CACHE_DIR", Path.home() / ".cache" / "radiationxlabs")
+)
+
+_SUFFIXES = {"parquet": ".parquet", "feather": ".feather", "pickle": ".pkl"}
+
+PathLike = Union[str, Path]
+
+
+def _expand_sources(sources: Union[PathLike, Iterable[PathLike]]) -> List[Path]:
+    """Resolve paths and glob patterns into a sorted list of existing files."""
+
+    if isinstance(sources, (str, Path)):
+        sources = [sources]
+    files = set()
+    for source in sources:
+        matches = glob.glob(str(source))
+        files.update(Path(match).resolve() for match in matches)
+    return sorted(files)
+
+
+def _source_stamp(files: Sequence[Path]) -> List[List[Any]]:
+    stamp = []
+    for path in files:
+        stat = path.stat()
+        stamp.append([str(path), stat.st_size, stat.st_mtime_ns])
+    return stamp
+
+
+def _digest(payload: Any) -> str:
+    text = json.dumps(payload, sort_keys=True, default=repr)
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def compact_dtypes(df: pd.DataFrame, category_ratio: float = 0.5) -> pd.DataFrame:
+    """Return a copy of ``df`` using the smallest lossless dtypes.
+
+    Integer columns are downcast to the narrowest integer type, ``float64``
+    columns become ``float32`` when every value round-trips exactly, and string
+    columns with fewer than ``category_ratio * len(df)`` distinct values are
+    converted to ``category`` (the hex words ``B0``/``B1`` of the CPLD dumps are
+    the typical case).
+
+    Examples
+    --------
+    >>> df = pd.DataFrame({'n': [1, 2, 3], 'x': [0.5, 1.0, 1.5]})
+    >>> compact_dtypes(df).dtypes.astype(str).tolist()
+    ['int8', 'float32']
+    """
+
+    out = df.copy()
+    for col in out.columns:
+        series = out[col]
+        kind = series.dtype.kind
+        if kind in "iu":
+            out[col] = pd.to_numeric(series, downcast="integer" if kind == "i" else "unsigned")
+        elif series.dtype == np.float64:
+            narrow = series.astype(np.float32)
+            same = (narrow.astype(np.float64) == series) | series.isna()
+            if same.all():
+                out[col] = narrow
+        elif kind == "O" and len(series):
+            if series.map(type).eq(str).all() and series.nunique() < category_ratio * len(series):
+                out[col] = series.astype("category")
+    return out
+
+
+def _write_frame(df: pd.DataFrame, path: Path, fmt: str) -> Dict[str, Any]:
+    """Write ``df`` compactly and return the metadata needed to restore it."""
+
+    meta: Dict[str, Any] = {"columns": [str(col) for col in df.columns], "index": None, "rows": len(df)}
+    if len(df.columns) == 0:
+        # nothing to store (e.g. an empty bad-records table)
+        return meta
+    if not df.index.equals(pd.RangeIndex(len(df))):
+        names = [name if name is not None else f"__index_{i}__" for i, name in enumerate(df.index.names)]
+        meta["index"] = names
+        df = df.rename_axis(names).reset_index()
+    meta["dtypes"] = {str(col): str(dtype) for col, dtype in df.dtypes.items()}
+    df = compact_dtypes(df)
+    df.columns = pd.Index([str(col) for col in df.columns], dtype=object)
+
+    tmp = path.with_name(path.name + ".tmp")
+    if fmt == "parquet":
+        df.to_parquet(tmp, index=False)
+    elif fmt == "feather":
+        df.to_feather(tmp)
+    else:
+        df.to_pickle(tmp)
+    os.replace(tmp, path)
+    return meta
+
+
+def _read_frame(path: Path, fmt: str, meta: Dict[str, Any]) -> pd.DataFrame:
+    if not meta["columns"]:
+        return pd.DataFrame(index=pd.RangeIndex(meta["rows"]) if meta["rows"] else None)
+    if fmt == "parquet":
+        df = pd.read_parquet(path)
+    elif fmt == "feather":
+        df = pd.read_feather(path)
+    else:
+        df = pd.read_pickle(path)
+
+    for col, dtype in meta["dtypes"].items():
+        if str(df[col].dtype) != dtype:
+            df[col] = df[col].astype(dtype)
+    if meta["index"]:
+        df = df.set_index(meta["index"])
+        df.index.names = [None if name.startswith("__index_") else name for name in meta["index"]]
+    return df
+
+
+def _manifests(cache_dir: Path) -> List[Path]:
+    return sorted(cache_dir.glob("*.json")) if cache_dir.is_dir() else []
+
+
+def _entry_files(manifest: Path) -> List[Path]:
+    return [manifest] + sorted(manifest.parent.glob(manifest.stem + "_*"))
+
+
+def _remove_entry(manifest: Path) -> None:
+    for path in _entry_files(manifest):
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def cached_call(
+    func: Callable[..., Any],
+    *args: Any,
+    sources: Union[PathLike, Iterable[PathLike]],
+    cache_dir: Optional[PathLike] = None,
+    fmt: str = "auto",
+    max_bytes: Optional[int] = None,
+    refresh: bool = False,
+    **kwargs: Any,
+) -> Any:
+    """Call ``func(*args, **kwargs)`` and cache its tabular result on disk.
+
+    Parameters
+    ----------
+    func:
+        Reader returning a DataFrame or a tuple of DataFrames.
+    *args, **kwargs:
+        Arguments forwarded to ``func``.  They are part of the cache key, so
+        changing a parser option (``replacements``, ``tz_offset_hours``, ...)
+        produces a new entry.
+    sources:
+        File, glob pattern or list of them that ``func`` reads.  Their path,
+        size and modification time are part of the cache key: editing or
+        appending to a file invalidates the cached table.
+    cache_dir:
+        Directory holding the cache.  Defaults to :data:`DEFAULT_CACHE_DIR`
+        (``$RADX_CACHE_DIR`` or ``~/.cache/radiationxlabs``).
+    fmt:
+        ``"parquet"``, ``"feather"``, ``"pickle"`` or ``"auto"`` (Parquet when
+        :mod:`pyarrow` is installed, pickle otherwise).
+    max_bytes:
+        If given, least recently used entries are evicted after storing a new
+        one until the directory is below this size.
+    refresh:
+        Ignore any cached entry and re-run ``func``.
+
+    Returns
+    -------
+    Any
+        The value returned by ``func`` (or the cached copy of it).  Side
+        effects such as the diagnostic plots of ``read_beam_data`` are skipped
+        on a cache hit.
+    """
+
+    if fmt == "auto":
+        fmt = "parquet" if _HAS_PYARROW else "pickle"
+    if fmt not in _SUFFIXES:
+        raise ValueError(f"Unknown cache format {fmt!r}")
+    if fmt in ("parquet", "feather") and not _HAS_PYARROW:
+        raise ImportError(f"The {fmt} cache format requires pyarrow")
+
+    cache_dir = Path(cache_dir) if cache_dir is not None else DEFAULT_CACHE_DIR
+    call_id = _digest([getattr(func, "__module__", ""), getattr(func, "__qualname__", repr(func)), args, kwargs])
+    files = _expand_sources(sources)
+    key = _digest([call_id, _source_stamp(files), fmt])
+    manifest = cache_dir / f"{key}.json"
+
+    if manifest.exists() and not refresh:
+        info = json.loads(manifest.read_text())
+        try:
+            parts = [
+                _read_frame(cache_dir / f"{key}_{i}{_SUFFIXES[fmt]}", fmt, meta)
+                for i, meta in enumerate(info["parts"])
+            ]
+        except (OSError, ValueError, KeyError):
+            _remove_entry(manifest)
+        else:
+            os.utime(manifest)  # LRU bookkeeping for evict()
+            return tuple(parts) if info["tuple"] else parts[0]
+
+    result = func(*args, **kwargs)
+    is_tuple = isinstance(result, tuple)
+    frames = result if is_tuple else (result,)
+    if not all(isinstance(frame, pd.DataFrame) for frame in frames):
+        return result
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    # a new stamp for the same call means the sources changed: drop stale entries
+    for other in _manifests(cache_dir):
+        if other != manifest and json.loads(other.read_text()).get("call") == call_id:
+            _remove_entry(other)
+
+    parts_meta = [
+        _write_frame(frame, cache_dir / f"{key}_{i}{_SUFFIXES[fmt]}", fmt)
+        for i, frame in enumerate(frames)
+    ]
+    info = {
+        "call": call_id,
+        "func": f"{getattr(func, '__module__', '')}.{getattr(func, '__qualname__', '')}",
+        "sources": [str(path) for path in files],
+        "format": fmt,
+        "tuple": is_tuple,
+        "parts": parts_meta,
+        "created": time.time(),
+    }
+    tmp = manifest.with_name(manifest.name + ".tmp")
+    tmp.write_text(json.dumps(info))
+    os.replace(tmp, manifest)
+
+    if max_bytes is not None:
+        evict(cache_dir, max_bytes=max_bytes)
+    return result
+
+
+def invalidate(
+    cache_dir: Optional[PathLike] = None,
+    sources: Union[PathLike, Iterable[PathLike], None] = None,
+) -> int:
+    """Delete cached entries and return how many were removed.
+
+    With ``sources=None`` the whole cache is cleared; otherwise only the
+    entries built from any of the given files (or glob patterns) are removed.
+    """
+
+    cache_dir = Path(cache_dir) if cache_dir is not None else DEFAULT_CACHE_DIR
+    targets = None if sources is None else {str(path) for path in _expand_sources(sources)}
+    removed = 0
+    for manifest in _manifests(cache_dir):
+        if targets is not None:
+            entry_sources = set(json.loads(manifest.read_text()).get("sources", []))
+            if not entry_sources & targets:
+                continue
+        _remove_entry(manifest)
+        removed += 1
+    return removed
+
+
+def evict(cache_dir: Optional[PathLike] = None, max_bytes: int = 2 * 1024**3) -> int:
+    """Remove least recently used entries until the cache fits in ``max_bytes``.
+
+    Returns the number of evicted entries.
+    """
+
+    cache_dir = Path(cache_dir) if cache_dir is not None else DEFAULT_CACHE_DIR
+    entries = []
+    for manifest in _manifests(cache_dir):
+        size = sum(path.stat().st_size for path in _entry_files(manifest) if path.exists())
+        entries.append((manifest.stat().st_mtime_ns, size, manifest))
+    entries.sort()
+
+    total = sum(size for _, size, _ in entries)
+    evicted = 0
+    for _, size, manifest in entries:
+        if total <= max_bytes:
+            break
+        _remove_entry(manifest)
+        total -= size
+        evicted += 1
+    return evicted
@@ -11,6 +11,11 @@ import pywt
 import matplotlib.dates as mdates
 from scipy.fft import rfft, rfftfreq
 
+try:
+    from .hex_decode import hex_columns_to_numeric
+except ImportError:  # imported as a flat module (tests put lib/ on sys.path)
+    from hex_decode import hex_columns_to_numeric
+
 
 def _infer_sampling_period(time_series: pd.Series) -> float:
     """Infer the sampling period (in seconds) from a time axis series."""
@@ -216,8 +221,7 @@ def analyze_frequencies(
      2) Un espectro FFT para identificar los picos de frecuencia.
     """
     df = df.copy()
-    for ch in [f'ch{x}' for x in range(8)]:
-        df[ch] = df[ch].apply(lambda x: int(str(x), 16))
+    hex_columns_to_numeric(df, [f'ch{x}' for x in range(8)])
 
     x = df[channel].values
     n = len(x)
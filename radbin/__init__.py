@@ -1,18 +1,54 @@
-from .core import (
-    to_datetime_smart,
-    compute_scaled_time_clipped,
-    extract_event_times,
-    detect_resets,
-    build_bins_reset_locked,
-    build_bins_equal_fluence,
-    build_bins_equal_count,
-    recommend_k_multiple,
-    BinStat,
-    garwood_rate_ci,
-    summarize_bins,
-    build_and_summarize,
-    inspect_scaled_time,
-    check_real_output,
-    conservation_checks,
-)
-from .glm import poisson_trend_test, poisson_trend_test_plus
+"""Poisson binning of radiation-test failures against beam fluence.
+
+The exports below are resolved on first access (PEP 562 ``__getattr__``), so
+``import radbin`` stays cheap and :mod:`statsmodels` (``radbin.glm``) is only
+imported when a trend test is actually used.
+"""
+from importlib import import_module
+
+_EXPORTS = {
+    "to_datetime_smart": "core",
+    "compute_scaled_time_clipped": "core",
+    "set_scaled_time_cache_budget": "core",
+    "clear_scaled_time_cache": "core",
+    "extract_event_times": "core",
+    "detect_resets": "core",
+    "build_bins_reset_locked": "core",
+    "build_bins_equal_fluence": "core",
+    "build_bins_equal_count": "core",
+    "recommend_k_multiple": "core",
+    "BinStat": "core",
+    "garwood_ci": "core",
+    "garwood_rate_ci": "core",
+    "merge_bins": "core",
+    "summarize_bins": "core",
+    "build_and_summarize": "core",
+    "PreparedInputs": "core",
+    "prepare_inputs": "core",
+    "summarize_prepared": "core",
+    "inspect_scaled_time": "core",
+    "check_real_output": "core",
+    "conservation_checks": "core",
+    "poisson_trend_test": "glm",
+    "poisson_trend_test_plus": "glm",
+    "IncrementalSummarizer": "online",
+    "config_grid": "sweep",
+    "sweep_binning": "sweep",
+}
+
+__all__ = list(_EXPORTS)
+_SUBMODULES = set(_EXPORTS.values()) | {"bench", "plots", "synth"}
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        return import_module(f".{name}", __name__)
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(f".{_EXPORTS[name]}", __name__), name)
+    globals()[name] = value  # later lookups skip __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,42 @@
+import time
+import numpy as np, pandas as pd
+from .core import extract_event_times, _extract_event_times_loop
+
+def _synth_cumulative(n_rows=200_000, mean_increment=2.0, step_s=0.02, seed=0):
+    """Cumulative fail counter sampled every ``step_s`` seconds (CPLD-like rate)."""
+    rng = np.random.default_rng(seed)
+    t = pd.Timestamp("2025-01-01 09:00:00") + pd.to_timedelta(np.arange(n_rows) * step_s, unit="s")
+    inc = rng.poisson(mean_increment, size=n_rows)
+    return pd.DataFrame({"time": t, "failsP_acum": np.cumsum(inc)})
+
+def _best_of(fn, repeat):
+    best, out = np.inf, None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+def bench_extract_event_times(n_rows=200_000, mean_increment=2.0, min_separation=0.05,
+                              repeat=3, seed=0):
+    """
+    Time the NumPy ``extract_event_times`` against the original loop on the
+    same synthetic counter, checking both return the same series.
+    Returns one row per implementation: impl, seconds (best of ``repeat``), n_events.
+    """
+    fails = _synth_cumulative(n_rows, mean_increment, seed=seed)
+    rows = []
+    results = {}
+    for name, fn in (("loop", _extract_event_times_loop), ("numpy", extract_event_times)):
+        seconds, out = _best_of(lambda: fn(fails, min_separation=min_separation), repeat)
+        results[name] = out
+        rows.append({"impl": name, "seconds": seconds, "n_events": len(out)})
+    pd.testing.assert_series_equal(results["numpy"], results["loop"])
+    df = pd.DataFrame(rows)
+    df["speedup"] = df["seconds"].iloc[0] / df["seconds"]
+    return df
+
+if __name__ == "__main__":
+    for sep in (0.0, 0.05):
+        print(f"min_separation={sep}")
+        print(bench_extract_event_times(min_separation=sep).to_string(index=False))
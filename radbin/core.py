@@ -1,7 +1,10 @@
 from __future__ import annotations
+import hashlib
 import math
+import time
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import List, Optional, Tuple, Literal
+from typing import List, NamedTuple, Optional, Tuple, Literal
 import numpy as np
 import pandas as pd
 from scipy.stats import chi2
@@ -55,6 +58,70 @@ def to_datetime_smart(series: pd.Series) -> pd.Series:
 # -----------------------------
 from typing import Literal
 
+def _scaled_increments(
+    dt: np.ndarray,
+    phi: np.ndarray,
+    bon: np.ndarray,
+    phi_ref: float,
+    phi_floor: float,
+    mode: str,
+    rmax: float,
+    freeze_off: bool,
+    before_first_on: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    dt_eq y scale_ratio fila a fila, dados phi_ref y el piso ya fijados.
+    Compartido por compute_scaled_time_clipped y el resumen incremental
+    (radbin.online), que procesa el haz por lotes.
+    """
+    # Versión "efectiva" para trabajar: NaN -> 0 y piso de flujo
+    phi_clip = np.maximum(np.where(np.isnan(phi), 0.0, phi), phi_floor)
+    on = bon == 1
+
+    if mode == "ref_time":
+        # Ratio ref/eff (cap a rmax); anula contribuciones según flags
+        # OJO: para el ratio usamos el phi "no-zeroed" para evitar inf; luego aplicamos mascaras
+        ratio = np.where(phi_clip > 0,
+                         (phi_ref / phi_clip) if np.isfinite(phi_ref) else 1.0,
+                         rmax)
+        ratio = np.clip(ratio, 0.0, rmax)
+        if freeze_off:
+            ratio = np.where(on, ratio, 0.0)
+        ratio = np.where(before_first_on, 0.0, ratio)
+        dt_eq = dt * ratio
+
+    elif mode == "fluence":
+        # Exposición de fluencia: dPhi = phi_eff * dt
+        phi_eff = phi_clip
+        # Congelar cuando beam_off (si se pide)
+        if freeze_off:
+            phi_eff = np.where(on, phi_eff, 0.0)
+        phi_eff = np.where(before_first_on, 0.0, phi_eff)
+        dt_eq = dt * phi_eff
+
+    else:
+        raise ValueError('mode must be "ref_time" or "fluence"')
+
+    scale_ratio = np.where(dt > 0, dt_eq / np.where(dt > 0, dt, 1.0), np.nan)  # ≡ ratio / phi_eff
+    return dt_eq, scale_ratio
+
+def _phi_reference(phi: pd.Series, bon: pd.Series, ref: str) -> float:
+    """phi_ref sobre muestras con beam_on==1 (NaN si no hay)."""
+    phi_on = phi[bon == 1].dropna()
+    if len(phi_on) == 0:
+        return np.nan
+    if ref == "median":
+        return float(np.median(phi_on))
+    elif ref == "mean":
+        return float(np.mean(phi_on))
+    return float(np.max(phi_on))
+
+def _phi_floor(phi_ref: float, floor_strategy: str, min_frac: float) -> float:
+    """Piso de flujo (evita ruido y divisiones por ~0)."""
+    if floor_strategy == "adaptive" and np.isfinite(phi_ref):
+        return max(min_frac * phi_ref, 1e-12)
+    return max(min_frac, 1e-12)
+
 def compute_scaled_time_clipped(
     beam_df: pd.DataFrame,
     time_col: str = "time",
@@ -95,7 +162,178 @@ def compute_scaled_time_clipped(
       - floor_strategy="adaptive": piso = max(min_frac * phi_ref, 1e-12)
         (para evitar divisiones por ~0 en "ref_time" y ruido en "fluence")
       - floor_strategy="fixed": piso = max(min_frac, 1e-12)
+
+    El resultado se memoiza (ver ``_scaled_time_arrays``): llamadas repetidas
+    sobre el mismo haz solo pagan la copia de beam_df con las columnas nuevas.
     """
+    st = _scaled_time_arrays(
+        beam_df, time_col=time_col, dt_col=dt_col, flux_col=flux_col, beam_on_col=beam_on_col,
+        ref=ref, floor_strategy=floor_strategy, min_frac=min_frac, rmax=rmax,
+        freeze_off=freeze_off, start_at_first_on=start_at_first_on, mode=mode,
+    )
+    out = beam_df.take(st.order).reset_index(drop=True)
+    out[time_col] = st.time
+    if st.dt_filled:
+        out[dt_col] = st.dt
+    # __setitem__ copia los arrays: el DataFrame no comparte memoria con el caché
+    out["dt"] = st.dt
+    out["dt_eq"] = st.dt_eq
+    out["t_eq"] = st.t_eq
+    out["scale_ratio"] = st.scale_ratio
+    return out
+
+class ScaledTime(NamedTuple):
+    """
+    Columnas nuevas de compute_scaled_time_clipped, sin copiar beam_df.
+    Las filas siguen el orden temporal: la fila i es beam_df.iloc[order[i]].
+    Los arrays vienen del caché y son de solo lectura.
+    """
+    order: np.ndarray        # posiciones en beam_df
+    time: pd.api.extensions.ExtensionArray  # tiempo parseado (to_datetime_smart), ordenado
+    dt: np.ndarray
+    dt_eq: np.ndarray
+    t_eq: np.ndarray
+    scale_ratio: np.ndarray
+    dt_filled: bool          # dt reconstruido desde time (dt_col ausente o todo NaN)
+
+    @property
+    def nbytes(self) -> int:
+        return int(sum(a.nbytes for a in (self.order, self.time, self.dt, self.dt_eq, self.t_eq, self.scale_ratio)))
+
+# LRU de _scaled_time_arrays: (huella de las columnas usadas, parámetros) -> ScaledTime,
+# acotado por memoria (no por número de entradas: cada una pesa ~40 B por fila)
+_SCALED_TIME_CACHE: "OrderedDict[tuple, ScaledTime]" = OrderedDict()
+_SCALED_TIME_CACHE_BYTES = 256 * 2**20
+
+def set_scaled_time_cache_budget(max_bytes: int) -> int:
+    """
+    Memory budget (bytes) of the compute_scaled_time_clipped cache; 0 disables it.
+    Evicts least-recently-used entries to fit and returns the previous budget.
+    """
+    global _SCALED_TIME_CACHE_BYTES
+    previous, _SCALED_TIME_CACHE_BYTES = _SCALED_TIME_CACHE_BYTES, max(int(max_bytes), 0)
+    _trim_scaled_time_cache()
+    return previous
+
+def clear_scaled_time_cache() -> None:
+    _SCALED_TIME_CACHE.clear()
+
+def _trim_scaled_time_cache() -> None:
+    used = sum(v.nbytes for v in _SCALED_TIME_CACHE.values())
+    while _SCALED_TIME_CACHE and used > _SCALED_TIME_CACHE_BYTES:
+        _, old = _SCALED_TIME_CACHE.popitem(last=False)
+        used -= old.nbytes
+
+def _column_digest(df: pd.DataFrame, col: str) -> Optional[bytes]:
+    """
+    Huella del contenido de una columna (None si no existe).  Columnas numéricas
+    y datetime64 se hashean directo sobre su buffer; el resto (strings, tz, ...)
+    vía pd.util.hash_pandas_object.  El índice no participa: no cambia el resultado.
+    """
+    if col not in df.columns:
+        return None
+    s = df[col]
+    h = hashlib.blake2b(str(s.dtype).encode(), digest_size=16)
+    if isinstance(s.dtype, np.dtype) and s.dtype.kind in "biufcmM":
+        h.update(np.ascontiguousarray(s.to_numpy()).view(np.uint8))
+    else:
+        h.update(pd.util.hash_pandas_object(s, index=False, categorize=False).to_numpy())
+    return h.digest()
+
+def _scaled_time_arrays(
+    beam_df: pd.DataFrame,
+    time_col: str = "time",
+    dt_col: str = "dt",
+    flux_col: str = "dHEH",
+    beam_on_col: str = "beam_on",
+    ref: str = "median",
+    floor_strategy: str = "adaptive",
+    min_frac: float = 0.05,
+    rmax: float = 1e4,
+    freeze_off: bool = True,
+    start_at_first_on: bool = True,
+    mode: str = "fluence",
+) -> ScaledTime:
+    """
+    Núcleo de compute_scaled_time_clipped (mismos parámetros y valores) sin
+    copiar ni reordenar beam_df.  Memoizado en un LRU con presupuesto de
+    memoria (set_scaled_time_cache_budget), con clave = huella de las columnas
+    time/dt/flux/beam_on + parámetros, así que plots, synth y build_and_summarize
+    sobre el mismo haz parsean y ordenan el tiempo una sola vez.
+    """
+    params = (time_col, dt_col, flux_col, beam_on_col, ref, floor_strategy,
+              float(min_frac), float(rmax), bool(freeze_off), bool(start_at_first_on), mode)
+    key = None
+    if _SCALED_TIME_CACHE_BYTES > 0:
+        cols = (time_col, dt_col, flux_col, beam_on_col)
+        key = (len(beam_df), tuple(_column_digest(beam_df, c) for c in cols), params)
+        hit = _SCALED_TIME_CACHE.get(key)
+        if hit is not None:
+            _SCALED_TIME_CACHE.move_to_end(key)
+            return hit
+
+    t = to_datetime_smart(beam_df[time_col]).reset_index(drop=True)
+    # mismo orden que df.sort_values(time_col) (quicksort, NaT al final)
+    order = t.sort_values().index.to_numpy()
+    t = t.take(order).reset_index(drop=True)
+    n = len(t)
+
+    # Asegurar dt
+    dt_filled = dt_col not in beam_df.columns or beam_df[dt_col].isna().all()
+    if dt_filled:
+        dt = t.diff().dt.total_seconds().fillna(0).astype("float64").to_numpy()
+    else:
+        dt = pd.to_numeric(beam_df[dt_col], errors="coerce").fillna(0).astype("float64").to_numpy()[order]
+
+    # Flujo (fluencia/s) y beam_on, en orden temporal
+    if flux_col in beam_df.columns:
+        phi = pd.to_numeric(beam_df[flux_col], errors="coerce").to_numpy(dtype=float)[order]
+    else:
+        phi = np.full(n, np.nan)
+    if beam_on_col in beam_df.columns:
+        bon = pd.to_numeric(beam_df[beam_on_col], errors="coerce").fillna(0).astype(int).to_numpy()[order]
+    else:
+        bon = np.zeros(n, dtype=int)
+
+    phi_ref = _phi_reference(pd.Series(phi), pd.Series(bon), ref)
+    phi_floor = _phi_floor(phi_ref, floor_strategy, min_frac)
+
+    # Cero antes del primer beam_on (si se pide)
+    on = bon == 1
+    if start_at_first_on and on.any():
+        mask_before = np.arange(n) < int(np.argmax(on))
+    else:
+        mask_before = np.zeros(n, dtype=bool)
+
+    dt_eq, scale_ratio = _scaled_increments(
+        dt, phi, bon, phi_ref, phi_floor,
+        mode=mode, rmax=rmax, freeze_off=freeze_off, before_first_on=mask_before,
+    )
+    t_eq = np.cumsum(dt_eq)
+
+    for a in (order, dt, dt_eq, t_eq, scale_ratio):
+        a.setflags(write=False)
+    st = ScaledTime(order, t.array, dt, dt_eq, t_eq, scale_ratio, dt_filled)
+    if key is not None and st.nbytes <= _SCALED_TIME_CACHE_BYTES:
+        _SCALED_TIME_CACHE[key] = st
+        _trim_scaled_time_cache()
+    return st
+
+def _compute_scaled_time_clipped_copying(
+    beam_df: pd.DataFrame,
+    time_col: str = "time",
+    dt_col: str = "dt",
+    flux_col: str = "dHEH",
+    beam_on_col: str = "beam_on",
+    ref: Literal["median","mean","max"] = "median",
+    floor_strategy: Literal["adaptive","fixed"] = "adaptive",
+    min_frac: float = 0.05,
+    rmax: float = 1e4,
+    freeze_off: bool = True,
+    start_at_first_on: bool = True,
+    mode: Literal["ref_time", "fluence"] = "fluence",
+) -> pd.DataFrame:
+    """Versión original (sin caché, dos copias de beam_df); referencia para los tests."""
     df = beam_df.copy()
     df[time_col] = to_datetime_smart(df[time_col])
     df = df.sort_values(time_col).reset_index(drop=True)
@@ -114,64 +352,21 @@ def compute_scaled_time_clipped(
     bon = pd.to_numeric(df.get(beam_on_col, pd.Series(0, index=df.index)), errors="coerce").fillna(0).astype(int)
 
     # ---- phi_ref (sobre beam ON) --- valor de referencia
-    phi_on = phi[bon == 1].dropna()
-    if len(phi_on) == 0:
-        phi_ref = np.nan
-    else:
-        if ref == "median":
-            phi_ref = float(np.median(phi_on))
-        elif ref == "mean":
-            phi_ref = float(np.mean(phi_on))
-        else:
-            phi_ref = float(np.max(phi_on))
-
-    # Piso de flujo (evita ruido y divisiones por ~0)
-    if floor_strategy == "adaptive" and np.isfinite(phi_ref):
-        phi_floor = max(min_frac * phi_ref, 1e-12)
-    else:
-        phi_floor = max(min_frac, 1e-12)
-
-    # Versión "efectiva" para trabajar
-    # Primero se elige phi que vendrá a ser df[flux_col]
-    phi_eff = pd.to_numeric(phi, errors="coerce").fillna(0.0).clip(lower=phi_floor)
-
-    # Congelar cuando beam_off (si se pide)
-    if freeze_off:
-        phi_eff = phi_eff.where(bon == 1, 0.0)
+    phi_ref = _phi_reference(phi, bon, ref)
+    phi_floor = _phi_floor(phi_ref, floor_strategy, min_frac)
 
     # Cero antes del primer beam_on (si se pide)
     if start_at_first_on and (bon == 1).any():
         first_on_idx = int(np.argmax((bon == 1).to_numpy()))
         mask_before = np.arange(len(df)) < first_on_idx
-        phi_eff = phi_eff.mask(mask_before, 0.0)
-
-    if mode == "ref_time":
-        # Ratio ref/eff (cap a rmax); anula contribuciones según flags
-        # OJO: para el ratio usamos el phi_eff "no-zeroed" para evitar inf; luego aplicamos mascaras
-        phi_for_ratio = pd.to_numeric(phi, errors="coerce").fillna(0.0).clip(lower=phi_floor)
-        ratio = np.where(phi_for_ratio > 0,
-                         (phi_ref / phi_for_ratio) if np.isfinite(phi_ref) else 1.0,
-                         rmax)
-        ratio = np.clip(ratio, 0.0, rmax)
-        if freeze_off:
-            ratio = np.where(bon == 1, ratio, 0.0)
-        if start_at_first_on and (bon == 1).any():
-            ratio = np.where(mask_before, 0.0, ratio)
-
-        dt_eq = dt * ratio
-        t_eq  = np.cumsum(dt_eq)
-        scale_ratio = np.where(dt > 0, dt_eq / dt, np.nan)  # ≡ ratio
-
-    elif mode == "fluence":
-        # Exposición de fluencia: dPhi = phi_eff * dt; Phi acumulada
-        dPhi = dt * phi_eff.to_numpy(dtype=float)
-        Phi  = np.cumsum(dPhi)
-        dt_eq = dPhi
-        t_eq  = Phi
-        scale_ratio = np.where(dt > 0, dt_eq / dt, np.nan)  # ≡ phi_eff
-
     else:
-        raise ValueError('mode must be "ref_time" or "fluence"')
+        mask_before = np.zeros(len(df), dtype=bool)
+
+    dt_eq, scale_ratio = _scaled_increments(
+        dt.to_numpy(), phi.to_numpy(dtype=float), bon.to_numpy(), phi_ref, phi_floor,
+        mode=mode, rmax=rmax, freeze_off=freeze_off, before_first_on=mask_before,
+    )
+    t_eq = np.cumsum(dt_eq)
 
     out = df.copy()
     out["dt"] = dt
@@ -181,6 +376,7 @@ def compute_scaled_time_clipped(
     return out
 
 
+
 # -----------------------------
 # Event extraction (from cumulative)
 # -----------------------------
@@ -194,7 +390,57 @@ def extract_event_times(
     From monotonically non-decreasing cumulative counter, emit one timestamp per increment.
     If negatives occur (resets), they are clipped to 0 increments.
     Optionally collapse events closer than ``min_separation`` seconds.
+
+    Expansion is a ``np.repeat`` over the datetime64[ns] array and the thinning
+    runs on int64 nanoseconds (see ``_thin_sorted_ns``); the result is the same
+    series as the original per-row loop kept in ``_extract_event_times_loop``.
     """
+    t = to_datetime_smart(fails_df[time_col])
+    c = pd.to_numeric(fails_df[cum_col], errors="coerce").ffill().fillna(0).astype("int64")
+    c_np = c.to_numpy()
+    dc = np.diff(c_np, prepend=c_np[:1])
+    dc[:1] = c_np[:1]
+    # Expand timestamps by counts
+    ts = np.repeat(t.to_numpy(dtype="datetime64[ns]"), np.clip(dc, 0, None))
+    if min_separation > 0 and len(ts) > 1:
+        gap = pd.to_timedelta(float(min_separation), unit="s").value
+        ts = _thin_sorted_ns(np.sort(ts.view("int64")), gap).view("datetime64[ns]")
+    return pd.Series(ts, name="event_time", dtype="datetime64[ns]")
+
+def _thin_sorted_ns(ns: np.ndarray, gap: int) -> np.ndarray:
+    """
+    Greedy thinning of sorted int64 timestamps: keep the first one and then
+    every timestamp at least ``gap`` ns after the last kept one.  Each step
+    jumps with ``np.searchsorted``, so the loop runs once per *kept* event.
+    NaT (int64 min after sorting) never satisfies the gap, as with pandas.
+    """
+    nat = np.iinfo(np.int64).min
+    first_valid = int(np.searchsorted(ns, nat, side="right"))
+    if first_valid == len(ns):
+        # only NaT: pandas keeps the first element and drops the rest
+        return ns[:1]
+    # pandas sorts NaT last, so the first kept element is the first valid one
+    valid = ns[first_valid:]
+    if len(valid) == 1 or np.diff(valid).min() >= gap:
+        return valid
+    if gap > valid[-1] - valid[0]:
+        return valid[:1]  # also keeps valid[i] + gap from overflowing
+    keep = [0]
+    i = 0
+    while True:
+        i = int(np.searchsorted(valid, valid[i] + gap, side="left"))
+        if i >= len(valid):
+            break
+        keep.append(i)
+    return valid[keep]
+
+def _extract_event_times_loop(
+    fails_df: pd.DataFrame,
+    time_col: str = "time",
+    cum_col: str  = "failsP_acum",
+    min_separation: float = 0.0,
+) -> pd.Series:
+    """Original per-row implementation of :func:`extract_event_times` (reference/benchmarks)."""
     f = fails_df.copy()
     t = to_datetime_smart(f[time_col])
     c = pd.to_numeric(f[cum_col], errors="coerce").ffill().fillna(0).astype("int64")
@@ -230,6 +476,75 @@ def detect_resets(
     aux_cols = ("lfsrTMR",),
     min_gap_s: float = 30.0,
     lfsr_cluster_rate_hz: float = 50.0,
+) -> pd.DatetimeIndex:
+    """
+    Detect reset boundaries using:
+      - drops in cumulative counter
+      - zero after positive
+      - edges/toggles in auxiliary flag columns (e.g., lfsrTMR)
+    Cluster events closer than min_gap_s.
+    Returns sorted DatetimeIndex of boundary timestamps.
+
+    Candidates and both greedy clusterings (min_gap_s, then the lfsr chatter
+    gap 1/lfsr_cluster_rate_hz) run on int64 nanoseconds (``_thin_sorted_ns``),
+    so a lfsrTMR column toggling at ~50 Hz never becomes Timestamp objects.
+    Same boundaries as the original per-Timestamp loop, ``_detect_resets_loop``.
+    """
+    raw = fails_df[time_col].reset_index(drop=True)
+    order = raw.sort_values().index.to_numpy()  # same row order as f.sort_values(time_col)
+    t = pd.DatetimeIndex(to_datetime_smart(raw.take(order)))
+    ns = t.as_unit("ns").asi8
+
+    c = pd.to_numeric(fails_df[cum_col], errors="coerce").reset_index(drop=True).take(order)
+    c = c.ffill().fillna(0).to_numpy(dtype=float)
+    prev = np.concatenate([[0.0], c[:-1]])
+    # counter drops or zeros after positive (never the first row)
+    drops = (c < prev) | ((c == 0) & (prev > 0))
+    drops[:1] = False
+    cand = [ns[drops]]
+
+    # auxiliary edges (the first row always counts as one)
+    for col in aux_cols:
+        if col in fails_df.columns:
+            a = pd.to_numeric(fails_df[col], errors="coerce").reset_index(drop=True).take(order)
+            a = a.ffill().fillna(0).to_numpy(dtype=float)
+            edges = np.ones(len(a), dtype=bool)
+            edges[1:] = a[1:] != a[:-1]
+            cand.append(ns[edges])
+
+    cand = np.sort(np.concatenate(cand))
+    cand = cand[cand != np.iinfo(np.int64).min]  # NaT
+    if len(cand):
+        cand = _thin_sorted_ns(cand, _min_gap_ns(min_gap_s))
+        # Optional: thin very fast chatter by lfsr rate (~50 Hz => 0.02 s)
+        cand = _thin_sorted_ns(cand, _min_gap_ns(1.0 / max(lfsr_cluster_rate_hz, 1e-6)))
+    out = pd.DatetimeIndex(cand.view("datetime64[ns]"))
+    return out.tz_localize("UTC").tz_convert(t.tz) if t.tz is not None else out
+
+def _min_gap_ns(seconds: float) -> int:
+    """
+    Smallest gap d (ns) with Timedelta(d).total_seconds() >= seconds, the test
+    of the original clustering loop.  total_seconds() truncates to whole
+    microseconds, so the threshold is a multiple of 1000 ns.
+    """
+    if not seconds > 0:
+        return 0 if seconds <= 0 else np.iinfo(np.int64).max  # NaN never passes
+    if not np.isfinite(seconds):
+        return np.iinfo(np.int64).max
+    us = math.ceil(seconds * 1e6)
+    while us > 0 and (us - 1) / 1e6 >= seconds:
+        us -= 1
+    while us / 1e6 < seconds:
+        us += 1
+    return min(us * 1000, np.iinfo(np.int64).max)
+
+def _detect_resets_loop(
+    fails_df: pd.DataFrame,
+    time_col: str = "time",
+    cum_col: str  = "failsP_acum",
+    aux_cols = ("lfsrTMR",),
+    min_gap_s: float = 30.0,
+    lfsr_cluster_rate_hz: float = 50.0,
 ) -> List[pd.Timestamp]:
     """
     Detect reset boundaries using:
@@ -238,6 +553,8 @@ def detect_resets(
       - edges/toggles in auxiliary flag columns (e.g., lfsrTMR)
     Cluster events closer than min_gap_s.
     Returns sorted list of boundary timestamps.
+
+    Original Timestamp-list version of ``detect_resets``; reference for the tests.
     """
     f = fails_df.copy().sort_values(time_col)
     t = to_datetime_smart(f[time_col])
@@ -284,7 +601,7 @@ def build_bins_reset_locked(reset_bounds: List[pd.Timestamp], k_multiple: int =
     Build bin edges that align to every k-th reset boundary.
     Assumes reset_bounds is sorted. Returns list of edges (timestamps).
     """
-    if not reset_bounds:
+    if not len(reset_bounds):
         return []
     resets = sorted(pd.to_datetime(pd.Series(reset_bounds)).dropna().tolist())
     edges = [resets[0]]
@@ -310,7 +627,7 @@ def recommend_k_multiple(
     number of events on median.
     """
     resets = detect_resets(fails_df, time_col=time_col, cum_col=cum_col)
-    if not resets:
+    if not len(resets):
         return 1
     edges = build_bins_reset_locked(resets, k_multiple=1)
     if len(edges) < 2:
@@ -388,19 +705,81 @@ class BinStat:
     lo: float
     hi: float
 
+# Poisson-mean quantiles per (alpha, N), least recently used dropped first.
+# Re-binning the same run asks for the same small integer counts over and over.
+_GARWOOD_CACHE: "OrderedDict[Tuple[float, int], Tuple[float, float]]" = OrderedDict()
+_GARWOOD_CACHE_SIZE = 65536
+
+def _garwood_mu(N: np.ndarray, alpha: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Garwood bounds on the Poisson mean for integer counts N >= 0 (lower = 0 at N=0).
+    Cached counts are looked up; the missing ones go through a single
+    vectorized ``chi2.ppf`` call and are added to the bounded cache.
+    """
+    uniq, inv = np.unique(N, return_inverse=True)
+    lower = np.empty(len(uniq))
+    upper = np.empty(len(uniq))
+    missing = []
+    for i, n in enumerate(uniq.tolist()):
+        hit = _GARWOOD_CACHE.get((alpha, n))
+        if hit is None:
+            missing.append(i)
+        else:
+            _GARWOOD_CACHE.move_to_end((alpha, n))
+            lower[i], upper[i] = hit
+    if missing:
+        miss = np.asarray(missing)
+        n = uniq[miss]
+        lo = np.zeros(len(n))
+        pos = n > 0
+        lo[pos] = 0.5 * chi2.ppf(alpha / 2.0, 2 * n[pos])
+        hi = 0.5 * chi2.ppf(1.0 - alpha / 2.0, 2 * (n + 1))
+        lower[miss], upper[miss] = lo, hi
+        for key, bounds in zip(n.tolist(), zip(lo.tolist(), hi.tolist())):
+            _GARWOOD_CACHE[(alpha, key)] = bounds
+        while len(_GARWOOD_CACHE) > _GARWOOD_CACHE_SIZE:
+            _GARWOOD_CACHE.popitem(last=False)
+    return lower[inv], upper[inv]
+
+def garwood_ci(N, T, alpha: float = 0.32) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Exact Poisson (Garwood) CI on the rates λ = μ/T for arrays of counts and exposures.
+    Negative counts are treated as 0 and bins with T <= 0 get (nan, nan).
+    Quantiles for integer counts are memoized (see ``_garwood_mu``); non-integer
+    counts are evaluated directly.
+    """
+    eps = 1e-12
+    N, T = np.broadcast_arrays(np.asarray(N, dtype=float), np.asarray(T, dtype=float))
+    N = np.maximum(N, 0.0)
+    integral = np.isfinite(N) & (N == np.floor(N))
+    lower = np.full(N.shape, np.nan)
+    upper = np.full(N.shape, np.nan)
+    if integral.any():
+        lower[integral], upper[integral] = _garwood_mu(N[integral].astype(np.int64), alpha)
+    other = ~integral & np.isfinite(N)
+    if other.any():
+        n = N[other]
+        lower[other] = np.where(n == 0, 0.0, 0.5 * chi2.ppf(alpha / 2.0, 2 * n))
+        upper[other] = 0.5 * chi2.ppf(1.0 - alpha / 2.0, 2 * (n + 1))
+    scale = np.maximum(T, eps)
+    ok = T > 0
+    return np.where(ok, lower / scale, np.nan), np.where(ok, upper / scale, np.nan)
+
 def garwood_rate_ci(N: int, T: float, alpha: float = 0.32) -> Tuple[float, float]:
     """
     Exact Poisson (Garwood) CI on the rate λ = μ/T with μ ~ Poisson.
-    When N=0, lower=0.
+    When N=0, lower=0.  Scalar front end of :func:`garwood_ci`.
     """
-    eps = 1e-12
     if T <= 0:
         return (np.nan, np.nan)
-    if N < 0:
-        N = 0
-    lower_mu = 0.0 if N == 0 else 0.5 * chi2.ppf(alpha / 2.0, 2 * N)
-    upper_mu = 0.5 * chi2.ppf(1.0 - alpha / 2.0, 2 * (N + 1))
-    return (lower_mu / max(T, eps), upper_mu / max(T, eps))
+    N = max(N, 0)
+    hit = _GARWOOD_CACHE.get((alpha, N)) if float(N).is_integer() else None
+    if hit is None:
+        lo, hi = garwood_ci(N, T, alpha=alpha)
+        return (float(lo), float(hi))
+    _GARWOOD_CACHE.move_to_end((alpha, N))  # same bookkeeping as _garwood_mu
+    scale = max(T, 1e-12)
+    return (hit[0] / scale, hit[1] / scale)
 
 # -----------------------------
 # Summarize and orchestrate
@@ -424,6 +803,27 @@ def _sum_time_in_interval(df_timebase: pd.DataFrame, a: pd.Timestamp, b: pd.Time
         times = [a] + times + [b]
         return float((times[-1] - times[0]).total_seconds())
 
+def _as_ns(values) -> np.ndarray:
+    """Timestamps as int64 nanoseconds (NaT -> iNaT), for searchsorted."""
+    return pd.DatetimeIndex(pd.to_datetime(values)).asi8
+
+def _segment_sums(values: np.ndarray, starts: np.ndarray, stops: np.ndarray) -> np.ndarray:
+    """
+    Sum values[starts[i]:stops[i]] for every i in one pass (starts/stops non-decreasing).
+    Uses np.add.reduceat over the segments instead of differences of a global
+    cumsum, so long runs do not lose precision on short bins.
+    """
+    out = np.zeros(len(starts), dtype="float64")
+    nonempty = stops > starts
+    if not nonempty.any() or len(values) == 0:
+        return out
+    padded = np.append(values, 0.0)
+    idx = np.empty(2 * int(nonempty.sum()), dtype=np.intp)
+    idx[0::2] = starts[nonempty]
+    idx[1::2] = stops[nonempty]
+    out[nonempty] = np.add.reduceat(padded, idx)[0::2]
+    return out
+
 def summarize_bins(
     event_times: pd.Series,
     bin_edges: List[pd.Timestamp],
@@ -432,6 +832,13 @@ def summarize_bins(
     T_source: Literal["beam","wall"] = "beam",
     alpha: float = 0.32
 ) -> List[BinStat]:
+    """
+    Count events (N) and exposure (T) per [a, b) bin and attach Garwood CIs.
+
+    Events and timebase rows are located in the sorted edges with
+    ``np.searchsorted``; exposure per bin is a segment sum of ``dt_eq``.
+    Cost is O((n_events + n_rows) log n_bins) instead of one full scan per bin.
+    """
     et = pd.to_datetime(pd.Series(event_times).dropna()).sort_values().reset_index(drop=True)
     if len(bin_edges) < 2:
         return []
@@ -447,24 +854,37 @@ def summarize_bins(
     if edges[-1] < tmax:
         edges = edges + [tmax]
 
-    # Event times ndarray for quick counting
-    et_np = et.to_numpy(dtype="datetime64[ns]")
+    edges_ns = _as_ns(edges)
+    # Events per bin: [a, b) ↔ searchsorted(..., "left") on both edges
+    et_ns = _as_ns(et)
+    cum_events = np.searchsorted(et_ns, edges_ns, side="left")
+    N_all = np.diff(cum_events)
+
+    # Exposure per bin (µs resolution, like Timedelta.total_seconds())
+    width_s = (np.diff(edges_ns) // 1000) / 1e6
+    if T_source == "beam" and timebase_df is not None and use_scaled_time:
+        tb_ns = _as_ns(timebase_df["time"])
+        dt_eq = pd.to_numeric(timebase_df["dt_eq"], errors="coerce").fillna(0).to_numpy(dtype="float64")
+        keep = tb_ns != np.iinfo(np.int64).min  # NaT never falls inside a bin
+        order = np.argsort(tb_ns[keep], kind="stable")
+        tb_ns, dt_eq = tb_ns[keep][order], dt_eq[keep][order]
+        pos = np.searchsorted(tb_ns, edges_ns, side="left")
+        T_all = _segment_sums(dt_eq, pos[:-1], pos[1:])
+    else:
+        # wall-clock seconds; with a timebase this is also b - a (gaps included)
+        T_all = np.maximum(width_s, 0.0)
+
+    keep = np.flatnonzero(edges_ns[1:] > edges_ns[:-1])
+    lo_all, hi_all = garwood_ci(N_all[keep], T_all[keep], alpha=alpha)
     stats: List[BinStat] = []
-    for i in range(len(edges)-1):
-        a, b = edges[i], edges[i+1]
-        if a >= b:
-            continue
-        N = _count_events_in_interval(et_np, np.datetime64(a), np.datetime64(b))
-        if T_source == "beam" and timebase_df is not None:
-            T = _sum_time_in_interval(timebase_df, a, b, use_scaled=use_scaled_time)
-        else:
-            T = max(0.0, (b - a).total_seconds())
+    for i, lo, hi in zip(keep, lo_all.tolist(), hi_all.tolist()):
+        N, T = int(N_all[i]), float(T_all[i])
         rate = (N / T) if T > 0 else np.nan
-        lo, hi = garwood_rate_ci(N, T, alpha=alpha)
-        stats.append(BinStat(a, b, int(N), float(T), float(rate), float(lo), float(hi)))
+        stats.append(BinStat(edges[i], edges[i + 1], N, T, float(rate), lo, hi))
     return stats
 
 def _merge_bins_until(stats: List[BinStat], min_events: int) -> List[BinStat]:
+    """Original BinStat-by-BinStat merge on min events (reference for tests, see merge_bins)."""
     if min_events is None or min_events <= 0:
         return stats
     merged: List[BinStat] = []
@@ -490,6 +910,148 @@ def _merge_bins_until(stats: List[BinStat], min_events: int) -> List[BinStat]:
     # Users can rebin with different params if needed.
     return merged
 
+def _merge_bins_by_exposure_loop(stats: List[BinStat], min_exposure: float, alpha: float) -> List[BinStat]:
+    """Original min-exposure merge of build_and_summarize (reference for tests, see merge_bins)."""
+    merged: List[BinStat] = []
+    cur = None
+    for s in stats:
+        if cur is None:
+            cur = s
+            continue
+        if cur.T < min_exposure:
+            N = cur.N + s.N
+            T = cur.T + s.T
+            rate = (N / T) if T > 0 else float('nan')
+            lo, hi = garwood_rate_ci(N, T, alpha=alpha)
+            cur = BinStat(cur.t_start, s.t_end, N, T, rate, lo, hi)
+        else:
+            merged.append(cur)
+            cur = s
+    if cur is not None:
+        if cur.T < min_exposure and merged:
+            last = merged.pop()
+            N = last.N + cur.N
+            T = last.T + cur.T
+            rate = (N / T) if T > 0 else float('nan')
+            lo, hi = garwood_rate_ci(N, T, alpha=alpha)
+            cur = BinStat(last.t_start, cur.t_end, N, T, rate, lo, hi)
+        merged.append(cur)
+    return merged
+
+def _exposure_stop(T: np.ndarray, s: int, min_exposure: float) -> int:
+    """
+    First k > s with T[s] + ... + T[k-1] >= min_exposure, summed left to right
+    from s (np.cumsum is sequential, like the original loops); len(T) if none.
+    """
+    n = len(T)
+    width = 64
+    while True:
+        stop = min(s + width, n)
+        k = int(np.searchsorted(np.cumsum(T[s:stop]), min_exposure, side="left"))
+        if k < stop - s:
+            return s + k + 1
+        if stop == n:
+            return n
+        width *= 4
+
+def merge_bins(
+    N,
+    T,
+    min_events: Optional[int] = None,
+    min_exposure: Optional[float] = None,
+    merge_tail: bool = False,
+) -> np.ndarray:
+    """
+    Greedy left-to-right merge of consecutive bins; returns the index of the
+    first original bin of every merged bin.
+
+    A merged bin grows until it holds at least ``min_events`` events and at
+    least ``min_exposure`` of exposure (either criterion may be None/<=0 to
+    disable it).  For every bin, the end of a merged bin starting there is
+    found at once with ``np.searchsorted`` on the cumulative sums of N and T
+    (both non-negative); the sweep then only hops from one start to the next.
+    Exposure is accumulated from each segment start, as the original loops
+    did: differences of the global cumsum only decide the ends that are
+    farther from the threshold than its rounding error, the rest are
+    re-summed locally (see ``_exposure_stop``), so long runs do not flip
+    short bins near ``min_exposure``.
+    No CI is evaluated here.  The last merged bin may fall short of the
+    thresholds; with ``merge_tail`` it is folded into the previous one.
+
+    Apply the result with ``np.add.reduceat(N, starts)`` (same for T), or
+    let ``build_and_summarize`` do it.
+    """
+    N = np.asarray(N, dtype=np.int64)
+    T = np.asarray(T, dtype="float64")
+    n = len(N)
+    use_N = min_events is not None and min_events > 0
+    use_T = min_exposure is not None and min_exposure > 0
+    if n == 0 or not (use_N or use_T):
+        return np.arange(n)
+    cN = np.concatenate([[0], np.cumsum(N)])
+    # nxt[s]: primer k con sum(x[s:k]) >= umbral -> el bin fusionado es [s, k)
+    nxt = np.arange(1, n + 1)
+    if use_N:
+        nxt = np.maximum(nxt, np.searchsorted(cN, cN[:-1] + min_events, side="left"))
+    nxt = nxt.tolist()
+    if use_T:
+        cT = np.concatenate([[0.0], np.cumsum(T)])
+        # cota del error de cT[k] - cT[s] frente a la suma secuencial desde s
+        tol = 2 * (n + 1) * np.finfo(np.float64).eps * cT[-1]
+        lo = np.searchsorted(cT, cT[:-1] + (min_exposure - tol), side="left")
+        nxt_T = np.searchsorted(cT, cT[:-1] + (min_exposure + tol), side="left")
+        unsure = (lo != nxt_T).tolist()  # algún k cae dentro de la banda de error
+        nxt_T = nxt_T.tolist()
+    starts = []
+    s = 0
+    while s < n:
+        starts.append(s)
+        k = nxt[s]
+        if use_T:
+            k = max(k, _exposure_stop(T, s, min_exposure) if unsure[s] else nxt_T[s])
+        s = k
+    starts = np.asarray(starts, dtype=np.intp)
+    if merge_tail and len(starts) > 1:
+        last = starts[-1]
+        short_N = use_N and cN[n] - cN[last] < min_events
+        short_T = use_T and np.cumsum(T[last:])[-1] < min_exposure
+        if short_N or short_T:
+            starts = starts[:-1]
+    return starts
+
+def _merge_stats(
+    stats: List[BinStat],
+    min_events: Optional[int] = None,
+    min_exposure: Optional[float] = None,
+    alpha: float = 0.32,
+) -> List[BinStat]:
+    """
+    Merge ``stats`` on min exposure (tail folded back) and then on min events,
+    as build_and_summarize always did, working on N/T/edge arrays with
+    :func:`merge_bins` and computing the CIs once for the merged bins.
+    """
+    if not stats:
+        return stats
+    N = np.array([s.N for s in stats], dtype=np.int64)
+    T = np.array([s.T for s in stats], dtype="float64")
+    starts = merge_bins(N, T, min_exposure=min_exposure, merge_tail=True)
+    if len(starts) < len(stats):
+        N, T = np.add.reduceat(N, starts), np.add.reduceat(T, starts)
+    again = merge_bins(N, T, min_events=min_events)
+    if len(again) < len(N):
+        starts = starts[again]
+        N, T = np.add.reduceat(N, again), np.add.reduceat(T, again)
+    if len(starts) == len(stats):
+        return stats
+    ends = np.append(starts[1:], len(stats)) - 1
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rate = np.where(T > 0, N / T, np.nan)
+    lo, hi = garwood_ci(N, T, alpha=alpha)
+    return [
+        BinStat(stats[a].t_start, stats[b].t_end, int(n), float(t), float(r), float(l), float(h))
+        for a, b, n, t, r, l, h in zip(starts, ends, N, T, rate, lo, hi)
+    ]
+
 import numpy as np
 import pandas as pd
 from typing import Optional, Tuple, List, Literal
@@ -508,28 +1070,120 @@ def _find_exposure_col(beq: pd.DataFrame) -> str:
     raise ValueError("No pude encontrar una columna de fluencia acumulada en beq.")
 
 # --- util: interpolador Φ(t) monótono sobre timestamps ---
-def _build_phi_interpolator(beq: pd.DataFrame):
+def _phi_curve(beq: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    """Nodos (t en segundos, Φ acumulada no decreciente) para np.interp."""
     if "time" not in beq.columns:
         raise ValueError("beq debe tener columna 'time' (datetime64).")
     col = _find_exposure_col(beq)
     df = beq.sort_values("time").dropna(subset=["time", col]).copy()
     # eje en segundos (float) para np.interp
-    t_sec = df["time"].astype("int64", copy=False) / 1e9
+    t_sec = (df["time"].astype("int64", copy=False) / 1e9).to_numpy()
     phi = df[col].astype(float).values
     # aseguramos monotonicidad no estricta
     phi = np.maximum.accumulate(phi)
+    return t_sec, phi
+
+def _build_phi_interpolator(beq: pd.DataFrame):
+    t_sec, phi = _phi_curve(beq)
     def phi_at(ts: pd.Timestamp) -> float:
         x = np.array([ts.value / 1e9], dtype=float)
         # extrapolación lineal en extremos (np.interp lo hace con valores de borde)
         return float(np.interp(x, t_sec, phi))
     return phi_at
 
+def _lerp(a: np.ndarray, b: np.ndarray, t: np.ndarray) -> np.ndarray:
+    # misma fórmula que np.percentile(method="linear") para resultados idénticos
+    diff = b - a
+    return np.where(t >= 0.5, b - diff * (1 - t), a + diff * t)
+
+def _grouped_percentile(v: np.ndarray, starts: np.ndarray, n: np.ndarray, q: float) -> np.ndarray:
+    """Percentil ``q`` (0-100) de cada grupo v[starts[i]:starts[i]+n[i]] (ya ordenado, n>0)."""
+    virtual = (n - 1) * (q / 100)
+    prev = np.floor(virtual)
+    gamma = virtual - prev
+    above = virtual >= n - 1
+    prev = np.where(above, n - 1, prev).astype(np.intp)
+    nxt = np.where(above, n - 1, prev + 1).astype(np.intp)
+    return _lerp(v[starts + prev], v[starts + nxt], gamma)
+
 # --- util: ∆Φ recortadas por bin ---
 def _inter_error_fluence_stats(
     events: List[pd.Timestamp],
     beq: pd.DataFrame,
     bin_edges: List[pd.Timestamp],
 ) -> List[dict]:
+    """
+    Por bin: estadísticas de ∆Φ entre errores consecutivos, recortando cada
+    segmento [t_i, t_{i+1}] a los bordes del bin.
+
+    Vectorizado: los segmentos que cortan cada bin se ubican con
+    ``np.searchsorted``, Φ se interpola en todos los extremos recortados con una
+    sola llamada a ``np.interp`` y los cuantiles se calculan por grupo sobre el
+    arreglo ordenado por (bin, ∆Φ).
+    """
+    t_sec, phi = _phi_curve(beq)
+    n_bins = max(len(bin_edges) - 1, 0)
+    edges_ns = _as_ns(list(bin_edges)) if n_bins else np.empty(0, dtype=np.int64)
+    a, b = edges_ns[:-1], edges_ns[1:]
+
+    ev = np.sort(_as_ns(list(events)))
+    ev = ev[ev != np.iinfo(np.int64).min]
+    # segmentos entre errores consecutivos (t1 > t0); t0 y t1 quedan ordenados
+    seg = np.flatnonzero(ev[1:] > ev[:-1])
+    t0, t1 = ev[seg], ev[seg + 1]
+
+    # segmentos que intersectan [a,b]: (t0 < b) and (t1 > a) -> rango [lo, hi)
+    lo = np.searchsorted(t1, a, side="right")
+    hi = np.searchsorted(t0, b, side="left")
+    cnt = np.maximum(hi - lo, 0)
+    bin_id = np.repeat(np.arange(n_bins), cnt)
+    offsets = np.arange(int(cnt.sum())) - np.repeat(np.cumsum(cnt) - cnt, cnt)
+    j = np.repeat(lo, cnt) + offsets
+
+    start = np.maximum(t0[j], a[bin_id])
+    end = np.minimum(t1[j], b[bin_id])
+    ok = end > start
+    bin_id, start, end = bin_id[ok], start[ok], end[ok]
+
+    x = np.concatenate([start, end]) / 1e9
+    phi_x = np.interp(x, t_sec, phi)
+    # permitimos min clip numérico
+    gaps = np.maximum(phi_x[len(start):] - phi_x[:len(start)], 0.0)
+
+    n = np.bincount(bin_id, minlength=n_bins)
+    sums = np.bincount(bin_id, weights=gaps, minlength=n_bins) if len(gaps) else np.zeros(n_bins)
+    order = np.lexsort((gaps, bin_id))
+    g = gaps[order]
+    first = np.cumsum(n) - n
+    has = n > 0
+    st, nn = first[has], n[has]
+
+    stats = {k: np.full(n_bins, np.nan) for k in
+             ("gap_mean", "gap_median", "gap_p10", "gap_p90", "gap_p99", "gap_min", "gap_max")}
+    if has.any():
+        mid = st + nn // 2
+        even = nn % 2 == 0
+        stats["gap_median"][has] = np.where(even, (g[np.where(even, mid - 1, mid)] + g[mid]) / 2, g[mid])
+        for q in (10, 90, 99):
+            stats[f"gap_p{q}"][has] = _grouped_percentile(g, st, nn, q)
+        stats["gap_min"][has] = g[st]
+        stats["gap_max"][has] = g[st + nn - 1]
+        stats["gap_mean"][has] = sums[has] / nn
+
+    out: List[dict] = []
+    for i in range(n_bins):
+        row = {"gap_N": int(n[i]), "gap_sum": float(sums[i]) if n[i] else 0.0}
+        for k in ("gap_mean", "gap_median", "gap_p10", "gap_p90", "gap_p99", "gap_min", "gap_max"):
+            row[k] = float(stats[k][i])
+        out.append(row)
+    return out
+
+def _inter_error_fluence_stats_loop(
+    events: List[pd.Timestamp],
+    beq: pd.DataFrame,
+    bin_edges: List[pd.Timestamp],
+) -> List[dict]:
+    """Implementación original bin por bin (referencia para tests)."""
     phi_at = _build_phi_interpolator(beq)
     events = sorted([pd.Timestamp(e) for e in events])
     # generamos segmentos entre errores consecutivos
@@ -579,47 +1233,81 @@ def _inter_error_fluence_stats(
     return out
 
 # =============== TU FUNCIÓN CON EXTENSIÓN DE FLUENCIA ENTRE ERRORES ===============
-def build_and_summarize(
+@dataclass
+class PreparedInputs:
+    """
+    Lo que build_and_summarize deriva de (df_beam, fails_df) antes de binear,
+    para reutilizarlo entre configuraciones (ver radbin.sweep).
+      beq     timebase escalado (scaled_time_fn)
+      events  tiempos de error (extract_event_times)
+      resets  detect_resets(fails_df) (DatetimeIndex), o None si no se pidió
+      span    (t_min, t_max) de beam + fails, respaldo del modo "reset" sin resets
+      seconds tiempo de cada paso
+    """
+    beq: pd.DataFrame
+    events: pd.Series
+    resets: Optional[pd.DatetimeIndex]
+    span: Optional[Tuple[pd.Timestamp, pd.Timestamp]]
+    seconds: dict
+
+def prepare_inputs(
     df_beam: pd.DataFrame,
     fails_df: pd.DataFrame,
     *,
+    flux_col: str = "HEH_dose_rate",
+    scaled_time_fn = compute_scaled_time_clipped,
+    with_resets: bool = True,
+) -> PreparedInputs:
+    """Scaled timebase, event times and (optionally) resets, computed once."""
+    seconds = {}
+    t0 = time.perf_counter()
+    try:
+        beq = scaled_time_fn(df_beam, flux_col=flux_col)
+    except TypeError:
+        beq = scaled_time_fn(df_beam)
+    seconds["scaled_time"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    events = extract_event_times(fails_df)
+    seconds["event_times"] = time.perf_counter() - t0
+
+    resets = span = None
+    if with_resets:
+        t0 = time.perf_counter()
+        resets = detect_resets(fails_df)
+        if not len(resets):
+            t_all = pd.to_datetime(pd.concat([df_beam["time"], fails_df["time"]]))
+            span = (t_all.min(), t_all.max())
+        seconds["resets"] = time.perf_counter() - t0
+    return PreparedInputs(beq, events, resets, span, seconds)
+
+def summarize_prepared(
+    prep: PreparedInputs,
+    *,
     bin_mode: Literal["fluence","reset","count"] = "fluence",
     k_multiple: int = 1,
     n_bins: int = 30,
     target_N: int = 100,
-    flux_col: str = "HEH_dose_rate",
     area_norm: Optional[Tuple[int,int]] = None,  # (A_run, A_ref)
     alpha: float = 0.05,
     T_source: Literal["beam","wall"] = "beam",
-    scaled_time_fn = compute_scaled_time_clipped,
     min_events_per_bin: Optional[int] = None,
-    # --- nuevo: umbral de exposición por bin (solo aplica si use_scaled=True) ---
     min_exposure_per_bin: Optional[float] = None,
 ) -> pd.DataFrame:
-    """
-    Igual que antes, pero **agrega** por bin estadísticas de *fluencia entre errores*:
-      gap_N, gap_sum, gap_mean, gap_median, gap_p10, gap_p90, gap_p99, gap_min, gap_max
-    """
-
-    try:
-        beq = scaled_time_fn(df_beam, flux_col=flux_col)
-    except TypeError:
-        beq = scaled_time_fn(df_beam)
-
-
-    events = extract_event_times(fails_df)
+    """Bin table of build_and_summarize for one configuration, from prepare_inputs()."""
+    beq, events = prep.beq, prep.events
 
     if bin_mode == "fluence": #  < ------
         edges = build_bins_equal_fluence(beq, n_bins=n_bins)
         use_scaled = True
 
     elif bin_mode == "reset":
-        resets = detect_resets(fails_df)
-        if not resets:
-            t_all = pd.to_datetime(pd.concat([df_beam["time"], fails_df["time"]]))
-            edges = [t_all.min(), t_all.max()]
+        if prep.resets is None:
+            raise ValueError('bin_mode="reset" needs prepare_inputs(..., with_resets=True)')
+        if not len(prep.resets):
+            edges = list(prep.span)
         else:
-            edges = build_bins_reset_locked(resets, k_multiple=k_multiple)
+            edges = build_bins_reset_locked(prep.resets, k_multiple=k_multiple)
         use_scaled = (T_source == "beam")
     elif bin_mode == "count":
         edges = build_bins_equal_count(events, target_N=target_N)
@@ -636,37 +1324,13 @@ def build_and_summarize(
         alpha=alpha
     )
 
-    # --- fusión por exposición mínima ---
-    if (min_exposure_per_bin is not None and min_exposure_per_bin > 0
-        and use_scaled and T_source == "beam"):
-        merged: List[BinStat] = []
-        cur = None
-        for s in stats:
-            if cur is None:
-                cur = s
-                continue
-            if cur.T < min_exposure_per_bin:
-                N = cur.N + s.N
-                T = cur.T + s.T
-                rate = (N / T) if T > 0 else float('nan')
-                lo, hi = garwood_rate_ci(N, T, alpha=alpha)
-                cur = BinStat(cur.t_start, s.t_end, N, T, rate, lo, hi)
-            else:
-                merged.append(cur)
-                cur = s
-        if cur is not None:
-            if cur.T < min_exposure_per_bin and merged:
-                last = merged.pop()
-                N = last.N + cur.N
-                T = last.T + cur.T
-                rate = (N / T) if T > 0 else float('nan')
-                lo, hi = garwood_rate_ci(N, T, alpha=alpha)
-                cur = BinStat(last.t_start, cur.t_end, N, T, rate, lo, hi)
-            merged.append(cur)
-        stats = merged
-
-    # --- fusión por mínimo de eventos (si se pide) ---
-    stats = _merge_bins_until(stats, min_events=min_events_per_bin)
+    # --- fusión por exposición mínima y/o mínimo de eventos (CIs una sola vez) ---
+    stats = _merge_stats(
+        stats,
+        min_events=min_events_per_bin,
+        min_exposure=min_exposure_per_bin if (use_scaled and T_source == "beam") else None,
+        alpha=alpha,
+    )
 
     # --- NUEVO: fluencia entre errores recortada por bin ---
     gap_stats = _inter_error_fluence_stats(events, beq, [s.t_start for s in stats] + [stats[-1].t_end] if stats else [])
@@ -701,6 +1365,45 @@ def build_and_summarize(
 
     return df
 
+def build_and_summarize(
+    df_beam: pd.DataFrame,
+    fails_df: pd.DataFrame,
+    *,
+    bin_mode: Literal["fluence","reset","count"] = "fluence",
+    k_multiple: int = 1,
+    n_bins: int = 30,
+    target_N: int = 100,
+    flux_col: str = "HEH_dose_rate",
+    area_norm: Optional[Tuple[int,int]] = None,  # (A_run, A_ref)
+    alpha: float = 0.05,
+    T_source: Literal["beam","wall"] = "beam",
+    scaled_time_fn = compute_scaled_time_clipped,
+    min_events_per_bin: Optional[int] = None,
+    # --- nuevo: umbral de exposición por bin (solo aplica si use_scaled=True) ---
+    min_exposure_per_bin: Optional[float] = None,
+) -> pd.DataFrame:
+    """
+    Igual que antes, pero **agrega** por bin estadísticas de *fluencia entre errores*:
+      gap_N, gap_sum, gap_mean, gap_median, gap_p10, gap_p90, gap_p99, gap_min, gap_max
+
+    Equivale a prepare_inputs() + summarize_prepared(); para barrer varias
+    configuraciones sobre los mismos datos usar radbin.sweep.sweep_binning.
+    """
+    prep = prepare_inputs(df_beam, fails_df, flux_col=flux_col, scaled_time_fn=scaled_time_fn,
+                          with_resets=(bin_mode == "reset"))
+    return summarize_prepared(
+        prep,
+        bin_mode=bin_mode,
+        k_multiple=k_multiple,
+        n_bins=n_bins,
+        target_N=target_N,
+        area_norm=area_norm,
+        alpha=alpha,
+        T_source=T_source,
+        min_events_per_bin=min_events_per_bin,
+        min_exposure_per_bin=min_exposure_per_bin,
+    )
+
 
 
 
@@ -750,10 +1453,11 @@ def conservation_checks(
 
 # -----------------------------
 # Plotting helpers (matplotlib-only, one chart per figure)
+# matplotlib is imported on first use: the binning code must not pay for it
 # -----------------------------
-import matplotlib.pyplot as plt
 
 def plot_cumulative_fails(fails_df, time_col="time", cum_col="failsP_acum", title="Cumulative fails"):
+    import matplotlib.pyplot as plt
     ff = fails_df.copy().sort_values(time_col)
     t = to_datetime_smart(ff[time_col])
     c = pd.to_numeric(ff[cum_col], errors="coerce").ffill().fillna(0)
@@ -766,6 +1470,7 @@ def plot_cumulative_fails(fails_df, time_col="time", cum_col="failsP_acum", titl
 
 def errorbar_rates(df_stats, x_col="t_mid", y_col="rate", lo_col="lo", hi_col="hi", title="Rate per bin",
                    xlabel=r"$T$ime",ylabel=r"$\sigma=1/\mu$"):
+    import matplotlib.pyplot as plt
     ds = df_stats.copy()
     x = pd.to_datetime(ds[x_col])
     y = pd.to_numeric(ds[y_col], errors="coerce")
@@ -780,9 +1485,9 @@ def errorbar_rates(df_stats, x_col="t_mid", y_col="rate", lo_col="lo", hi_col="h
     plt.tight_layout()
 
 def plot_scaling_ratio(df_beam, flux_col="HEH_dose_rate", label="Scaling ratio"):
-    beq = compute_scaled_time_clipped(df_beam, flux_col=flux_col)
-    t = to_datetime_smart(beq["time"])
-    r = pd.to_numeric(beq["scale_ratio"], errors="coerce")
+    import matplotlib.pyplot as plt
+    st = _scaled_time_arrays(df_beam, flux_col=flux_col)
+    t, r = st.time, st.scale_ratio
     plt.figure()
     plt.plot(t, r, lw=1.2)
     plt.xlabel("Time")
@@ -3,6 +3,8 @@ import pandas as pd
 from scipy.stats import chi2, norm
 import statsmodels.api as sm
 
+from .core import garwood_ci
+
 # ========= Utilidad: IC de Garwood para tasas (para tus plots) =========
 def garwood_rate_ci(n, exposure, alpha=0.35):
     """
@@ -15,10 +17,8 @@ def garwood_rate_ci(n, exposure, alpha=0.35):
     exp = np.asarray(exposure, dtype=float)
     if np.any(exp <= 0):
         raise ValueError("Todas las exposiciones deben ser > 0.")
-    lo = 0.5 * chi2.ppf(alpha/2, 2*n) / exp
-    hi = 0.5 * chi2.ppf(1 - alpha/2, 2*(n + 1)) / exp
-    lo = np.where(n == 0, 0.0, lo)  # convención común
-    return lo, hi
+    # mismo motor (vectorizado + caché de cuantiles) que radbin.core
+    return garwood_ci(n, exp, alpha=alpha)
 
 
 # ========= Utilidad: TOST para equivalencia práctica en beta1 =========
@@ -0,0 +1,304 @@
+from __future__ import annotations
+from typing import List, Literal, Optional
+import numpy as np
+import pandas as pd
+from .core import (
+    BinStat, garwood_rate_ci, to_datetime_smart,
+    _phi_floor, _phi_reference, _scaled_increments, _segment_sums, _thin_sorted_ns,
+)
+
+_NAT = np.iinfo(np.int64).min
+
+
+def _ns(series: pd.Series) -> np.ndarray:
+    return pd.DatetimeIndex(to_datetime_smart(series)).asi8
+
+
+class IncrementalSummarizer:
+    """
+    Versión incremental de ``build_and_summarize`` para usar durante el turno de haz.
+
+    Cada ``update(beam_rows, fail_rows)`` recibe sólo las filas nuevas (en orden
+    temporal), actualiza la fluencia acumulada ``t_eq``, los eventos y el bin
+    abierto, y devuelve los ``BinStat`` que quedaron cerrados. El costo por
+    llamada depende del tamaño de las filas nuevas y del bin abierto, no del
+    largo del run.
+
+    bin_mode:
+      * "fluence": un borde cada ``bin_exposure`` de t_eq (el primer borde es la
+        primera fila de haz), como ``build_bins_equal_fluence`` con
+        ``n_bins = t_eq_total / bin_exposure``.
+      * "count": un borde cada ``target_N`` eventos, como ``build_bins_equal_count``.
+
+    Un bin [a, b) se emite cuando ambos flujos (haz y fallas) ya llegaron a b;
+    ``finalize()`` cierra el bin abierto al final del run.
+
+    Escalamiento: mismas opciones que ``compute_scaled_time_clipped``. Como la
+    mediana global no se conoce en vivo, ``phi_ref`` se fija con el primer lote
+    que trae muestras beam_on (o se pasa explícito para reproducir el cálculo
+    offline exactamente).
+    """
+
+    def __init__(
+        self,
+        *,
+        bin_mode: Literal["fluence", "count"] = "fluence",
+        bin_exposure: Optional[float] = None,
+        target_N: int = 100,
+        T_source: Literal["beam", "wall"] = "beam",
+        alpha: float = 0.05,
+        time_col: str = "time",
+        dt_col: str = "dt",
+        flux_col: str = "HEH_dose_rate",
+        beam_on_col: str = "beam_on",
+        cum_col: str = "failsP_acum",
+        min_separation: float = 0.0,
+        mode: Literal["ref_time", "fluence"] = "fluence",
+        ref: Literal["median", "mean", "max"] = "median",
+        phi_ref: Optional[float] = None,
+        floor_strategy: Literal["adaptive", "fixed"] = "adaptive",
+        min_frac: float = 0.05,
+        rmax: float = 1e4,
+        freeze_off: bool = True,
+        start_at_first_on: bool = True,
+    ):
+        if bin_mode == "fluence":
+            if bin_exposure is None or not bin_exposure > 0:
+                raise ValueError("bin_mode='fluence' requires bin_exposure > 0")
+        elif bin_mode == "count":
+            if int(target_N) < 1:
+                raise ValueError("bin_mode='count' requires target_N >= 1")
+        else:
+            raise ValueError("Unknown bin_mode")
+        if mode not in ("ref_time", "fluence"):
+            raise ValueError('mode must be "ref_time" or "fluence"')
+        self.bin_mode = bin_mode
+        self.bin_exposure = bin_exposure
+        self.target_N = int(target_N)
+        self.T_source = T_source
+        self.alpha = alpha
+        self.time_col, self.dt_col, self.flux_col = time_col, dt_col, flux_col
+        self.beam_on_col, self.cum_col = beam_on_col, cum_col
+        self.min_separation = min_separation
+        self.mode, self.ref, self.floor_strategy = mode, ref, floor_strategy
+        self.min_frac, self.rmax = min_frac, rmax
+        self.freeze_off, self.start_at_first_on = freeze_off, start_at_first_on
+        self.phi_ref = phi_ref
+
+        self.t_eq = 0.0              # fluencia (o tiempo escalado) acumulada
+        self.n_events = 0            # eventos emitidos hasta ahora
+        self.bins: List[BinStat] = []
+        self._closed = False
+        self._seen_on = False
+        self._last_beam_ns: Optional[int] = None
+        self._beam_wm: Optional[int] = None   # última marca de tiempo vista por flujo
+        self._fail_wm: Optional[int] = None
+        self._last_c = 0
+        self._last_event: Optional[int] = None
+        self._next_k = 0             # próximo umbral k*bin_exposure (modo fluence)
+        self._edges: List[int] = []  # bordes cerrados aún no emitidos; _edges[0] = inicio del bin más antiguo
+        self._T_done: List[float] = []  # T de [_edges[i], _edges[i+1]) ya cubiertos por el haz
+        self._started = False
+        self._beam_t = np.empty(0, dtype=np.int64)    # filas de haz pendientes (bins no emitidos)
+        self._beam_dteq = np.empty(0, dtype=np.float64)
+        self._ev = np.empty(0, dtype=np.int64)        # eventos pendientes (ordenados)
+
+    # ------------------------------------------------------------------
+    def update(self, beam_rows: Optional[pd.DataFrame] = None,
+               fail_rows: Optional[pd.DataFrame] = None) -> List[BinStat]:
+        """Agrega filas nuevas de haz y/o fallas; devuelve los bins cerrados en esta llamada."""
+        if self._closed:
+            raise RuntimeError("summarizer already finalized")
+        if beam_rows is not None and len(beam_rows):
+            self._add_beam(beam_rows)
+        if fail_rows is not None and len(fail_rows):
+            self._add_fails(fail_rows)
+        return self._emit_ready()
+
+    def finalize(self, t_end: Optional[pd.Timestamp] = None) -> List[BinStat]:
+        """Cierra el bin abierto (hasta ``t_end`` o justo después del último dato) y lo emite."""
+        if self._closed:
+            return []
+        ends = [x + 1 for x in (self._beam_wm, self._last_event) if x is not None]
+        if t_end is not None:
+            ends.append(pd.Timestamp(t_end).value)
+        self._closed = True
+        if not ends or not self._edges:
+            return []
+        end = max(ends)
+        if end > self._edges[-1]:
+            self._edges.append(end)
+        self._beam_wm = self._fail_wm = end
+        return self._emit_ready()
+
+    def open_bin(self) -> Optional[BinStat]:
+        """Estado provisorio del bin abierto (desde el último borde hasta ahora)."""
+        if not self._edges:
+            return None
+        a = self._edges[-1]
+        b = max(x for x in (self._beam_wm, self._fail_wm, a) if x is not None)
+        N = int(len(self._ev) - np.searchsorted(self._ev, a, side="left"))
+        T = self._exposure(np.array([a]), np.array([b]))[0]
+        return self._binstat(a, b, N, T)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Bins emitidos con las columnas base de ``build_and_summarize``."""
+        rows = []
+        for s in self.bins:
+            rows.append({
+                "t_start": s.t_start, "t_end": s.t_end, "N": s.N, "T": s.T,
+                "rate": s.rate, "lo": s.lo, "hi": s.hi,
+                "t_mid": s.t_start + (s.t_end - s.t_start) / 2,
+                "width_s": (s.t_end - s.t_start).total_seconds(),
+            })
+        return pd.DataFrame(rows)
+
+    # ------------------------------------------------------------------
+    def _add_beam(self, rows: pd.DataFrame) -> None:
+        t = _ns(rows[self.time_col])
+        order = np.argsort(t, kind="stable")
+        order = order[t[order] != _NAT]
+        t = t[order]
+        if len(t) == 0:
+            return
+        rows = rows.iloc[order]
+
+        if self.dt_col in rows.columns and not rows[self.dt_col].isna().all():
+            dt = pd.to_numeric(rows[self.dt_col], errors="coerce").fillna(0).to_numpy(dtype="float64")
+        else:
+            prev = t[0] if self._last_beam_ns is None else self._last_beam_ns
+            dt = 1e-9 * np.diff(t, prepend=prev).astype("float64")  # = Series.dt.total_seconds()
+        self._last_beam_ns = int(t[-1])
+
+        phi = pd.to_numeric(rows.get(self.flux_col, pd.Series(np.nan, index=rows.index)), errors="coerce")
+        bon = pd.to_numeric(rows.get(self.beam_on_col, pd.Series(0, index=rows.index)),
+                            errors="coerce").fillna(0).astype(int)
+        if self.phi_ref is None:
+            phi_ref = _phi_reference(phi, bon, self.ref)
+            if np.isfinite(phi_ref):
+                self.phi_ref = phi_ref
+        phi_ref = np.nan if self.phi_ref is None else self.phi_ref
+        floor = _phi_floor(phi_ref, self.floor_strategy, self.min_frac)
+
+        on = bon.to_numpy() == 1
+        before = np.zeros(len(t), dtype=bool)
+        if self.start_at_first_on and not self._seen_on:
+            before = np.arange(len(t)) < (int(np.argmax(on)) if on.any() else len(t))
+        self._seen_on = self._seen_on or bool(on.any())
+
+        dt_eq, _ = _scaled_increments(dt, phi.to_numpy(dtype=float), bon.to_numpy(), phi_ref, floor,
+                                      mode=self.mode, rmax=self.rmax, freeze_off=self.freeze_off,
+                                      before_first_on=before)
+        # acumulado secuencial desde el valor previo (idéntico a un cumsum global)
+        teq = np.cumsum(np.concatenate(([self.t_eq], dt_eq)))[1:]
+        self.t_eq = float(teq[-1])
+
+        if self.bin_mode == "fluence":
+            w = float(self.bin_exposure)
+            k_max = int(np.floor(teq[-1] / w)) + 1
+            ks = np.arange(self._next_k, k_max + 1)
+            js = np.searchsorted(teq, ks * w, side="left")
+            hit = js < len(teq)
+            if hit.any():
+                self._next_k = int(ks[hit][-1]) + 1
+                self._add_edges(t[js[hit]])
+
+        self._beam_t = np.concatenate([self._beam_t, t])
+        self._beam_dteq = np.concatenate([self._beam_dteq, dt_eq])
+        self._beam_wm = int(t[-1])
+
+    def _add_fails(self, rows: pd.DataFrame) -> None:
+        t = _ns(rows[self.time_col])
+        c = pd.to_numeric(rows[self.cum_col], errors="coerce").ffill().fillna(self._last_c).astype("int64").to_numpy()
+        dc = np.diff(c, prepend=self._last_c)
+        self._last_c = int(c[-1])
+        ev = np.repeat(t, np.clip(dc, 0, None))
+        ev = np.sort(ev[ev != _NAT])
+        if self.min_separation > 0 and len(ev):
+            gap = pd.to_timedelta(float(self.min_separation), unit="s").value
+            if self._last_event is not None:
+                ev = ev[ev >= self._last_event + gap]
+            if len(ev):
+                ev = _thin_sorted_ns(ev, gap)
+        if len(ev):
+            if self.bin_mode == "count":
+                idx = np.arange(self.n_events, self.n_events + len(ev))
+                self._add_edges(ev[idx % self.target_N == 0])
+            self._last_event = int(ev[-1])
+            self.n_events += len(ev)
+            self._ev = np.concatenate([self._ev, ev])
+        valid = t[t != _NAT]
+        if len(valid):
+            self._fail_wm = int(valid.max()) if self._fail_wm is None else max(self._fail_wm, int(valid.max()))
+
+    def _add_edges(self, edges: np.ndarray) -> None:
+        for e in np.unique(edges):
+            if not self._edges or e > self._edges[-1]:
+                self._edges.append(int(e))
+
+    def _exposure(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        if self.T_source == "beam":
+            starts = np.searchsorted(self._beam_t, a, side="left")
+            stops = np.searchsorted(self._beam_t, b, side="left")
+            return _segment_sums(self._beam_dteq, starts, stops)
+        return ((b - a) // 1000) / 1e6
+
+    def _binstat(self, a: int, b: int, N: int, T: float) -> BinStat:
+        rate = (N / T) if T > 0 else np.nan
+        lo, hi = garwood_rate_ci(N, T, alpha=self.alpha)
+        return BinStat(pd.Timestamp(a), pd.Timestamp(b), int(N), float(T), float(rate), float(lo), float(hi))
+
+    def _close_exposures(self) -> None:
+        """
+        Fija T de los bins que el haz ya cruzó (fin <= _beam_wm) aunque falten
+        las fallas para emitirlos, y recorta el buffer de haz al inicio del
+        primer bin sin T: sin filas de fallas (_fail_wm None) el buffer ya no
+        crece con el largo del run.  En modo count no hay bordes antes de la
+        primera falla (lo recorta _emit_ready al llegar _fail_wm).
+        """
+        if self._beam_wm is None or not self._edges:
+            return
+        E = np.asarray(self._edges, dtype=np.int64)
+        done = len(self._T_done)
+        k = int(np.searchsorted(E[1:], self._beam_wm, side="right"))
+        if k > done:
+            self._T_done.extend(self._exposure(E[done:k], E[done + 1:k + 1]).tolist())
+        drop = np.searchsorted(self._beam_t, E[len(self._T_done)], side="left")
+        self._beam_t, self._beam_dteq = self._beam_t[drop:], self._beam_dteq[drop:]
+
+    def _emit_ready(self) -> List[BinStat]:
+        out: List[BinStat] = []
+        if not self._edges:
+            # sin bordes todavía: el haz anterior a cualquier evento futuro no cuenta (modo count)
+            if self.bin_mode == "count" and self._fail_wm is not None:
+                keep = np.searchsorted(self._beam_t, self._fail_wm, side="left")
+                self._beam_t, self._beam_dteq = self._beam_t[keep:], self._beam_dteq[keep:]
+            return out
+        if not self._started and self._fail_wm is not None and self._fail_wm >= self._edges[0]:
+            # eventos previos al primer borde: bin inicial [primer evento, primer borde)
+            lead = int(np.searchsorted(self._ev, self._edges[0], side="left"))
+            if lead:
+                a, b = int(self._ev[0]), self._edges[0]
+                out.append(self._binstat(a, b, lead, float(self._exposure(np.array([a]), np.array([b]))[0])))
+                self._ev = self._ev[lead:]
+            self._started = True
+        self._close_exposures()
+
+        if self._beam_wm is None or self._fail_wm is None:
+            self.bins.extend(out)
+            return out
+        wm = min(self._beam_wm, self._fail_wm)
+        E = np.asarray(self._edges, dtype=np.int64)
+        k = int(np.searchsorted(E[1:], wm, side="right"))  # bins [E[i], E[i+1]) con E[i+1] <= wm
+        if k:
+            a, b = E[:k], E[1:k + 1]
+            cum = np.searchsorted(self._ev, E[:k + 1], side="left")
+            N = np.diff(cum)
+            T, self._T_done = self._T_done[:k], self._T_done[k:]
+            for i in range(k):
+                out.append(self._binstat(int(a[i]), int(b[i]), int(N[i]), float(T[i])))
+            # descartar lo ya emitido
+            self._ev = self._ev[cum[-1]:]
+            self._edges = self._edges[k:]
+        self.bins.extend(out)
+        return out
@@ -0,0 +1,130 @@
+"""
+Sweeps of binning configurations over one run.
+
+``build_and_summarize`` recomputes the scaled timebase, the event times and
+the resets on every call.  ``sweep_binning`` computes them once
+(``prepare_inputs``) and evaluates a list of configurations on top
+(``summarize_prepared``), optionally in a process pool, returning every bin
+table in one long DataFrame plus the time spent per configuration.
+
+Example
+-------
+>>> configs = config_grid(bin_mode="fluence", n_bins=[12, 24, 48], min_events_per_bin=[None, 5])
+>>> configs += config_grid(bin_mode="reset", k_multiple=[1, 2, 4])
+>>> bins, timings = sweep_binning(beam, fails, configs, workers=4)
+>>> bins.groupby("config")["N"].sum()
+"""
+from __future__ import annotations
+
+import itertools
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from .core import PreparedInputs, compute_scaled_time_clipped, prepare_inputs, summarize_prepared
+
+# parámetros de build_and_summarize que cambian entre configuraciones
+CONFIG_KEYS = (
+    "bin_mode", "k_multiple", "n_bins", "target_N", "area_norm", "alpha",
+    "T_source", "min_events_per_bin", "min_exposure_per_bin",
+)
+
+def config_grid(**axes) -> List[dict]:
+    """
+    Cartesian product of the given parameters, one dict per configuration.
+    Lists (or tuples other than ``area_norm``) are axes; anything else is fixed.
+    """
+    keys, values = [], []
+    for key, value in axes.items():
+        is_axis = isinstance(value, list) or (isinstance(value, tuple) and key != "area_norm")
+        keys.append(key)
+        values.append(list(value) if is_axis else [value])
+    return [dict(zip(keys, combo)) for combo in itertools.product(*values)]
+
+def _run_config(prep: PreparedInputs, config: dict) -> Tuple[pd.DataFrame, float]:
+    t0 = time.perf_counter()
+    table = summarize_prepared(prep, **config)
+    return table, time.perf_counter() - t0
+
+# copia de PreparedInputs en cada proceso del pool (se envía una sola vez)
+_WORKER_PREP: Optional[PreparedInputs] = None
+
+def _init_worker(prep: PreparedInputs) -> None:
+    global _WORKER_PREP
+    _WORKER_PREP = prep
+
+def _run_config_in_worker(config: dict) -> Tuple[pd.DataFrame, float]:
+    return _run_config(_WORKER_PREP, config)
+
+def sweep_binning(
+    df_beam: pd.DataFrame,
+    fails_df: pd.DataFrame,
+    configs: Sequence[dict],
+    *,
+    flux_col: str = "HEH_dose_rate",
+    scaled_time_fn = compute_scaled_time_clipped,
+    workers: Optional[int] = None,
+    **common,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Evaluate ``build_and_summarize`` for every configuration in ``configs``,
+    sharing the scaled timebase, event times and resets between them.
+
+    Parameters
+    ----------
+    configs:
+        Dicts of ``build_and_summarize`` binning parameters (see
+        ``CONFIG_KEYS``), e.g. from :func:`config_grid`.
+    flux_col, scaled_time_fn:
+        As in ``build_and_summarize``; used once for the shared timebase.
+    workers:
+        Evaluate the configurations in a pool of this many processes (the
+        shared inputs are sent once per process).  ``None``/1 runs in-process.
+    **common:
+        Parameters applied to every configuration unless it overrides them
+        (``alpha=0.32``, ``T_source="wall"``, ...).
+
+    Returns
+    -------
+    bins:
+        Long table: ``config`` (position in ``configs``), the configuration
+        parameters and the columns of the ``build_and_summarize`` output.
+        Each configuration's rows are identical to a direct call.
+    timings:
+        One row per step, ``config`` = -1 for the shared ones (``step`` =
+        scaled_time / event_times / resets) and the configuration index for
+        ``step`` = "binning", with ``seconds`` and ``n_out`` (bins produced).
+    """
+    configs = [{**common, **cfg} for cfg in configs]
+    for cfg in configs:
+        unknown = set(cfg) - set(CONFIG_KEYS)
+        if unknown:
+            raise TypeError(f"Unknown binning parameters: {sorted(unknown)}")
+
+    with_resets = any(cfg.get("bin_mode", "fluence") == "reset" for cfg in configs)
+    prep = prepare_inputs(df_beam, fails_df, flux_col=flux_col, scaled_time_fn=scaled_time_fn,
+                          with_resets=with_resets)
+
+    if workers is not None and workers > 1 and len(configs) > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(prep,)) as pool:
+            results = list(pool.map(_run_config_in_worker, configs))
+    else:
+        results = [_run_config(prep, cfg) for cfg in configs]
+
+    timing_rows = [{"config": -1, "step": step, "seconds": sec, "n_out": None}
+                   for step, sec in prep.seconds.items()]
+    params = [key for key in CONFIG_KEYS if any(key in cfg for cfg in configs)]
+    tables = []
+    for i, (cfg, (table, seconds)) in enumerate(zip(configs, results)):
+        timing_rows.append({"config": i, "step": "binning", "seconds": seconds, "n_out": len(table),
+                            **{key: cfg.get(key) for key in params}})
+        if len(table):
+            head = pd.DataFrame({key: [cfg.get(key)] * len(table) for key in params}, index=range(len(table)))
+            head.insert(0, "config", i)
+            tables.append(pd.concat([head, table.reset_index(drop=True)], axis=1))
+
+    bins = pd.concat(tables, ignore_index=True) if tables else pd.DataFrame(columns=["config"] + params)
+    timings = pd.DataFrame(timing_rows)
+    return bins, timings
@@ -1,5 +1,5 @@
 import numpy as np, pandas as pd
-from .core import compute_scaled_time_clipped
+from .core import _scaled_time_arrays
 
 def synth_beam(start="2025-01-01 09:00:00", hours=8, step_s=5.0,
                on_blocks=((0,2),(3,5),(6,8)),
@@ -26,11 +26,11 @@ def synth_fails_from_hazard(df_beam, hazard_mode="bathtub", rate_scale=0.2,
                             early_decay=1.2, wear_growth=1.2, plateau_level=0.03,
                             reset_every_s=None, seed=11):
     rng = np.random.default_rng(seed)
-    beq = compute_scaled_time_clipped(df_beam, freeze_off=True, start_at_first_on=True)
-    t = pd.to_datetime(beq["time"])
-    dt = pd.to_numeric(beq["dt"], errors="coerce").fillna(0).to_numpy()
-    dteq = pd.to_numeric(beq["dt_eq"], errors="coerce").fillna(0).to_numpy()
-    teq = pd.to_numeric(beq["t_eq"], errors="coerce").fillna(0).to_numpy()
+    st = _scaled_time_arrays(df_beam, freeze_off=True, start_at_first_on=True)
+    t = pd.Series(st.time)
+    dt = np.where(np.isnan(st.dt), 0.0, st.dt)
+    dteq = np.where(np.isnan(st.dt_eq), 0.0, st.dt_eq)
+    teq = np.where(np.isnan(st.t_eq), 0.0, st.t_eq)
     if hazard_mode == "bathtub":
         eps = 1.0
         early = (early_decay) / np.power(teq + eps, 0.7)
@@ -0,0 +1,108 @@
+"""Tests for the batched, rotating ``.dat`` writer of the CPLD DAQ."""
+from __future__ import annotations
+
+from pathlib import Path
+import sys
+from time import sleep, time
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DAQ_DIR = REPO_ROOT / "analysis" / "ThirdRunAna" / "Rad_CPLD_november"
+sys.path.insert(0, str(DAQ_DIR))
+
+import batch_writer
+from batch_writer import BatchWriter, line_time, read_index
+
+
+def _lines(n: int, t0: float = 1668000000.0) -> list:
+    return ["{:.3f},{:X},FF00,FF00\n".format(t0 + i, i % 16) for i in range(n)]
+
+
+def test_rotates_at_max_bytes_without_splitting_events(tmp_path: Path) -> None:
+    fname = str(tmp_path / "cpld_data_00000.dat")
+    events = [_lines(3, 1668000000.0 + 10 * i) for i in range(20)]
+    size = len("".join(events[0]))
+    writer = BatchWriter(fname, max_bytes=4 * size, timer=False, newline="\n")
+    for ev in events:
+        writer.write_lines(ev)
+    writer.close()
+
+    files = sorted(tmp_path.glob("*.dat"))
+    assert [f.name for f in files] == ["cpld_data_{:05d}.dat".format(i) for i in range(5)]
+    assert [f.stat().st_size for f in files] == [4 * size] * 5
+    assert "".join(f.read_text() for f in files) == "".join(sum(events, []))
+    assert writer.fidx == 4 and writer.fname == str(files[-1])
+
+
+def test_rotates_at_max_age(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    now = [1000.0]
+    monkeypatch.setattr(batch_writer, "time", lambda: now[0])
+    fname = str(tmp_path / "cpld_data_00007.dat")
+    writer = BatchWriter(fname, max_bytes=None, max_age_s=60, timer=False)
+    lines = _lines(10)
+    for i, line in enumerate(lines):
+        now[0] = 1000.0 + 25 * i
+        writer.write_lines([line])
+    writer.close()
+
+    # a new file every 60 s of age, numbered from the first one's index
+    rows = [read_index(str(f))["rows"] for f in sorted(tmp_path.glob("*.dat"))]
+    assert rows == [3, 3, 3, 1]
+    assert (tmp_path / "cpld_data_00010.dat").exists()
+
+
+def test_never_rotates_an_empty_file(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    now = [0.0]
+    monkeypatch.setattr(batch_writer, "time", lambda: now[0])
+    writer = BatchWriter(str(tmp_path / "cpld_data_00000.dat"), max_age_s=1, timer=False)
+    now[0] = 100.0
+    writer.write_lines(_lines(1))
+    writer.close()
+    assert len(list(tmp_path.glob("*.dat"))) == 1
+
+
+def test_index_contents(tmp_path: Path) -> None:
+    fname = str(tmp_path / "cpld_data_00000.dat")
+    lines = ["garbage without time\n"] + _lines(5) + ["1668000099.5 +8.0000E-02\n"]
+    writer = BatchWriter(fname, timer=False, newline="\n")
+    writer.write_lines(lines)
+    writer.close()
+
+    assert read_index(fname) == {"file": "cpld_data_00000.dat", "rows": 7,
+                                 "bytes": len("".join(lines)),
+                                 "first_time": 1668000000.0, "last_time": 1668000099.5}
+    assert not Path(fname + ".idx.tmp").exists()
+    assert read_index(str(tmp_path / "missing_00000.dat")) is None
+    assert line_time("1668000000.25,reset\n") == 1668000000.25
+
+
+def test_timer_flushes_without_new_writes(tmp_path: Path) -> None:
+    fname = str(tmp_path / "cpld_data_00000.dat")
+    writer = BatchWriter(fname, flush_s=0.3, newline="\n")
+    try:
+        writer.write_lines(_lines(1))
+        assert Path(fname).read_text() == ""  # still in the buffer
+        t0 = time()
+        while Path(fname).read_text() == "" and time() - t0 < 5:
+            sleep(0.01)
+        assert Path(fname).read_text() == _lines(1)[0]
+        assert read_index(fname)["rows"] == 1
+    finally:
+        writer.close()
+    writer.timer.join(1)
+    assert not writer.timer.is_alive()
+
+
+def test_keeps_text_mode_line_endings(tmp_path: Path) -> None:
+    fname = str(tmp_path / "cpld_data_00000.dat")
+    lines = _lines(4)
+    writer = BatchWriter(fname, max_bytes=3 * len(lines[0]) + 3, timer=False, newline="\r\n")
+    writer.write_lines(lines[:3])
+    writer.write_lines(lines[3:])
+    writer.close()
+
+    first = tmp_path / "cpld_data_00000.dat"
+    assert first.read_bytes() == "".join(lines[:3]).replace("\n", "\r\n").encode()
+    assert read_index(str(first))["bytes"] == first.stat().st_size
+    assert (tmp_path / "cpld_data_00001.dat").exists()
@@ -6,6 +6,7 @@ from pathlib import Path
 import sys
 from typing import Dict, Iterable, List, Sequence
 
+import numpy as np
 import pandas as pd
 import pytest
 
@@ -13,7 +14,13 @@ REPO_ROOT = Path(__file__).resolve().parents[1]
 LIB_DIR = REPO_ROOT / "lib"
 sys.path.insert(0, str(LIB_DIR))
 
-from cpld_decode import compute_counters, count_failed_bits, decode_word
+from cpld_decode import (
+    _compute_counters_loop,
+    compute_counters,
+    count_failed_bits,
+    decode_word,
+    hex_to_uint16,
+)
 from cpld_events import detect_bit_increments, summarise_bit_totals
 
 
@@ -275,3 +282,53 @@ def test_compute_counters_with_synthetic_scenarios(scenario: Scenario) -> None:
             column = f"bitnP{bit}"
             assert processed[column].tolist() == list(expected_series)
             assert periodic_counts[bit] == list(expected_series)
+
+
+def _random_telemetry(seed: int, rows: int = 400) -> pd.DataFrame:
+    """Random CPLD frame with sparse flips, resets and a few corrupted words."""
+
+    rng = np.random.default_rng(seed)
+    masks = np.where(rng.random((rows, 2)) < 0.3, rng.integers(0, 256, (rows, 2)), 0)
+    masks[rng.random(rows) < 0.1] = 0  # explicit resets
+    words = [[_encode_mask(int(m)) for m in row] for row in masks]
+    frame = pd.DataFrame(words, columns=["B0", "B1"], dtype=object)
+    corrupt = rng.choice(rows, size=rows // 20, replace=False)
+    junk = ["ZZ00", "nan", None, "FF", "0xFF00", " FE00", "fe00", "F\u00e900"]
+    for k, row in enumerate(corrupt):
+        frame.iat[row, k % 2] = junk[k % len(junk)]
+    frame.insert(0, "time", pd.to_datetime(rng.permutation(rows), unit="s"))
+    return frame
+
+
+def test_hex_to_uint16_matches_int_parsing() -> None:
+    """The lookup table and the slow path agree with :func:`int` semantics."""
+
+    words = ["FF00", "fe00", "0000", "ZZ00", "0xFF00", " FE00", "12345", None, "F\u00e900"]
+    values, valid = hex_to_uint16(words)
+    for word, value, ok in zip(words, values, valid):
+        try:
+            expected = int(str(word), 16) & 0xFFFF
+        except ValueError:
+            assert not ok
+        else:
+            assert ok and value == expected
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2, 3])
+def test_compute_counters_matches_reference_loop(seed: int) -> None:
+    """The vectorised engine reproduces the historical row-by-row loop."""
+
+    df = _random_telemetry(seed)
+    expected = _compute_counters_loop(df)
+    result = compute_counters(df)
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_compute_counters_leading_invalid_rows() -> None:
+    """Undecodable rows before the first valid sample stay at zero."""
+
+    df = _frame_from_sequence([[], [0], [], [0, 9]])
+    df.loc[0, "B0"] = "bad!"
+    pd.testing.assert_frame_equal(
+        compute_counters(df), _compute_counters_loop(df)
+    )
@@ -0,0 +1,124 @@
+"""Tests for the CPLD serial frame splitter."""
+from __future__ import annotations
+
+from pathlib import Path
+import random
+import sys
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DAQ_DIR = REPO_ROOT / "analysis" / "ThirdRunAna" / "Rad_CPLD_november"
+sys.path.insert(0, str(DAQ_DIR))
+
+# fake_serial goes first: it installs a stub ``serial`` module without pyserial
+from fake_serial import FakeSerial, cpld_frames, fake_ports
+from CPLD_module import CPLD, FrameParser
+
+
+def _feed_in_pieces(parser: FrameParser, data: bytes, seed: int) -> list:
+    rng = random.Random(seed)
+    cuts = sorted(rng.sample(range(1, len(data)), min(len(data) - 1, len(data) // 5)))
+    frames = []
+    for a, b in zip([0] + cuts, cuts + [len(data)]):
+        frames.extend(parser.feed(data[a:b]))
+    return frames
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_frames_split_across_reads(seed: int) -> None:
+    script = list(cpld_frames(300, flip=0.1, seed=seed))
+    parser = FrameParser()
+
+    frames = _feed_in_pieces(parser, b"".join(script), seed)
+    assert frames == [f.decode() for f in script]
+    assert parser.take_errors() == 0
+    assert parser.pending == b""
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_error_count_does_not_depend_on_read_sizes(seed: int) -> None:
+    rng = random.Random(seed)
+    lines = []
+    for frame in cpld_frames(300, seed=seed):
+        r = rng.random()
+        if r < 0.05:
+            frame = b"xx" + frame              # junk before '#'
+        elif r < 0.10:
+            frame = frame[:-2] + b"\n"         # missing '*'
+        elif r < 0.12:
+            frame = b"noise\n"                 # no '#' at all
+        lines.append(frame)
+    data = b"".join(lines)
+
+    whole = FrameParser()
+    expected = whole.feed(data)
+    pieces = FrameParser()
+    assert _feed_in_pieces(pieces, data, seed) == expected
+    assert pieces.errors == whole.errors > 0
+
+
+def test_junk_before_hash_counts_one_error_and_keeps_frame() -> None:
+    parser = FrameParser()
+    assert parser.feed(b"\x00\xff#1,FF00,FF00*\n") == ["#1,FF00,FF00*\n"]
+    assert parser.take_errors() == 1
+    assert parser.take_errors() == 0
+
+
+def test_frame_without_star_is_dropped() -> None:
+    parser = FrameParser()
+    assert parser.feed(b"#1,FF00,FF00\n#2,FF00,FF00*\n") == ["#2,FF00,FF00*\n"]
+    assert parser.errors == 1
+
+
+def test_short_and_non_ascii_frames_are_errors() -> None:
+    parser = FrameParser()
+    assert parser.feed(b"#1,FF*\n#1,FF00,F\xe900*\n") == []
+    assert parser.errors == 2
+
+
+def test_line_longer_than_maxlen_is_discarded() -> None:
+    parser = FrameParser()
+    assert parser.feed(b"z" * (FrameParser.MAXLEN + 1)) == []
+    assert parser.errors == 1 and parser.pending == b""
+
+    # the stream resyncs at the next complete frame
+    assert parser.feed(b"zz\n#3,FF00,FF00*\n") == ["#3,FF00,FF00*\n"]
+    assert parser.errors == 2
+
+
+def test_maxlen_overflow_keeps_the_last_frame_start() -> None:
+    parser = FrameParser()
+    assert parser.feed(b"z" * FrameParser.MAXLEN + b"#4,FF00") == []
+    assert parser.errors == 1 and parser.pending == b"#4,FF00"
+    assert parser.feed(b",FF00*\n") == ["#4,FF00,FF00*\n"]
+    assert parser.errors == 1
+
+
+def test_reset_drops_pending_bytes_and_errors() -> None:
+    parser = FrameParser()
+    parser.feed(b"junk\n#5,FF")
+    parser.reset()
+    assert parser.feed(b"00,FF00*\n") == []
+    assert parser.errors == 1
+
+
+class _Log:
+    def info(self, *args, **kwargs):
+        pass
+
+
+def test_read_event_counts_junk_and_bad_words_in_cnt_error() -> None:
+    # one error per invalid chunk and per frame without its "FF" words, as the
+    # 14-byte read loop counted them
+    script = [0.1, b"garbage\n", b"#1,FE00,FE00*\n", 0.05, b"#2,FF00,FF00*\n"]
+    mk = lambda **kw: FakeSerial(script=script, force_timeout=0.5, **kw)
+    with fake_ports({"FAKE_CPLD": mk}):
+        cpld = CPLD("FAKE_CPLD", log=_Log())
+        stored = []
+        cpld.sink = stored.append
+        assert cpld.read_event() == 0
+        assert cpld.cnt_error == 2
+        assert cpld.read_event() == 0
+        assert cpld.cnt_error == 0
+    assert [[l.split(",", 1)[1] for l in ev] for ev in stored] == [["1,FE00,FE00\n"], ["2,FF00,FF00\n"]]
@@ -0,0 +1,55 @@
+"""Tests for the multi-file loader in :mod:`lib.cpld_io`."""
+from __future__ import annotations
+
+from pathlib import Path
+import sys
+
+import pandas as pd
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+LIB_DIR = REPO_ROOT / "lib"
+sys.path.insert(0, str(LIB_DIR))
+
+from cpld_io import load_cpld_file, load_cpld_records, merge_sorted_frames
+
+
+def _write_files(folder: Path, overlapping: bool) -> list:
+    """Write four small dumps; optionally interleave their time ranges."""
+
+    paths = []
+    for fidx in range(4):
+        lines = ["garbage line"]
+        for i in range(25):
+            t = 1668000000 + (i * 4 + fidx if overlapping else 1000 * fidx + i)
+            lines.append(f"{t}.5 #{i},{'FE00' if i % 3 else 'FF00'},FF00*")
+        path = folder / f"cpld_data_{fidx:05d}.dat"
+        path.write_text("\n".join(lines) + "\n")
+        paths.append(path)
+    # rotation order on disk is not chronological order
+    return paths[::-1]
+
+
+@pytest.mark.parametrize("overlapping", [False, True])
+@pytest.mark.parametrize("workers", [None, 2])
+def test_load_records_matches_concat_and_sort(tmp_path: Path, overlapping: bool, workers) -> None:
+    paths = _write_files(tmp_path, overlapping)
+
+    expected = pd.concat([load_cpld_file(p) for p in paths], ignore_index=True)
+    expected = expected.sort_values("time", kind="stable").reset_index(drop=True)
+
+    df, timings = load_cpld_records(paths, workers=workers, return_timings=True)
+    pd.testing.assert_frame_equal(df, expected)
+    assert df["time"].is_monotonic_increasing
+
+    assert timings["path"].tolist() == [str(p) for p in paths]
+    assert timings["rows"].tolist() == [25] * 4
+    assert (timings["seconds"] >= 0).all()
+
+
+def test_merge_sorted_frames_places_missing_times_last() -> None:
+    a = pd.DataFrame({"time": pd.to_datetime([1, 3, None], unit="s"), "x": [1, 3, 9]})
+    b = pd.DataFrame({"time": pd.to_datetime([0, 2], unit="s"), "x": [0, 2]})
+
+    merged = merge_sorted_frames([a, pd.DataFrame(), b])
+    assert merged["x"].tolist() == [0, 1, 2, 3, 9]
@@ -0,0 +1,123 @@
+"""Tests for the CPLD ``.dat`` readers in :mod:`lib.cpld`."""
+from __future__ import annotations
+
+from datetime import datetime
+from pathlib import Path
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+LIB_DIR = REPO_ROOT / "lib"
+sys.path.insert(0, str(LIB_DIR))
+
+from cpld import iter_cpld_data, parse_cpld_lines, parse_line_generic, read_cpld_data
+
+
+def _write_run(folder: Path) -> str:
+    """Write three rotated CPLD dumps and return their glob pattern."""
+
+    t0 = 1668000000.0
+    for fidx in range(3):
+        lines = []
+        if fidx > 0:
+            # corrupted line at the very start of a rotated file
+            lines.append("garbage after rotation")
+        for i in range(40):
+            t = t0 + 100 * fidx + i
+            if i % 7 == 3:
+                lines.append(f"{t} #{i},ZZ00,FF00*")
+            else:
+                lines.append(f"{t} #{i},{'FE00' if i % 5 == 0 else 'FF00'},FF00*")
+        path = folder / f"cpld_data_2022_11_09_120000_{fidx:05d}.dat"
+        path.write_text("\n".join(lines) + "\n")
+    return str(folder / "cpld_data_*.dat")
+
+
+@pytest.mark.parametrize("chunk_rows", [1, 7, 50, 10_000])
+def test_chunks_concatenate_to_full_read(tmp_path: Path, chunk_rows: int) -> None:
+    pattern = _write_run(tmp_path)
+    df, df_bad = read_cpld_data(pattern)
+
+    chunks = list(iter_cpld_data(pattern, chunk_rows=chunk_rows))
+    assert all(len(chunk) <= chunk_rows for chunk, _ in chunks)
+
+    streamed = pd.concat([chunk for chunk, _ in chunks], ignore_index=True)
+    streamed = streamed.sort_values("time").reset_index(drop=True)
+    pd.testing.assert_frame_equal(streamed, df)
+
+    streamed_bad = pd.concat([bad for _, bad in chunks if not bad.empty], ignore_index=True)
+    pd.testing.assert_frame_equal(streamed_bad, df_bad)
+
+
+def test_bad_lines_keep_last_valid_timestamp_across_files(tmp_path: Path) -> None:
+    pattern = _write_run(tmp_path)
+    _, df_bad = read_cpld_data(pattern)
+
+    # 6 corrupted words per file plus one garbage line per rotated file
+    assert len(df_bad) == 3 * 6 + 2
+    rotated = pd.Timestamp(1668000000 + 39, unit="s") + pd.Timedelta(hours=2)
+    assert rotated in set(df_bad["ts"])
+
+
+ODD_LINES = [
+    "",
+    "garbage",
+    "1668000000.5,12",
+    "1668000000.5,x,FF00,FF00",
+    "1668000000.5, 12 , FF00 ,ff00",
+    "1000.0,1,FF00,FF00",
+    "1668000000.5,1,FF00,FF00,FF00,FF00,FF00",
+    "1668000000.5,1,FF00,FF00,FF00,FF00",
+    "1668000000.5,1,FF00",
+    "1668000000.5,1,FF00,",
+    "nan,1,FF00,FF00",
+    "1e9,1,FF00,FF00",
+    "99999999999999,1,FF00,FF00",
+    "17000000001,1,FF00,FF00",  # extra digit: year 2508, beyond datetime64[ns]
+    "9300000000.5,1,FF00,FF00",
+    "1668000000.5,-3,FF00,FF00",
+    "1668000000.,3,FF00,FF00",
+    "1668000000.0000005,3,FF00,FF00",
+    "1668000000.0000015,3,FF00,FF00",
+    "1668000000.9999996,3,FF00,FF00",
+]
+
+
+def _fits_ns(time: datetime) -> bool:
+    try:
+        pd.Timestamp(time).as_unit("ns")
+    except pd.errors.OutOfBoundsDatetime:
+        return False
+    return True
+
+
+def test_parse_cpld_lines_matches_line_parser() -> None:
+    """The bulk parser agrees with ``parse_line_generic`` line by line."""
+
+    rng = np.random.default_rng(0)
+    lines = list(ODD_LINES)
+    for _ in range(200):
+        ts = 1668000000 + rng.random() * 1e5
+        lines.append(f"{ts!r},{rng.integers(0, 1000)},{rng.choice(['FF00', 'fe00', 'A5C3'])},FF00")
+    lines = [lines[i] for i in rng.permutation(len(lines))]
+
+    threshold = datetime(2022, 1, 1)
+    df, bad_ts, bad_rank = parse_cpld_lines(lines, threshold)
+
+    expected, expected_bad, last = [], [], None
+    for raw in lines:
+        time, lfsr, bytes_dict, valid = parse_line_generic(raw, threshold)
+        if valid and not _fits_ns(time):
+            valid = False  # would wrap around in datetime64[ns]
+        if valid:
+            last = time
+            expected.append({"time": time, "lfsrTMR": lfsr, **bytes_dict})
+        elif last is not None:
+            expected_bad.append((last, len(expected)))
+
+    pd.testing.assert_frame_equal(df, pd.DataFrame(expected))
+    assert df["time"].max() < pd.Timestamp("2262-01-01") and df["time"].min() > pd.Timestamp("2022-01-01")
+    assert list(zip(pd.to_datetime(bad_ts), bad_rank)) == expected_bad
@@ -0,0 +1,86 @@
+"""Tests for the memory-mapped CPLD store."""
+from __future__ import annotations
+
+from pathlib import Path
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+LIB_DIR = REPO_ROOT / "lib"
+sys.path.insert(0, str(LIB_DIR))
+
+from cpld import cpld_pipeline
+from cpld_events import detect_bit_increments, summarise_bit_totals
+from cpld_store import open_cpld_store, write_cpld_store
+
+
+def _records(n: int, seed: int, tz: str | None = None) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    # sticky failure flags so that edges are rare, as in a real run
+    flags = np.cumsum(rng.random((n, 16)) < 0.02, axis=0) % 2
+    high = (flags[:, :8] << np.arange(8)).sum(axis=1), (flags[:, 8:] << np.arange(8)).sum(axis=1)
+    words = [[f"{((~h) & 0xFF) << 8 | int(lo):04X}" for h, lo in zip(hb, rng.integers(0, 256, n))] for hb in high]
+    time = pd.date_range("2022-11-10", periods=n, freq="7s", tz=tz)
+    df = pd.DataFrame({"time": time, "lfsrTMR": rng.integers(0, 9, n), "B0": words[0], "B1": words[1]})
+    bad = rng.choice(n, max(1, n // 50), replace=False)
+    df.loc[bad, "B1"] = "zz!"
+    df.loc[bad[:3], "B0"] = "0x1f"
+    return df
+
+
+def test_store_matches_cpld_pipeline(tmp_path: Path) -> None:
+    df = _records(3000, seed=1)
+    expected = cpld_pipeline(df.copy())[0]
+
+    store = write_cpld_store(df, tmp_path / "run.cpld")
+    got = open_cpld_store(tmp_path / "run.cpld").to_frame()
+    assert len(store) == len(expected)
+    assert isinstance(store.time, np.memmap) and store.words.dtype == np.uint16
+    assert store.counts.dtype == np.uint32
+
+    columns = ["time", "fails_inst"] + [c for c in expected.columns if c.startswith("bitn")]
+    pd.testing.assert_frame_equal(got[columns], expected[columns])
+    assert got["B0"].tolist() == [int(w, 16) for w in expected["B0"]]
+
+
+@pytest.mark.parametrize("counters", [True, False])
+def test_chunked_append_and_summaries(tmp_path: Path, counters: bool) -> None:
+    df = _records(2500, seed=2, tz="America/Santiago")
+    whole = write_cpld_store(df, tmp_path / "whole", counters=counters)
+
+    chunks = [(df.iloc[:700], pd.DataFrame()), df.iloc[700:1900]]
+    write_cpld_store(chunks, tmp_path / "parts", counters=counters)
+    store = write_cpld_store(df.iloc[1900:], tmp_path / "parts", counters=counters, append=True)
+    pd.testing.assert_frame_equal(store.to_frame(), whole.to_frame())
+    assert str(store.times().tz) == "America/Santiago"
+
+    full = cpld_pipeline(df.copy())[0]
+    pd.testing.assert_series_equal(store.bit_totals(), summarise_bit_totals(full))
+    pd.testing.assert_frame_equal(store.bit_increments(chunk_rows=333), detect_bit_increments(full))
+
+    rows = [0, 5, 2000, 17]
+    pd.testing.assert_frame_equal(store.to_frame(rows), whole.to_frame().iloc[rows].reset_index(drop=True))
+
+
+def test_window_rows_keep_window_increments(tmp_path: Path) -> None:
+    store = write_cpld_store(_records(4000, seed=3), tmp_path / "run.cpld")
+
+    def per_window(frame: pd.DataFrame) -> pd.DataFrame:
+        counts = frame.filter(regex=r"^bitn\d+$")
+        increments = counts.diff().clip(lower=0).fillna(0)
+        increments.index = pd.DatetimeIndex(frame["time"])
+        return increments.resample("1H").sum()
+
+    rows = store.window_rows("1H", chunk_rows=777)
+    assert len(rows) < len(store) / 100
+    pd.testing.assert_frame_equal(per_window(store.to_frame(rows)), per_window(store.to_frame()))
+
+
+def test_empty_store(tmp_path: Path) -> None:
+    store = write_cpld_store([], tmp_path / "empty")
+    assert len(store) == 0 and store.to_frame().empty
+    assert store.bit_totals().tolist() == [0] * 16
+    assert store.bit_increments().empty and len(store.window_rows("1H")) == 0
@@ -0,0 +1,158 @@
+"""Tests for the threaded DAQ runtime against fake serial ports."""
+from __future__ import annotations
+
+from pathlib import Path
+import sys
+import threading
+from time import sleep, time
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DAQ_DIR = REPO_ROOT / "analysis" / "ThirdRunAna" / "Rad_CPLD_november"
+sys.path.insert(0, str(DAQ_DIR))
+
+# fake_serial goes first: it installs a stub ``serial`` module without pyserial
+from fake_serial import FakeSerial, cpld_frames, fake_ports
+from batch_writer import read_index
+from daq_runtime import Channel, DAQRuntime, DeviceFault, DeviceLoop, Supervisor, poll_cpld
+from CPLD_module import CPLD
+
+CPLD_PORT = "FAKE_CPLD"
+
+
+def _wait_for(cond, timeout=10.0) -> bool:
+    t0 = time()
+    while not cond():
+        if time() - t0 > timeout:
+            return False
+        sleep(0.01)
+    return True
+
+
+class _Log:
+    """Silent stand-in for the logger the modules receive."""
+
+    def info(self, *args, **kwargs):
+        pass
+
+    error = info
+
+
+def _make_cpld():
+    # as in daq_runtime.__main__: the FileWriter stores the lines, not store_event
+    cpld = CPLD(CPLD_PORT, log=_Log())
+    cpld.sink = lambda lines: None
+    return cpld
+
+
+def test_runtime_writes_cpld_batches(tmp_path: Path) -> None:
+    n = 200
+    frames = list(cpld_frames(n))
+    # the pause keeps the first frames clear of CPLD.__init__'s reset_input_buffer
+    mk = lambda **kw: FakeSerial(script=[0.1] + frames, rate=5000, force_timeout=0.1, **kw)
+    fname = str(tmp_path / "cpld_data_00000.dat")
+
+    rt = DAQRuntime(log=_Log(), flush_s=0.05)
+    rt.add_device("cpld", _make_cpld, poll_cpld, fname=fname, max_errors=1000)
+    with fake_ports({CPLD_PORT: mk}):
+        rt.start()
+        assert _wait_for(lambda: rt.stats()["cpld"]["written"] == n)
+        rt.stop()
+
+    lines = Path(fname).read_text().splitlines()
+    assert [l.split(",", 1)[1] for l in lines] == [f[1:-2].decode() for f in frames]
+    idx = read_index(fname)
+    assert idx["rows"] == n
+    assert idx["first_time"] == float(lines[0].split(",")[0])
+
+
+def test_runtime_rotates_files_at_max_bytes(tmp_path: Path) -> None:
+    fname = str(tmp_path / "dmm_data0_00000.dat")
+    lines = iter(["{:.3f} +8.0000E-02\n".format(1668000000 + i) for i in range(50)])
+    rt = DAQRuntime(log=_Log(), flush_s=0.05, max_bytes=200)
+    rt.add_device("dmm", object, lambda dev: [next(lines)], fname=fname, period=0.01,
+                  max_errors=1000)
+    rt.start()
+    assert _wait_for(lambda: rt.stats()["dmm"]["written"] == 50)
+    rt.stop()
+
+    files = sorted(tmp_path.glob("*.dat"))
+    assert len(files) > 1
+    assert sum(read_index(str(f))["rows"] for f in files) == 50
+
+
+def test_channel_drops_oldest_batches_when_full() -> None:
+    channel = Channel(maxsize=4)
+    count = iter(range(10**6))
+    loop = DeviceLoop("fast", object, lambda dev: [str(next(count))], channel)
+    loop.start()  # no writer: nobody drains the queue
+    assert _wait_for(lambda: channel.put_cnt >= 50)
+    loop.stop()
+    loop.join(5)
+
+    assert channel.qsize() == 4
+    assert channel.dropped == channel.put_cnt - 4
+    kept = [int(channel.get_nowait()[0]) for _ in range(4)]
+    assert kept == list(range(channel.put_cnt - 4, channel.put_cnt))
+
+
+def test_supervisor_powercycle_pauses_and_reconnects_cpld() -> None:
+    mk = lambda **kw: FakeSerial(script=cpld_frames(), rate=2000, force_timeout=0.1, **kw)
+    rt = DAQRuntime(log=_Log())
+    loop = rt.add_device("cpld", _make_cpld, poll_cpld, max_errors=1000)
+    seen = {}
+    done = threading.Event()
+
+    def action():
+        polls = loop.n_polls
+        sleep(0.3)
+        seen["paused"] = not loop.running.is_set()
+        seen["idle"] = loop.n_polls - polls <= 1  # a poll in flight may still finish
+        done.set()
+
+    supervisor = Supervisor(lambda why: rt.powercycle("cpld", action, "current " + why))
+    dmm_values = iter([0.080, 0.070, 0.070])
+    rt.add_device("dmm", object, lambda dev: ["{} {:+.4E}\n".format(time(), next(dmm_values))],
+                  period=0.1, max_errors=1000)
+    rt.subscribe("dmm", supervisor.feed)
+
+    with fake_ports({CPLD_PORT: mk}) as opened:
+        rt.start()
+        assert _wait_for(done.is_set)
+        first = opened[0]
+        assert _wait_for(lambda: len(opened) == 2 and loop.dev is not None and loop.dev.sp is opened[1])
+        polls = loop.n_polls
+        assert _wait_for(lambda: loop.n_polls > polls + 5)
+        rt.stop()
+
+    assert seen == {"paused": True, "idle": True}
+    assert [d[0] for d in rt.controller.done] == ["powercycle_cpld"]
+    assert first.received > 0 and opened[1].received > 0
+
+
+def test_nonzero_read_event_stores_lines_and_fails_at_once() -> None:
+    channel = Channel()
+    failed = []
+
+    def poll(dev):
+        raise DeviceFault("cpld not responding, error_code:-1", ["1668000000.0,reset\n"])
+
+    loop = DeviceLoop("cpld", object, poll, channel, max_errors=4, on_fail=failed.append, log=_Log())
+    loop.start()
+    assert _wait_for(lambda: len(failed) >= 1)
+    loop.stop()
+    loop.join(5)
+
+    assert channel.get_nowait() == ["1668000000.0,reset\n"]
+    assert loop.n_errors >= 1 and loop.count_err == 0
+
+
+@pytest.mark.parametrize("values, why", [([0.07, 0.07], "low"), ([0.09, 0.09], "high"),
+                                         ([0.07, 0.08, 0.07], None)])
+def test_supervisor_trips_like_launch_cpld(values, why) -> None:
+    trips = []
+    supervisor = Supervisor(trips.append)
+    for v in values:
+        supervisor.feed(["1668000000.0 {:+.4E}\n".format(v)])
+    assert trips == ([why] if why else [])
@@ -0,0 +1,45 @@
+"""Tests for the latch-up detector in :mod:`lib.detection`."""
+from __future__ import annotations
+
+from pathlib import Path
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+LIB_DIR = REPO_ROOT / "lib"
+sys.path.insert(0, str(LIB_DIR))
+
+from detection import _detect_latchups_loop, detect_latchups
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_detect_latchups_matches_reference_loop(seed: int) -> None:
+    rng = np.random.default_rng(seed)
+    levels = [1.25, 1.22, 1.31, 1.2, 1.3, 1.19, 0.5, 0.005, np.nan]
+    for _ in range(50):
+        n = int(rng.integers(0, 80))
+        values = rng.choice(levels, n)
+        offsets = np.sort(rng.integers(0, 10**11, n))
+        if rng.random() < 0.3:
+            offsets = offsets[rng.permutation(n)]  # out-of-order samples
+        index = pd.DatetimeIndex(pd.Timestamp("2022-06-01") + pd.to_timedelta(offsets, unit="ns"), name="Time")
+        df = pd.DataFrame({"IDC": values}, index=index)
+
+        pd.testing.assert_frame_equal(
+            detect_latchups(df, "IDC", off_threshold=0.01, idle_low=1.20, idle_high=1.30),
+            _detect_latchups_loop(df, "IDC", off_threshold=0.01, idle_low=1.20, idle_high=1.30),
+        )
+
+
+def test_detect_latchups_drops_events_without_recovery() -> None:
+    index = pd.date_range("2022-06-01 12:00:00", periods=6, freq="4s", name="Time")
+    df = pd.DataFrame({"IDC": [1.25, 1.23, 0.005, 0.003, 1.22, 0.004]}, index=index)
+
+    eventos = detect_latchups(df, "IDC", off_threshold=0.01, idle_low=1.20, idle_high=1.30)
+
+    assert eventos.index.tolist() == [pd.Timestamp("2022-06-01 12:00:08")]
+    assert eventos["Duración_s"].tolist() == [8]
+    assert eventos["IDC_recuperación"].tolist() == [1.22]
@@ -0,0 +1,134 @@
+"""Tests for the incremental reader of the DMM current files."""
+from __future__ import annotations
+
+from pathlib import Path
+import random
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DAQ_DIR = REPO_ROOT / "analysis" / "ThirdRunAna" / "Rad_CPLD_november"
+sys.path.insert(0, str(DAQ_DIR))
+
+from DMM_tail import TAIL_BYTES, DMMTail
+
+MINI = 0.078
+MAXI = 0.0825
+
+
+def _line(t: float, v: float) -> str:
+    # DMM.store_values: "<time()> <idc>\n" where idc already ends in '\n'
+    return "{} {:+.4E}\n\n".format(t, v)
+
+
+def _append(path: Path, text: str) -> None:
+    with open(path, "a", newline="") as f:
+        f.write(text)
+
+
+def _old_counts(path: Path, n: int) -> tuple:
+    """is_current_low / is_current_high before DMMTail: read_csv + tail(n)."""
+    df = pd.read_csv(path, delimiter=" ", header=None,
+                     dtype={0: "float64", 1: "float32", 2: "float32"}, on_bad_lines="skip")
+    tail = df.tail(n)
+    return len(tail[MINI > tail[1]]), len(tail[tail[1] > MAXI])
+
+
+def test_append_ending_mid_line(tmp_path: Path) -> None:
+    path = tmp_path / "dmm_data0_00000.dat"
+    path.write_text(_line(1.0, 0.08) + "2.0 +7.0")
+    tail = DMMTail(str(tmp_path) + "/")
+
+    assert tail.poll() == 1
+    assert tail.last(5).tolist() == [np.float32(0.08)]
+    _append(path, "000E-02\n\n")
+    assert tail.poll() == 1
+    assert tail.last(5).tolist() == [np.float32(0.08), np.float32(0.07)]
+    assert tail.poll() == 0
+
+
+def test_tail_window_drops_first_partial_line(tmp_path: Path) -> None:
+    path = tmp_path / "dmm_data0_00000.dat"
+    lines = [_line(1668000000 + i, 0.08 + i * 1e-6) for i in range(400)]
+    text = "".join(lines)
+    cut = len(text) - TAIL_BYTES
+    starts = np.cumsum([0] + [len(l) for l in lines])
+    assert cut > 0 and cut not in starts
+    path.write_text(text)
+
+    tail = DMMTail(str(tmp_path) + "/", maxlen=len(lines))
+    # only lines starting after the cut are complete; the one across it is dropped
+    complete = int((starts[:-1] > cut).sum())
+    assert tail.poll() == complete
+    expected = [np.float32(0.08 + i * 1e-6) for i in range(400 - complete, 400)]
+    assert tail.last(len(lines)).tolist() == expected
+
+
+def test_follows_file_rotation(tmp_path: Path) -> None:
+    first = tmp_path / "dmm_data0_2022_11_10_000000_00000.dat"
+    first.write_text(_line(1.0, 0.08) + _line(2.0, 0.08))
+    tail = DMMTail(str(tmp_path) + "/")
+    assert tail.poll() == 2
+
+    _append(first, _line(3.0, 0.07))
+    (tmp_path / "dmm_data0_2022_11_10_000000_00001.dat").write_text(_line(4.0, 0.07))
+    (tmp_path / "dmm_data0_2022_11_10_000000_00001.dat.idx.tmp").write_text("{}")
+    assert tail.poll() == 2
+    assert tail.fname.endswith("_00001.dat")
+    assert tail.count_below(MINI, 2) == 2
+
+    (tmp_path / "dmm_data0_2022_11_10_000000_00002.dat").write_text(_line(5.0, 0.09))
+    assert tail.poll() == 1
+    assert tail.fname.endswith("_00002.dat")
+    assert tail.last(3).tolist() == [np.float32(0.07), np.float32(0.07), np.float32(0.09)]
+    assert DMMTail(str(tmp_path) + "/").newest_file().endswith("_00002.dat")
+
+
+def test_truncated_file_is_read_again(tmp_path: Path) -> None:
+    path = tmp_path / "dmm_data0_00000.dat"
+    path.write_text("".join(_line(i, 0.08) for i in range(10)))
+    tail = DMMTail(str(tmp_path) + "/")
+    assert tail.poll() == 10
+
+    path.write_text(_line(20.0, 0.09))
+    assert tail.poll() == 1
+    assert tail.offset == path.stat().st_size
+    assert tail.count_above(MAXI, 1) == 1
+
+
+def test_missing_directory_and_empty_file(tmp_path: Path) -> None:
+    assert DMMTail(str(tmp_path / "nope") + "/").poll() == 0
+    tail = DMMTail(str(tmp_path) + "/")
+    assert tail.poll() == 0
+    (tmp_path / "dmm_data0_00000.dat").write_text("")
+    assert tail.poll() == 0
+    assert tail.count_below(MINI, 2) == 0 and tail.last(2).size == 0
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_counts_match_read_csv_tail(tmp_path: Path, seed: int) -> None:
+    rng = random.Random(seed)
+    path = tmp_path / "dmm_data0_00000.dat"
+    path.write_text("")
+    n_low, n_high = 2, 3
+    tail = DMMTail(str(tmp_path) + "/", maxlen=max(n_low, n_high))
+
+    text = ""
+    for i in range(300):
+        # values on both sides of MINI/MAXI, including the thresholds themselves
+        v = rng.choice([MINI, MAXI, 0.0779, 0.0826, 0.080, rng.uniform(0.07, 0.09)])
+        text += _line(1668000000 + i, v)
+        if rng.random() < 0.3:
+            # flush all the pending text, or only part of it (ending mid-line)
+            cut = rng.choice([len(text), rng.randrange(len(text) + 1)])
+            _append(path, text[:cut])
+            text = text[cut:]
+        tail.poll()
+        if path.stat().st_size and path.read_text().endswith("\n\n"):
+            low, _ = _old_counts(path, n_low)
+            _, high = _old_counts(path, n_high)
+            assert tail.count_below(MINI, n_low) == low
+            assert tail.count_above(MAXI, n_high) == high
@@ -0,0 +1,73 @@
+"""Tests for the vectorised hex decoder used by the verDAQ readers."""
+from __future__ import annotations
+
+from pathlib import Path
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+LIB_DIR = REPO_ROOT / "lib"
+sys.path.insert(0, str(LIB_DIR))
+
+from hex_decode import hex_columns_to_numeric, hex_to_float
+from reading import pre_pipeline
+
+
+def _reference(x):
+    """Cell-wise conversion formerly used by ``pre_pipeline``."""
+    try:
+        return int(x, 16)
+    except (ValueError, TypeError):
+        return float("nan")
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_hex_to_float_matches_int_for_strings(seed: int) -> None:
+    rng = np.random.default_rng(seed)
+    alphabet = list("0123456789abcdefABCDEF") + ["x", "g", ".", " ", "-", "+", "_"]
+    words = ["".join(rng.choice(alphabet, int(rng.integers(0, 17)))) for _ in range(3000)]
+    words += ["0x1f", " ff ", "-10", "f_f", "FFFFFFFFFFFFF", "1" * 20, "", None, np.nan]
+
+    expected = np.array([float(_reference(w)) for w in words])
+    np.testing.assert_array_equal(hex_to_float(words), expected)
+
+
+def test_hex_to_float_reads_numeric_columns_as_hex_digits() -> None:
+    assert hex_to_float(pd.Series([10, 255])).tolist() == [16.0, 597.0]
+    got = hex_to_float(pd.Series([10.0, np.nan, 1.5]))
+    assert got[0] == 16.0 and np.isnan(got[1:]).all()
+    assert hex_to_float([]).shape == (0,)
+
+
+def test_pre_pipeline_matches_cellwise_conversion() -> None:
+    rng = np.random.default_rng(7)
+    n = 500
+    df = pd.DataFrame({"t": 1.6e9 + np.arange(n) * 5e-3, "id": np.arange(n)})
+    for ch in range(8):
+        df[f"ch{ch}"] = [f"{v:03x}" for v in rng.integers(0, 4096, n)]
+    df.loc[3, "ch2"] = "zz"  # invalid cell -> NaN, column becomes float
+
+    expected = df.copy()
+    expected["timestamp"] = pd.to_datetime(expected["t"], unit="s")
+    channels = [f"ch{ch}" for ch in range(8)]
+    expected[channels] = expected[channels].applymap(_reference)
+
+    got = pre_pipeline(df.copy())
+    pd.testing.assert_frame_equal(got, expected)
+    assert got["ch0"].dtype == np.int64 and got["ch2"].dtype == np.float64
+
+
+def test_hex_columns_to_numeric_in_place() -> None:
+    df = pd.DataFrame({"ch0": ["ff", "10"], "other": ["a", "b"]})
+    assert hex_columns_to_numeric(df, ["ch0"]) is df
+    assert df["ch0"].tolist() == [255, 16] and df["other"].tolist() == ["a", "b"]
+
+
+def test_cpld_decoder_shares_the_lookup_table() -> None:
+    import cpld_decode
+    import hex_decode
+
+    assert cpld_decode._HEX_LUT is hex_decode._HEX_LUT
@@ -0,0 +1,56 @@
+"""Import-time regression tests for the lazy ``lib`` and ``radbin`` exports."""
+from __future__ import annotations
+
+import json
+from pathlib import Path
+import subprocess
+import sys
+import warnings
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+HEAVY = ["matplotlib", "seaborn", "pywt", "scipy", "statsmodels"]
+
+
+def _loaded_after(code: str) -> dict:
+    """Run ``code`` in a fresh interpreter and report import time and heavy modules."""
+    script = (
+        "import json, sys, time\n"
+        "t0 = time.perf_counter()\n"
+        f"{code}\n"
+        "elapsed = time.perf_counter() - t0\n"
+        f"print(json.dumps({{'elapsed': elapsed, 'heavy': [m for m in {HEAVY!r} if m in sys.modules]}}))\n"
+    )
+    out = subprocess.run([sys.executable, "-c", script], cwd=REPO_ROOT, check=True,
+                         capture_output=True, text=True).stdout
+    return json.loads(out.splitlines()[-1])
+
+
+def test_import_lib_and_radbin_is_cheap() -> None:
+    result = _loaded_after("import lib, radbin")
+    assert result["heavy"] == []
+    assert result["elapsed"] < 0.5
+
+
+def test_parsing_helpers_skip_plotting_and_stats() -> None:
+    result = _loaded_after("import lib\nlib.read_cpld_data, lib.import_file, lib.compute_counters")
+    assert result["heavy"] == []
+    result = _loaded_after("import radbin\nradbin.build_and_summarize")
+    assert "statsmodels" not in result["heavy"] and "matplotlib" not in result["heavy"]
+
+
+@pytest.mark.parametrize("package", ["lib", "radbin"])
+def test_every_export_resolves(package: str) -> None:
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)  # lib.poisson_binning
+        module = __import__(package)
+        for name in module.__all__:
+            value = getattr(module, name)
+            source = sys.modules[f"{package}.{module._EXPORTS[name]}"]
+            assert value is getattr(source, name)
+    assert set(module.__all__) <= set(dir(module))
+    with pytest.raises(AttributeError):
+        getattr(module, "no_such_helper")
@@ -0,0 +1,268 @@
+import numpy as np, pandas as pd
+import pytest
+from radbin.core import (
+    BinStat, _count_events_in_interval, _detect_resets_loop, _merge_bins_by_exposure_loop, _merge_bins_until, _merge_stats, _extract_event_times_loop, _inter_error_fluence_stats,
+    _inter_error_fluence_stats_loop, _sum_time_in_interval, _compute_scaled_time_clipped_copying, _scaled_time_arrays,
+    clear_scaled_time_cache, compute_scaled_time_clipped, detect_resets, extract_event_times, garwood_ci, garwood_rate_ci, merge_bins,
+    set_scaled_time_cache_budget, summarize_bins,
+)
+import radbin.core as core
+from radbin import glm
+from scipy.stats import chi2
+from radbin.synth import synth_beam, synth_fails_from_hazard
+
+
+def _reference_summarize(events, edges, beq, use_scaled, T_source, alpha):
+    """Per-bin scan, as summarize_bins used to do it."""
+    et = pd.to_datetime(pd.Series(events)).sort_values().to_numpy(dtype="datetime64[ns]")
+    edges = sorted(pd.to_datetime(pd.Series(edges)).tolist())
+    if len(et):
+        tmin = min(edges[0], pd.Timestamp(et[0]))
+        tmax = max(edges[-1], pd.Timestamp(et[-1]) + pd.Timedelta(nanoseconds=1))
+        edges = ([tmin] if edges[0] > tmin else []) + edges + ([tmax] if edges[-1] < tmax else [])
+    out = []
+    for a, b in zip(edges[:-1], edges[1:]):
+        if a >= b:
+            continue
+        # nanosecond edges: np.datetime64(Timestamp) would truncate to µs
+        N = _count_events_in_interval(et, np.datetime64(a.value, "ns"), np.datetime64(b.value, "ns"))
+        if T_source == "beam" and beq is not None:
+            T = _sum_time_in_interval(beq, a, b, use_scaled=use_scaled)
+        else:
+            T = max(0.0, (b - a).total_seconds())
+        lo, hi = garwood_rate_ci(N, T, alpha=alpha)
+        out.append(BinStat(a, b, N, T, N / T if T > 0 else np.nan, lo, hi))
+    return out
+
+
+@pytest.mark.parametrize("use_scaled,T_source", [(True, "beam"), (False, "beam"), (True, "wall")])
+def test_summarize_bins_matches_per_bin_scan(use_scaled, T_source):
+    beam = synth_beam()
+    fails = synth_fails_from_hazard(beam, hazard_mode="bathtub", plateau_level=0.01, rate_scale=0.6)
+    beq = compute_scaled_time_clipped(beam, flux_col="HEH_dose_rate")
+    events = extract_event_times(fails)
+
+    rng = np.random.default_rng(1)
+    t0, t1 = beq["time"].iloc[0], beq["time"].iloc[-1]
+    cuts = np.sort(rng.uniform(0, (t1 - t0).total_seconds(), 60))
+    edges = [t0 + pd.Timedelta(seconds=c) for c in cuts]
+    edges += [edges[3], edges[10]]  # duplicated edges produce empty bins that are skipped
+
+    got = summarize_bins(events, edges, beq, use_scaled_time=use_scaled, T_source=T_source)
+    ref = _reference_summarize(events, edges, beq, use_scaled, T_source, alpha=0.32)
+
+    assert len(got) == len(ref)
+    for g, r in zip(got, ref):
+        assert (g.t_start, g.t_end, g.N) == (r.t_start, r.t_end, r.N)
+        np.testing.assert_allclose([g.T, g.rate, g.lo, g.hi], [r.T, r.rate, r.lo, r.hi], rtol=1e-9)
+
+
+@pytest.mark.parametrize("min_separation", [0.0, 0.5, 2.0])
+def test_extract_event_times_matches_loop(min_separation):
+    rng = np.random.default_rng(2)
+    for trial in range(30):
+        n = int(rng.integers(1, 80))
+        t = pd.Series(pd.Timestamp("2022-11-09") + pd.to_timedelta(np.sort(rng.integers(0, 10**10, n)), unit="ns"))
+        c = np.cumsum(rng.integers(-2, 4, n)).astype(float)  # negative steps = resets
+        if trial % 3 == 0:
+            t[int(rng.integers(0, n))] = pd.NaT
+            c[0] = np.nan
+        fails = pd.DataFrame({"time": t, "failsP_acum": c})
+        pd.testing.assert_series_equal(
+            extract_event_times(fails, min_separation=min_separation),
+            _extract_event_times_loop(fails, min_separation=min_separation),
+        )
+
+
+def test_inter_error_fluence_stats_matches_loop():
+    beam = synth_beam()
+    beam["HEH"] = np.cumsum(beam["HEH_dose_rate"] * beam["dt"])
+    fails = synth_fails_from_hazard(beam, hazard_mode="bathtub", plateau_level=0.01, rate_scale=0.6)
+    beq = compute_scaled_time_clipped(beam, flux_col="HEH_dose_rate")
+    events = list(extract_event_times(fails))
+    events += events[5:8]  # repeated timestamps give zero-length segments
+
+    rng = np.random.default_rng(3)
+    t0, t1 = beq["time"].iloc[0], beq["time"].iloc[-1]
+    cuts = sorted(t0 + pd.Timedelta(seconds=c) for c in rng.uniform(0, (t1 - t0).total_seconds(), 120))
+    edges = [t0 - pd.Timedelta(hours=1)] + cuts + [t1 + pd.Timedelta(hours=1)]
+
+    got = _inter_error_fluence_stats(events, beq, edges)
+    ref = _inter_error_fluence_stats_loop(events, beq, edges)
+    assert pd.DataFrame(got).columns.tolist() == pd.DataFrame(ref).columns.tolist()
+    pd.testing.assert_frame_equal(pd.DataFrame(got), pd.DataFrame(ref), rtol=1e-12)
+
+
+def _garwood_reference(N, T, alpha):
+    """Scalar chi2 evaluation, as garwood_rate_ci did it before the shared engine."""
+    if T <= 0:
+        return (np.nan, np.nan)
+    N = max(N, 0)
+    lower_mu = 0.0 if N == 0 else 0.5 * chi2.ppf(alpha / 2.0, 2 * N)
+    upper_mu = 0.5 * chi2.ppf(1.0 - alpha / 2.0, 2 * (N + 1))
+    return (lower_mu / max(T, 1e-12), upper_mu / max(T, 1e-12))
+
+
+@pytest.mark.parametrize("alpha", [0.05, 0.32])
+def test_garwood_ci_matches_scalar_chi2(alpha, monkeypatch):
+    monkeypatch.setattr(core, "_GARWOOD_CACHE_SIZE", 50)
+    rng = np.random.default_rng(3)
+    N = np.concatenate([rng.integers(-2, 120, 400), [0, 0, 5000, 2.5]])
+    T = rng.uniform(0.1, 1e4, len(N))
+    T[:5] = [0.0, -1.0, np.nan, 1e-3, 1e9]
+
+    expected = np.array([_garwood_reference(n, t, alpha) for n, t in zip(N, T)])
+    for _ in range(2):  # cold, then partly cached
+        lo, hi = garwood_ci(N, T, alpha=alpha)
+        np.testing.assert_array_equal(np.c_[lo, hi], expected)
+        assert len(core._GARWOOD_CACHE) <= 50
+    assert garwood_rate_ci(7, 3.0, alpha=alpha) == _garwood_reference(7, 3.0, alpha)
+
+
+def test_glm_garwood_uses_shared_engine():
+    n, exposure = np.array([0, 1, 4, 4, 30]), np.array([1.0, 2.0, 0.5, 3.0, 10.0])
+    lo, hi = glm.garwood_rate_ci(n, exposure)
+    expected = np.array([_garwood_reference(k, t, 0.35) for k, t in zip(n, exposure)])
+    np.testing.assert_array_equal(np.c_[lo, hi], expected)
+    with pytest.raises(ValueError):
+        glm.garwood_rate_ci([1], [0.0])
+
+
+def _random_stats(seed, n=300):
+    rng = np.random.default_rng(seed)
+    edges = pd.Timestamp("2024-01-01") + pd.to_timedelta(np.cumsum(rng.integers(1, 100, n + 1)), unit="s")
+    N = rng.poisson(2.0, n) * (rng.random(n) < 0.7)
+    T = rng.exponential(50.0, n) * (rng.random(n) < 0.9)
+    return [BinStat(edges[i], edges[i + 1], int(N[i]), float(T[i]), N[i] / T[i] if T[i] > 0 else np.nan,
+                    *garwood_rate_ci(int(N[i]), float(T[i]), alpha=0.05)) for i in range(n)]
+
+
+def _frame(stats):
+    return pd.DataFrame([vars(s) for s in stats])
+
+
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("min_events,min_exposure", [(5, None), (None, 120.0), (4, 80.0), (1, None), (None, None)])
+def test_merge_stats_matches_sequential_loops(seed, min_events, min_exposure):
+    stats = _random_stats(seed)
+    expected = stats
+    if min_exposure:
+        expected = _merge_bins_by_exposure_loop(expected, min_exposure, alpha=0.05)
+    expected = _frame(_merge_bins_until(expected, min_events=min_events))
+    # the merged bins now carry the CI level requested by the caller
+    expected["lo"], expected["hi"] = garwood_ci(expected["N"], expected["T"], alpha=0.05)
+
+    got = _frame(_merge_stats(stats, min_events=min_events, min_exposure=min_exposure, alpha=0.05))
+    pd.testing.assert_frame_equal(got, expected, rtol=1e-12)
+
+
+def test_merge_bins_both_criteria_at_once():
+    N = np.array([3, 0, 0, 4, 1, 0, 2])
+    T = np.array([1.0, 5.0, 0.0, 1.0, 1.0, 9.0, 0.5])
+    np.testing.assert_array_equal(merge_bins(N, T, min_events=3), [0, 1, 4])
+    np.testing.assert_array_equal(merge_bins(N, T, min_events=3, min_exposure=2.0), [0, 2, 5])
+    np.testing.assert_array_equal(merge_bins(N, T, min_events=3, min_exposure=2.0, merge_tail=True), [0, 2])
+    np.testing.assert_array_equal(merge_bins(N, T), np.arange(7))
+
+
+
+def _sequential_starts(N, T, min_events=None, min_exposure=None):
+    """Merge starts with the sums accumulated from each start, as the loops did."""
+    starts, s = [], 0
+    while s < len(T):
+        starts.append(s)
+        n_acc, t_acc = 0, 0.0
+        while s < len(T):
+            n_acc, t_acc, s = n_acc + N[s], t_acc + T[s], s + 1
+            if (min_events is None or n_acc >= min_events) and (min_exposure is None or t_acc >= min_exposure):
+                break
+    return starts
+
+
+@pytest.mark.parametrize("min_events", [None, 3])
+def test_merge_bins_exposure_is_summed_per_segment(min_events):
+    # a huge leading exposure makes global-cumsum differences of the short bins inexact
+    rng = np.random.default_rng(0)
+    T = np.concatenate([[1e15], rng.uniform(0.05, 0.15, 2000)])
+    N = rng.poisson(1, len(T))
+    got = merge_bins(N, T, min_events=min_events, min_exposure=0.3)
+    assert got.tolist() == _sequential_starts(N, T, min_events, 0.3)
+    tail = merge_bins(N, T, min_events=min_events, min_exposure=0.3, merge_tail=True)
+    assert tail.tolist() in (got.tolist(), got[:-1].tolist())
+
+def _beam_variants():
+    beam = synth_beam(hours=2)
+    ties = beam.copy()
+    ties["time"] = ties["time"].astype("int64") // 10**9  # epoch seconds
+    ties.loc[::3, "time"] = ties["time"].iloc[0]
+    iso = beam.drop(columns="dt")
+    iso["time"] = iso["time"].astype(str)
+    gaps = beam.copy()
+    gaps["dt"] = np.nan
+    gaps.loc[5, "HEH_dose_rate"] = np.nan
+    gaps.loc[7, "time"] = pd.NaT
+    return [beam.sample(frac=1, random_state=1), ties.sample(frac=1, random_state=2), iso, gaps,
+            beam.drop(columns="beam_on"), beam.iloc[:0]]
+
+
+@pytest.mark.parametrize("mode", ["fluence", "ref_time"])
+@pytest.mark.parametrize("ref,freeze_off,flux_col", [("median", True, "HEH_dose_rate"), ("mean", False, "HEH_dose_rate"),
+                                                     ("max", True, "dHEH")])
+def test_scaled_time_cache_matches_copying_version(mode, ref, freeze_off, flux_col):
+    kw = dict(mode=mode, ref=ref, freeze_off=freeze_off, flux_col=flux_col)
+    for beam in _beam_variants():
+        expected = _compute_scaled_time_clipped_copying(beam, **kw)
+        for _ in range(2):  # miss, then hit
+            pd.testing.assert_frame_equal(compute_scaled_time_clipped(beam, **kw), expected, check_exact=True)
+
+
+def test_scaled_time_cache_keys_on_content_and_budget(monkeypatch):
+    monkeypatch.setattr(core, "_SCALED_TIME_CACHE_BYTES", core._SCALED_TIME_CACHE_BYTES)
+    clear_scaled_time_cache()
+    beam = synth_beam(hours=1)
+    st = _scaled_time_arrays(beam, flux_col="HEH_dose_rate")
+    assert _scaled_time_arrays(beam.copy(), flux_col="HEH_dose_rate") is st
+    assert _scaled_time_arrays(beam, flux_col="HEH_dose_rate", rmax=10.0) is not st
+    assert not st.dt_eq.flags.writeable
+
+    out = compute_scaled_time_clipped(beam, flux_col="HEH_dose_rate")
+    out["dt_eq"] *= 2  # the frame never aliases the cached arrays
+    np.testing.assert_array_equal(compute_scaled_time_clipped(beam, flux_col="HEH_dose_rate")["dt_eq"], st.dt_eq)
+
+    changed = beam.copy()
+    changed.loc[10, "HEH_dose_rate"] += 1.0
+    assert _scaled_time_arrays(changed, flux_col="HEH_dose_rate") is not st
+
+    set_scaled_time_cache_budget(st.nbytes)  # room for a single entry
+    assert len(core._SCALED_TIME_CACHE) == 1
+    set_scaled_time_cache_budget(0)
+    assert not core._SCALED_TIME_CACHE
+    assert _scaled_time_arrays(beam, flux_col="HEH_dose_rate") is not st
+    assert not core._SCALED_TIME_CACHE
+
+
+def _reset_fixtures():
+    beam = synth_beam()
+    out = [synth_fails_from_hazard(beam, hazard_mode="bathtub", rate_scale=2.0, reset_every_s=r)
+           for r in (None, 60, 600)]
+    rng = np.random.default_rng(5)
+    n = 3000
+    t = pd.Timestamp("2025-01-01") + pd.to_timedelta(np.sort(rng.integers(0, 3600 * 10**9, n)), unit="ns")
+    c = np.cumsum(rng.poisson(0.5, n)).astype(float)
+    c[rng.random(n) < 0.02] = 0  # resets
+    df = pd.DataFrame({"time": t, "failsP_acum": c, "lfsrTMR": rng.integers(0, 2, n)})  # ~1 Hz chatter
+    df.loc[rng.random(n) < 0.05, "failsP_acum"] = np.nan
+    df.loc[rng.random(n) < 0.05, "lfsrTMR"] = np.nan
+    df.loc[3, "time"] = pd.NaT
+    ms = df.copy()
+    ms["time"] = ms["time"].astype("int64") // 10**6  # epoch millis, with ties
+    ms.loc[::4, "time"] = ms["time"].iloc[10]
+    return out + [df.sample(frac=1, random_state=3), ms, df.drop(columns="lfsrTMR"), df.iloc[:0], df.iloc[:1]]
+
+
+@pytest.mark.parametrize("min_gap_s,rate_hz", [(30.0, 50.0), (0.0, 50.0), (0.0205, 1e9), (5.0, 0.001), (1e9, 50.0)])
+def test_detect_resets_matches_loop(min_gap_s, rate_hz):
+    for fails in _reset_fixtures():
+        got = detect_resets(fails, min_gap_s=min_gap_s, lfsr_cluster_rate_hz=rate_hz)
+        assert isinstance(got, pd.DatetimeIndex)
+        assert got.tolist() == _detect_resets_loop(fails, min_gap_s=min_gap_s, lfsr_cluster_rate_hz=rate_hz)
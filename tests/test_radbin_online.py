@@ -0,0 +1,81 @@
+import numpy as np, pandas as pd
+import pytest
+from radbin import IncrementalSummarizer
+from radbin.core import (
+    _phi_reference, build_bins_equal_count, build_bins_equal_fluence, compute_scaled_time_clipped,
+    extract_event_times, summarize_bins,
+)
+from radbin.synth import synth_beam, synth_fails_from_hazard
+
+
+def _feed(inc, beam, fails, seed=0):
+    """Stream beam/fail rows in random-sized chunks, as they would arrive in a shift."""
+    rng = np.random.default_rng(seed)
+    emitted, bi, fi = [], 0, 0
+    while bi < len(beam) or fi < len(fails):
+        nb, nf = int(rng.integers(0, 300)), int(rng.integers(0, 20))
+        emitted += inc.update(beam.iloc[bi:bi + nb], fails.iloc[fi:fi + nf])
+        bi, fi = bi + nb, fi + nf
+    return emitted + inc.finalize()
+
+
+@pytest.mark.parametrize("bin_mode,kw", [("fluence", {"n_bins": 24}), ("count", {"target_N": 20})])
+def test_incremental_matches_offline_summary(bin_mode, kw):
+    beam = synth_beam()
+    fails = synth_fails_from_hazard(beam, hazard_mode="bathtub", plateau_level=0.01, rate_scale=0.6)
+    beq = compute_scaled_time_clipped(beam, flux_col="HEH_dose_rate")
+    phi_ref = _phi_reference(beam["HEH_dose_rate"], beam["beam_on"], "median")
+    events = extract_event_times(fails)
+    if bin_mode == "fluence":
+        offline = build_bins_equal_fluence(beq, kw["n_bins"])
+        kw = {"bin_exposure": beq["t_eq"].iloc[-1] / kw["n_bins"]}
+    else:
+        offline = build_bins_equal_count(events, kw["target_N"])
+
+    inc = IncrementalSummarizer(bin_mode=bin_mode, phi_ref=phi_ref, **kw)
+    emitted = _feed(inc, beam, fails)
+
+    assert inc.t_eq == beq["t_eq"].iloc[-1]
+    assert emitted == inc.bins
+    # Same edges as the offline builders, except at the tail: finalize() closes the
+    # last bin just after the last datum.  The offline closing edge survives only
+    # when it is a regular edge (the k = n_bins crossing, or a multiple of target_N);
+    # the count builder's extra "last event" edge is replaced by the finalize edge.
+    end = max(beam["time"].iloc[-1], events.iloc[-1]) + pd.Timedelta(nanoseconds=1)
+    edges = [s.t_start for s in emitted] + [emitted[-1].t_end]
+    closing = [offline[-1]] if bin_mode == "fluence" or (len(events) - 1) % kw["target_N"] == 0 else []
+    assert edges == offline[:-1] + closing + [end]
+    ref = summarize_bins(events, edges, beq, use_scaled_time=True, alpha=0.05)
+    assert [(s.t_start, s.t_end, s.N) for s in emitted] == [(s.t_start, s.t_end, s.N) for s in ref]
+    np.testing.assert_allclose([s.T for s in emitted], [s.T for s in ref], rtol=1e-12)
+    assert sum(s.N for s in emitted) == len(events)
+    if bin_mode == "count":
+        assert all(s.N == 20 for s in emitted[:-1])
+
+
+def test_open_bin_tracks_pending_data():
+    beam = synth_beam()
+    fails = synth_fails_from_hazard(beam, hazard_mode="plateau", plateau_level=0.02, rate_scale=0.8)
+    inc = IncrementalSummarizer(bin_mode="count", target_N=1000)
+    inc.update(beam.iloc[:2000], fails.iloc[:30])
+    current = inc.open_bin()
+    assert inc.bins == [] and current.N == inc.n_events > 0
+    assert current.t_start == pd.Timestamp(extract_event_times(fails.iloc[:30]).iloc[0])
+    with pytest.raises(ValueError):
+        IncrementalSummarizer(bin_mode="fluence")
+
+
+def test_beam_buffer_bounded_before_first_fail_row():
+    beam = synth_beam()
+    fails = synth_fails_from_hazard(beam, hazard_mode="plateau", plateau_level=0.02, rate_scale=0.8)
+    w = compute_scaled_time_clipped(beam, flux_col="HEH_dose_rate")["t_eq"].iloc[-1] / 24
+    inc = IncrementalSummarizer(bin_mode="fluence", bin_exposure=w)
+    longest = 0
+    for i in range(0, len(beam), 200):  # a clean stretch: no fail rows at all yet
+        assert inc.update(beam.iloc[i:i + 200]) == []
+        longest = max(longest, len(inc._beam_t))
+    assert longest < len(beam) / 4  # only the open bin is buffered
+    late = inc.update(fail_rows=fails) + inc.finalize()
+
+    ref = IncrementalSummarizer(bin_mode="fluence", bin_exposure=w)
+    assert late == ref.update(beam, fails) + ref.finalize()
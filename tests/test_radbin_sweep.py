@@ -0,0 +1,59 @@
+import numpy as np, pandas as pd
+import pytest
+from radbin.core import build_and_summarize, compute_scaled_time_clipped
+from radbin.synth import synth_beam, synth_fails_from_hazard
+from radbin.sweep import config_grid, sweep_binning
+
+
+@pytest.fixture(scope="module")
+def run():
+    beam = synth_beam()
+    fails = synth_fails_from_hazard(beam, hazard_mode="bathtub", plateau_level=0.01, rate_scale=0.6)
+    return beam, fails
+
+
+def _configs():
+    configs = config_grid(bin_mode="fluence", n_bins=[8, 24], min_events_per_bin=[None, 5])
+    configs += config_grid(bin_mode="reset", k_multiple=[1, 3], T_source=["beam", "wall"])
+    configs += config_grid(bin_mode="count", target_N=20, min_exposure_per_bin=[None, 50.0], area_norm=(2, 1))
+    return configs
+
+
+def test_config_grid_product():
+    grid = config_grid(bin_mode="fluence", n_bins=[8, 24], min_events_per_bin=(None, 5), area_norm=(2, 1))
+    assert len(grid) == 4
+    assert grid[0] == {"bin_mode": "fluence", "n_bins": 8, "min_events_per_bin": None, "area_norm": (2, 1)}
+
+
+@pytest.mark.parametrize("workers", [None, 2])
+def test_sweep_matches_individual_calls(run, workers):
+    beam, fails = run
+    calls = []
+
+    def scaled(df, **kw):
+        calls.append(1)
+        return compute_scaled_time_clipped(df, **kw)
+
+    configs = _configs()
+    bins, timings = sweep_binning(beam, fails, configs, scaled_time_fn=scaled, workers=workers, alpha=0.32)
+    assert len(calls) == 1
+
+    for i, cfg in enumerate(configs):
+        expected = build_and_summarize(beam, fails, alpha=0.32, **cfg)
+        got = bins[bins["config"] == i].drop(columns=["config", *[c for c in bins.columns if c in (
+            "bin_mode", "k_multiple", "n_bins", "target_N", "area_norm", "T_source",
+            "min_events_per_bin", "min_exposure_per_bin", "alpha")]]).reset_index(drop=True)
+        pd.testing.assert_frame_equal(got, expected)
+        assert (bins.loc[bins["config"] == i, "bin_mode"] == cfg["bin_mode"]).all()
+
+    shared = timings[timings["config"] == -1]
+    assert set(shared["step"]) == {"scaled_time", "event_times", "resets"}
+    per_config = timings[timings["step"] == "binning"]
+    assert per_config["config"].tolist() == list(range(len(configs)))
+    assert per_config["n_out"].tolist() == bins.groupby("config").size().reindex(range(len(configs)), fill_value=0).tolist()
+
+
+def test_sweep_rejects_unknown_parameters(run):
+    beam, fails = run
+    with pytest.raises(TypeError):
+        sweep_binning(beam, fails, [{"bin_mode": "fluence", "nbins": 3}])
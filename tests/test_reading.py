@@ -0,0 +1,59 @@
+"""Tests for the verDAQ burst timestamp reconstruction."""
+from __future__ import annotations
+
+from datetime import timedelta
+from pathlib import Path
+import sys
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+LIB_DIR = REPO_ROOT / "lib"
+sys.path.insert(0, str(LIB_DIR))
+
+from reading import burst_timestamps
+
+
+def _burst_timestamps_loop(df: pd.DataFrame, ms: int = 5) -> list:
+    """Row loop formerly used by ``analysis/FirstRunAna/runAnalysis.py``."""
+    curr_t = pd.to_datetime(float("nan"))
+    k = 0
+    tstmp = [curr_t] * len(df)
+    for idx, (t, ch1) in enumerate(zip(df["time"], df["ch1"])):
+        if (not pd.isnull(t)) and (pd.isnull(ch1)):
+            curr_t = t
+            k = 0
+        tstmp[idx] = curr_t + timedelta(milliseconds=ms * k)
+        k = k + 1
+    return tstmp
+
+
+def _bursts(seed: int, n: int = 2000) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    header = rng.random(n) < 0.05
+    header[0] = False  # samples before the first header have no time
+    secs = 1.65e9 + np.cumsum(rng.integers(1, 5, n))
+    time = pd.Series(pd.to_datetime(secs, unit="s")).where(header | (rng.random(n) < 0.3))
+    ch1 = pd.Series(rng.integers(0, 4096, n).astype(float)).where(~header)
+    return pd.DataFrame({"time": time, "ch1": ch1}, index=np.arange(n) + 100)
+
+
+def test_burst_timestamps_matches_row_loop() -> None:
+    for seed in range(3):
+        df = _bursts(seed)
+        expected = pd.Series(_burst_timestamps_loop(df), index=df.index, name="time_stmp")
+        got = burst_timestamps(df)
+        assert got.dtype == "datetime64[ns]"
+        pd.testing.assert_series_equal(got, expected.astype("datetime64[ns]"))
+
+
+def test_burst_timestamps_period_and_header_mask() -> None:
+    df = pd.DataFrame({"time": pd.to_datetime(["2022-05-25 10:00:00", None, None, "2022-05-25 10:00:01", None]),
+                       "ch1": [np.nan, 1, 2, np.nan, 3]})
+    got = burst_timestamps(df, period="1ms")
+    assert got.dt.strftime("%S.%f").tolist() == ["00.000000", "00.001000", "00.002000", "01.000000", "01.001000"]
+    pd.testing.assert_series_equal(burst_timestamps(df, period=1e-3), got)
+
+    got = burst_timestamps(df, period=1.0, header=[False, True, False, False, False])
+    assert got.isna().all()  # the forced header row carries no time
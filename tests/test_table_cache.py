@@ -0,0 +1,124 @@
+"""Tests for the on-disk table cache in :mod:`lib.table_cache`."""
+from __future__ import annotations
+
+import os
+from pathlib import Path
+import sys
+
+import pandas as pd
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+LIB_DIR = REPO_ROOT / "lib"
+sys.path.insert(0, str(LIB_DIR))
+
+from cpld import read_cpld_data
+from cpld_io import load_cpld_file
+from table_cache import cached_call, compact_dtypes, evict, invalidate
+import table_cache
+
+
+class _CountingReader:
+    """Wrap a reader and count how many times it actually runs."""
+
+    def __init__(self, func):
+        self.func = func
+        self.calls = 0
+        self.__module__ = func.__module__
+        self.__qualname__ = func.__qualname__
+
+    def __call__(self, *args, **kwargs):
+        self.calls += 1
+        return self.func(*args, **kwargs)
+
+
+def _write_dump(path: Path, rows: int = 30) -> None:
+    lines = [f"{1668000000 + i}.25 #{i},{'FE00' if i % 4 else 'FF00'},FF00*" for i in range(rows)]
+    lines.insert(5, "garbage")
+    path.write_text("\n".join(lines) + "\n")
+
+
+FORMATS = ["pickle"] + (["parquet", "feather"] if table_cache._HAS_PYARROW else [])
+
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_cache_hit_returns_identical_tuple(tmp_path: Path, fmt: str) -> None:
+    _write_dump(tmp_path / "cpld_data_00000.dat")
+    pattern = str(tmp_path / "cpld_data_*.dat")
+    reader = _CountingReader(read_cpld_data)
+    cache = tmp_path / "cache"
+
+    fresh = cached_call(reader, pattern, sources=pattern, cache_dir=cache, fmt=fmt)
+    cached = cached_call(reader, pattern, sources=pattern, cache_dir=cache, fmt=fmt)
+
+    assert reader.calls == 1
+    assert isinstance(cached, tuple) and len(cached) == 2
+    for expected, got in zip(fresh, cached):
+        pd.testing.assert_frame_equal(got, expected)
+
+
+def test_source_change_and_options_invalidate(tmp_path: Path) -> None:
+    source = tmp_path / "cpld_data_00000.dat"
+    _write_dump(source)
+    reader = _CountingReader(load_cpld_file)
+    cache = tmp_path / "cache"
+
+    cached_call(reader, source, sources=source, cache_dir=cache)
+    cached_call(reader, source, sources=source, cache_dir=cache, tz_offset_hours=2)
+    assert reader.calls == 2
+
+    _write_dump(source, rows=40)
+    os.utime(source, ns=(0, source.stat().st_mtime_ns + 10**9))
+    df = cached_call(reader, source, sources=source, cache_dir=cache)
+    assert reader.calls == 3
+    assert len(df) == 40
+    # the stale entry of the same call was replaced, the tz variant is kept
+    assert len(list(cache.glob("*.json"))) == 2
+
+    assert invalidate(cache, sources=source) == 2
+    cached_call(reader, source, sources=source, cache_dir=cache)
+    assert reader.calls == 4
+
+
+def test_evict_drops_least_recently_used(tmp_path: Path) -> None:
+    cache = tmp_path / "cache"
+    sources, manifests = [], []
+    for i in range(3):
+        source = tmp_path / f"cpld_data_{i:05d}.dat"
+        _write_dump(source)
+        cached_call(load_cpld_file, source, sources=source, cache_dir=cache)
+        manifest = sorted(cache.glob("*.json"), key=os.path.getmtime)[-1]
+        os.utime(manifest, ns=(0, (i + 1) * 10**9))
+        sources.append(source)
+        manifests.append(manifest)
+    size = max(sum(p.stat().st_size for p in cache.glob(m.stem + "*")) for m in manifests)
+
+    # a hit refreshes entry 0, so entry 1 is now the least recently used
+    reader = _CountingReader(load_cpld_file)
+    cached_call(reader, sources[0], sources=sources[0], cache_dir=cache)
+    assert reader.calls == 0
+
+    assert evict(cache, max_bytes=2 * size) == 1
+    assert [m.exists() for m in manifests] == [True, False, True]
+    assert evict(cache, max_bytes=size) == 1
+    assert [m.exists() for m in manifests] == [True, False, False]
+
+    cached_call(reader, sources[0], sources=sources[0], cache_dir=cache)
+    assert reader.calls == 0
+    assert evict(cache, max_bytes=0) == 1
+    assert not list(cache.iterdir())
+
+
+def test_compact_dtypes_is_lossless() -> None:
+    df = pd.DataFrame(
+        {
+            "lfsr": [1, 200, 3000],
+            "ts": [1668000000.123456, 1.5, 2.0],
+            "word": ["FF00", "FF00", "FF00"],
+        }
+    )
+    compact = compact_dtypes(df)
+    assert str(compact["lfsr"].dtype) == "int16"
+    assert compact["ts"].dtype == "float64"
+    assert str(compact["word"].dtype) == "category"
+    pd.testing.assert_frame_equal(compact.astype(df.dtypes.to_dict()), df)